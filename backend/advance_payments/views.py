@@ -22,6 +22,7 @@ from .serializers import (
     LaborAdvanceSummarySerializer,
 )
 from .signals import advance_payment_bulk_updated
+from core.pagination import paginate_queryset
 
 
 # ==================== BASIC CRUD OPERATIONS ====================
@@ -146,12 +147,8 @@ def list_advance_payments(request):
         # Select related to avoid N+1 queries
         payments = payments.select_related('labor', 'created_by')
         
-        # Calculate pagination
-        total_count = payments.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        payments = payments[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        payments, pagination = paginate_queryset(request, payments, page, page_size)
         
         serializer = AdvancePaymentListSerializer(payments, many=True)
         
@@ -159,14 +156,7 @@ def list_advance_payments(request):
             'success': True,
             'data': {
                 'advance_payments': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                },
+                'pagination': pagination,
                 'filters_applied': {
                     'search': search,
                     'labor_name': labor_name,
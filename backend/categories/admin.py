@@ -10,6 +10,7 @@ class CategoryAdmin(admin.ModelAdmin):
         'name', 
         'description', 
         'is_active', 
+        'active_product_count',
         'created_by', 
         'created_at', 
         'updated_at'
@@ -31,6 +32,9 @@ class CategoryAdmin(admin.ModelAdmin):
     
     readonly_fields = [
         'id', 
+        'active_product_count',
+        'stock_quantity',
+        'inventory_value',
         'created_at', 
         'updated_at'
     ]
@@ -39,6 +43,9 @@ class CategoryAdmin(admin.ModelAdmin):
         ('Category Information', {
             'fields': ('name', 'description', 'is_active')
         }),
+        ('Product Counters', {
+            'fields': ('active_product_count', 'stock_quantity', 'inventory_value')
+        }),
         ('Metadata', {
             'fields': ('id', 'created_by', 'created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -62,11 +69,13 @@ class CategoryAdmin(admin.ModelAdmin):
     def make_active(self, request, queryset):
         """Admin action to activate categories"""
         updated = queryset.update(is_active=True)
+        Category.bump_list_version()
         self.message_user(request, f'{updated} categories were successfully activated.')
     make_active.short_description = "Mark selected categories as active"
     
     def make_inactive(self, request, queryset):
         """Admin action to deactivate categories"""
         updated = queryset.update(is_active=False)
+        Category.bump_list_version()
         self.message_user(request, f'{updated} categories were successfully deactivated.')
     make_inactive.short_description = "Mark selected categories as inactive"    
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CategoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'categories'
+    
+    def ready(self):
+        """Import signals when the app is ready"""
+        import categories.signals
@@ -0,0 +1,12 @@
+import factory
+from factory.django import DjangoModelFactory
+from posapi.factories import UserFactory
+from .models import Category
+
+
+class CategoryFactory(DjangoModelFactory):
+    class Meta:
+        model = Category
+
+    name = factory.Sequence(lambda n: f'Category {n}')
+    created_by = factory.SubFactory(UserFactory)
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:52
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum, F, DecimalField
+
+
+def backfill_product_counters(apps, schema_editor):
+    """Compute the product counters for existing categories"""
+    Category = apps.get_model('categories', 'Category')
+    Product = apps.get_model('products', 'Product')
+    totals = Product.objects.filter(is_active=True).values('category_id').annotate(
+        product_count=Count('id'),
+        total_quantity=Sum('quantity'),
+        total_value=Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2))
+    ).order_by()
+    for row in totals:
+        Category.objects.filter(pk=row['category_id']).update(
+            active_product_count=row['product_count'],
+            stock_quantity=row['total_quantity'] or 0,
+            inventory_value=row['total_value'] or 0
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_category_name_trigram_index'),
+        ('products', '0005_stockmovement_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_product_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of active products in this category (maintained by product writes)'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='inventory_value',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Price x quantity across active products (maintained by product writes)', max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='stock_quantity',
+            field=models.IntegerField(default=0, help_text='Units in stock across active products (maintained by product writes)'),
+        ),
+        migrations.RunPython(backfill_product_counters, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from decimal import Decimal
 
 
 class Category(models.Model):
@@ -25,6 +26,20 @@ class Category(models.Model):
         default=True,
         help_text="Used for soft deletion. Inactive categories won't appear in lists"
     )
+    active_product_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of active products in this category (maintained by product writes)"
+    )
+    stock_quantity = models.IntegerField(
+        default=0,
+        help_text="Units in stock across active products (maintained by product writes)"
+    )
+    inventory_value = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Price x quantity across active products (maintained by product writes)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -59,4 +74,71 @@ class Category(models.Model):
     def active_categories(cls):
         """Return only active categories"""
         return cls.objects.filter(is_active=True)
+    
+    # Shared version of the category list endpoint (core.versions)
+    LIST_VERSION_CACHE_KEY = 'category_list_version'
+    
+    @classmethod
+    def get_list_version(cls):
+        """Get the current category list version (bumped whenever listed data changes)"""
+        from core.versions import get_version
+        return get_version(cls.LIST_VERSION_CACHE_KEY)
+    
+    @classmethod
+    def bump_list_version(cls):
+        """Invalidate category list ETags"""
+        from core.versions import bump_version
+        bump_version(cls.LIST_VERSION_CACHE_KEY)
+    
+    @classmethod
+    def refresh_counters(cls, category_ids=None):
+        """Recompute product counters for the given categories (all when None)"""
+        from django.db.models import Count, Sum, F, DecimalField
+        from products.models import Product
+        
+        categories = cls.objects.all()
+        if category_ids is not None:
+            categories = categories.filter(pk__in=set(category_ids))
+        
+        totals = {
+            row['category_id']: row
+            for row in Product.active_products().filter(
+                category__in=categories
+            ).values('category_id').annotate(
+                product_count=Count('id'),
+                total_quantity=Sum('quantity'),
+                total_value=Sum(
+                    F('price') * F('quantity'),
+                    output_field=DecimalField(max_digits=15, decimal_places=2)
+                )
+            ).order_by()
+        }
+        
+        categories = list(categories)
+        list_changed = False
+        for category in categories:
+            row = totals.get(category.pk, {})
+            product_count = row.get('product_count', 0)
+            list_changed = list_changed or category.active_product_count != product_count
+            category.active_product_count = product_count
+            category.stock_quantity = row.get('total_quantity') or 0
+            category.inventory_value = row.get('total_value') or Decimal('0.00')
+        
+        cls.objects.bulk_update(
+            categories,
+            ['active_product_count', 'stock_quantity', 'inventory_value'],
+            batch_size=500
+        )
+        if list_changed:
+            cls.bump_list_version()
+        return len(categories)
+    
+    @classmethod
+    def adjust_stock_counters(cls, category_id, quantity_delta, price):
+        """Apply an active product's stock change to its category without recounting"""
+        from django.db.models import F
+        cls.objects.filter(pk=category_id).update(
+            stock_quantity=F('stock_quantity') + quantity_delta,
+            inventory_value=F('inventory_value') + price * quantity_delta
+        )
     
\ No newline at end of file
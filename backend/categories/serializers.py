@@ -15,12 +15,18 @@ class CategorySerializer(serializers.ModelSerializer):
             'name', 
             'description', 
             'is_active', 
+            'active_product_count',
+            'stock_quantity',
+            'inventory_value',
             'created_at', 
             'updated_at', 
             'created_by',
             'created_by_id'
         )
-        read_only_fields = ('id', 'created_at', 'updated_at', 'created_by', 'created_by_id')
+        read_only_fields = (
+            'id', 'active_product_count', 'stock_quantity', 'inventory_value',
+            'created_at', 'updated_at', 'created_by', 'created_by_id'
+        )
     
     def validate_name(self, value):
         """Validate category name uniqueness (case-insensitive)"""
@@ -75,6 +81,7 @@ class CategoryListSerializer(serializers.ModelSerializer):
             'name', 
             'description', 
             'is_active',
+            'active_product_count',
             'created_at',
             'created_by_email'
         )
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Category
+
+
+@receiver(post_save, sender=Category)
+def category_post_save(sender, instance, **kwargs):
+    """
+    Invalidate category list ETags when a category is created or changed
+    """
+    Category.bump_list_version()
+
+
+@receiver(post_delete, sender=Category)
+def category_post_delete(sender, instance, **kwargs):
+    """
+    Invalidate category list ETags when a category is deleted
+    """
+    Category.bump_list_version()
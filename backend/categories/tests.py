@@ -1,3 +1,110 @@
 from django.test import TestCase
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from decimal import Decimal
+from posapi.factories import UserFactory
+from products.factories import ProductFactory
+from .factories import CategoryFactory
+from .models import Category
 
-# Create your tests here.
+
+class CategoryCountersTest(TestCase):
+    """Test cases for the denormalized category product counters"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.category = CategoryFactory(name='Suits')
+        self.other_category = CategoryFactory(name='Shawls')
+
+    def _create_product(self, quantity, price='100.00'):
+        return ProductFactory(price=Decimal(price), quantity=quantity, category=self.category)
+
+    def _counters(self, category):
+        category.refresh_from_db()
+        return category.active_product_count, category.stock_quantity, category.inventory_value
+
+    def test_counters_follow_product_writes(self):
+        """Test counters track product creation, stock changes, moves and soft deletes"""
+        product = self._create_product(10)
+        self._create_product(5, price='50.00')
+        self.assertEqual(self._counters(self.category), (2, 15, Decimal('1250.00')))
+
+        product.reduce_stock_for_sale(4)
+        self.assertEqual(self._counters(self.category), (2, 11, Decimal('850.00')))
+
+        product.category = self.other_category
+        product.save()
+        self.assertEqual(self._counters(self.category), (1, 5, Decimal('250.00')))
+        self.assertEqual(self._counters(self.other_category), (1, 6, Decimal('600.00')))
+
+        product.soft_delete()
+        self.assertEqual(self._counters(self.other_category), (0, 0, Decimal('0.00')))
+
+    def test_refresh_counters_repairs_drift(self):
+        """Test a full recount restores counters changed outside product writes"""
+        self._create_product(10)
+        Category.objects.filter(pk=self.category.pk).update(active_product_count=7, stock_quantity=0)
+
+        Category.refresh_counters()
+        self.assertEqual(self._counters(self.category), (1, 10, Decimal('1000.00')))
+
+
+class CategoryListCacheTest(TestCase):
+    """Test cases for ETag revalidation of the category list endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # Run the version bump now: one still pending would absorb the bumps made by the test
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryFactory(name='Suits', created_by=self.user)
+
+    def test_etag_revalidation(self):
+        """Test unchanged lists answer If-None-Match with 304 and changes produce a new ETag"""
+        url = reverse('categories:list_categories')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Only the shared list version is read
+        self.assertTrue(all('"data_versions"' in query['sql'] for query in queries.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Shawls', created_by=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['data']['categories']), 2)
+
+    def test_revalidation_sees_other_workers_writes(self):
+        """Test a write handled by another worker is served by this one, not answered with a 304"""
+        url = reverse('categories:list_categories')
+        etag = self.client.get(url)['ETag']
+
+        # Another worker renames the category and bumps the version through its own cache connection
+        Category.objects.filter(name='Suits').update(name='Bridal Suits')
+        caches.create_connection('versions').incr(Category.LIST_VERSION_CACHE_KEY)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['categories'][0]['name'], 'Bridal Suits')
+
+    def test_query_parameters_are_cached_separately(self):
+        """Test filtered lists do not share an ETag with the full list"""
+        url = reverse('categories:list_categories')
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Shawls', created_by=self.user)
+
+        full = self.client.get(url)
+        filtered = self.client.get(url, {'search': 'shawl'})
+        self.assertNotEqual(full['ETag'], filtered['ETag'])
+        self.assertEqual(len(filtered.data['data']['categories']), 1)
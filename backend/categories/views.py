@@ -1,66 +1,47 @@
+import hashlib
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition
 from .models import Category
+from products.models import Product
 from .serializers import (
     CategorySerializer,
     CategoryCreateSerializer,
     CategoryListSerializer,
     CategoryUpdateSerializer
 )
+from core.pagination import paginate_queryset
+from core.conditional import conditional_get
 
 
 # Function-based views (following your User module pattern)
 
+def _category_list_etag(request):
+    """ETag of a category list response: shared list version plus query string"""
+    query_hash = hashlib.md5(request.GET.urlencode().encode()).hexdigest()
+    return f'categories-{Category.get_list_version()}-{query_hash}'
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condition(etag_func=_category_list_etag)
 def list_categories(request):
     """
     List all active categories with pagination
+    
+    Responses carry an ETag derived from the shared category list version,
+    so clients can revalidate with If-None-Match and get a 304 until a
+    category or its product count changes.
     """
     try:
-        # Get query parameters
-        show_inactive = request.GET.get('show_inactive', 'false').lower() == 'true'
-        page_size = min(int(request.GET.get('page_size', 20)), 100)  # Max 100 items per page
-        page = int(request.GET.get('page', 1))
-        
-        # Filter categories
-        if show_inactive:
-            categories = Category.objects.all()
-        else:
-            categories = Category.active_categories()
-        
-        # Apply search filter if provided
-        search = request.GET.get('search', '').strip()
-        if search:
-            categories = categories.filter(name__icontains=search)
-        
-        # Calculate pagination
-        total_count = categories.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        categories = categories[start_index:end_index]
-        
-        serializer = CategoryListSerializer(categories, many=True)
-        
         return Response({
             'success': True,
-            'data': {
-                'categories': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                }
-            }
-        }, status=status.HTTP_200_OK)
+            'data': _build_category_list(request)
+        }, status=status.HTTP_200_OK, headers={'Cache-Control': 'private, no-cache'})
         
     except ValueError:
         return Response({
@@ -77,6 +58,36 @@ def list_categories(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _build_category_list(request):
+    """Build the category list payload for the request's query parameters"""
+    # Get query parameters
+    show_inactive = request.GET.get('show_inactive', 'false').lower() == 'true'
+    page_size = min(int(request.GET.get('page_size', 20)), 100)  # Max 100 items per page
+    page = int(request.GET.get('page', 1))
+    
+    # Filter categories
+    if show_inactive:
+        categories = Category.objects.all()
+    else:
+        categories = Category.active_categories()
+    categories = categories.select_related('created_by')
+    
+    # Apply search filter if provided
+    search = request.GET.get('search', '').strip()
+    if search:
+        categories = categories.filter(name__icontains=search)
+    
+    # Calculate pagination (keyset when ?cursor= is given)
+    categories, pagination = paginate_queryset(request, categories, page, page_size)
+    
+    serializer = CategoryListSerializer(categories, many=True)
+    
+    return {
+        'categories': serializer.data,
+        'pagination': pagination
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_category(request):
@@ -115,6 +126,10 @@ def create_category(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(
+    lambda request, category_id: Category.objects.filter(pk=category_id),
+    lambda request, category_id: Product.objects.filter(category_id=category_id),
+)
 def get_category(request, category_id):
     """
     Retrieve a specific category by ID
@@ -0,0 +1,100 @@
+import hashlib
+from functools import wraps
+from django.db import models
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+
+
+class DataVersion:
+    """
+    A conditional_get source fingerprinted by a maintained version counter.
+
+    Use it instead of a model for large tables, whose COUNT/MAX would scan
+    every row on each request, e.g. DataVersion(Product.get_data_version).
+    The counter must live in the shared store of core.versions, so a write
+    handled by one worker changes the ETag served by all of them.
+    """
+
+    def __init__(self, get_version):
+        self.get_version = get_version
+
+
+def _resolve_source(source, request, *args, **kwargs):
+    """Turn a model class or a callable taking the view arguments into a queryset"""
+    if isinstance(source, type) and issubclass(source, models.Model):
+        return source.objects.all()
+    return source(request, *args, **kwargs)
+
+
+def queryset_fingerprint(querysets):
+    """
+    Get a cheap (digest parts, newest updated_at) fingerprint of querysets.
+
+    Row count catches inserts and hard deletes, the newest updated_at catches
+    in-place updates and soft deletes.
+    """
+    parts = []
+    last_modified = None
+    for queryset in querysets:
+        totals = queryset.order_by().aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+        parts.append(f"{totals['count']}:{totals['last_modified'].isoformat() if totals['last_modified'] else '-'}")
+        if totals['last_modified'] and (last_modified is None or totals['last_modified'] > last_modified):
+            last_modified = totals['last_modified']
+    return parts, last_modified
+
+
+def conditional_get(*sources):
+    """
+    Answer GET requests with an ETag and 304 Not Modified when nothing changed.
+
+    Each source is a model class, a callable receiving the view's
+    (request, *args, **kwargs) and returning the queryset whose rows feed the
+    response, or a DataVersion. The ETag covers every source's fingerprint,
+    the query string and the current date (for age-derived fields such as
+    is_new_customer).
+
+    Last-Modified is sent for information only: deletions do not advance it,
+    so revalidation is done on the ETag.
+
+    Apply below @permission_classes so authentication runs first:
+
+        @api_view(['GET'])
+        @permission_classes([IsAuthenticated])
+        @conditional_get(DataVersion(Product.get_data_version))
+        def list_products(request): ...
+    """
+    def decorator(view_func):
+        def fingerprint(request, *args, **kwargs):
+            # etag_func and the response hook share one set of aggregate queries
+            if not hasattr(request, '_conditional_fingerprint'):
+                versions = [source for source in sources if isinstance(source, DataVersion)]
+                parts, last_modified = queryset_fingerprint(
+                    _resolve_source(source, request, *args, **kwargs)
+                    for source in sources if not isinstance(source, DataVersion)
+                )
+                parts += [f'v{source.get_version()}' for source in versions]
+                parts += [request.get_full_path(), timezone.localdate().isoformat()]
+                request._conditional_fingerprint = (
+                    hashlib.md5('|'.join(parts).encode()).hexdigest(),
+                    last_modified
+                )
+            return request._conditional_fingerprint
+
+        def etag_func(request, *args, **kwargs):
+            return fingerprint(request, *args, **kwargs)[0]
+
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD') and response.status_code == 200:
+                last_modified = fingerprint(request, *args, **kwargs)[1]
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+            return response
+
+        return wrapper
+    return decorator
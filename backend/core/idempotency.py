@@ -0,0 +1,103 @@
+import hashlib
+import json
+import uuid
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from rest_framework import status
+from rest_framework.response import Response
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Must be shared by all workers, otherwise a retry landing on another process runs the write again
+cache = ConnectionProxy(caches, 'idempotency')
+
+
+def _request_fingerprint(request):
+    """Digest of the request payload, so a reused key cannot replay a different write"""
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cache_key(request, idempotency_key):
+    # Keys are scoped to the user and path: add-payment for two sales may share a client key
+    user_id = request.user.pk if request.user.is_authenticated else 'anonymous'
+    scope = hashlib.md5(f'{user_id}|{request.path}|{idempotency_key}'.encode()).hexdigest()
+    return f'idempotency_{scope}'
+
+
+def idempotent(view_func):
+    """
+    Replay the stored response of a POST retried with the same Idempotency-Key.
+
+    The first successful (2xx) response is stored in the 'idempotency' cache
+    for IDEMPOTENCY_KEY_TTL seconds (default one day) and returned as-is to retries, marked with an
+    Idempotent-Replayed header, without running the view again. Failed
+    responses are not stored since they wrote nothing, so the client may retry
+    them. A retry arriving while the first request is still running gets 409,
+    and reusing a key with a different payload gets 422.
+
+    Requests without the header are handled normally. Apply below
+    @permission_classes so authentication runs first:
+
+        @api_view(['POST'])
+        @permission_classes([IsAuthenticated])
+        @idempotent
+        def create_sale(request): ...
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER, '').strip()
+        if request.method != 'POST' or not idempotency_key:
+            return view_func(request, *args, **kwargs)
+
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return Response({
+                'success': False,
+                'message': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = _cache_key(request, idempotency_key)
+        lock_key = f'{cache_key}_lock'
+        fingerprint = _request_fingerprint(request)
+        lock_token = uuid.uuid4().hex
+        ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+        stored = cache.get(cache_key)
+        if stored is None:
+            # Only one request per key may run the write path at a time
+            if not cache.add(lock_key, lock_token, getattr(settings, 'IDEMPOTENCY_LOCK_TTL', 60)):
+                return Response({
+                    'success': False,
+                    'message': 'A request with this idempotency key is still being processed.'
+                }, status=status.HTTP_409_CONFLICT)
+            try:
+                # The first request may have finished between the lookup and the lock
+                stored = cache.get(cache_key)
+                if stored is None:
+                    response = view_func(request, *args, **kwargs)
+                    if status.is_success(response.status_code) and hasattr(response, 'data'):
+                        cache.set(cache_key, {
+                            'fingerprint': fingerprint,
+                            'status': response.status_code,
+                            'data': response.data,
+                        }, ttl)
+                    return response
+            finally:
+                # The lock may have expired and been taken by a retry; only release our own
+                if cache.get(lock_key) == lock_token:
+                    cache.delete(lock_key)
+
+        if stored['fingerprint'] != fingerprint:
+            return Response({
+                'success': False,
+                'message': 'This idempotency key was already used with a different request.'
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        return Response(stored['data'], status=stored['status'], headers={REPLAYED_HEADER: 'true'})
+
+    return wrapper
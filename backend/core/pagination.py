@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q
+
+
+def is_cursor_request(request):
+    """Keyset pagination is opt-in: any request carrying a cursor parameter (even empty)"""
+    return 'cursor' in request.GET
+
+
+def encode_cursor(instance, field='created_at'):
+    """Encode the keyset position of an instance as an opaque cursor string"""
+    payload = {'value': getattr(instance, field).isoformat(), 'id': str(instance.pk)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into its (field value, pk) keyset position"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return datetime.fromisoformat(payload['value']), payload['id']
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid pagination cursor.')
+
+
+def cursor_paginate(request, queryset, page_size, field='created_at'):
+    """
+    Keyset-paginate a queryset newest first on (field, pk).
+
+    Avoids OFFSET scans on deep pages; the exact count is only computed
+    when the request passes with_count=true.
+    """
+    cursor = request.GET.get('cursor', '').strip()
+    with_count = request.GET.get('with_count', 'false').lower() == 'true'
+
+    total_count = queryset.count() if with_count else None
+
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+        )
+
+    # Fetch one extra row to know whether another page exists
+    items = list(queryset[:page_size + 1])
+    has_next = len(items) > page_size
+    items = items[:page_size]
+
+    pagination = {
+        'page_size': page_size,
+        'cursor': cursor or None,
+        'next_cursor': encode_cursor(items[-1], field) if has_next else None,
+        'has_next': has_next,
+    }
+    if with_count:
+        pagination['total_count'] = total_count
+
+    return items, pagination
+
+
+def paginate_queryset(request, queryset, page, page_size):
+    """
+    Paginate a list endpoint queryset.
+
+    Uses keyset pagination when ?cursor= is present, otherwise the standard
+    page/page_size offset pagination with the usual pagination payload.
+    """
+    if is_cursor_request(request):
+        return cursor_paginate(request, queryset, page_size)
+
+    total_count = queryset.count()
+    start_index = (page - 1) * page_size
+    end_index = start_index + page_size
+
+    return queryset[start_index:end_index], {
+        'current_page': page,
+        'page_size': page_size,
+        'total_count': total_count,
+        'total_pages': (total_count + page_size - 1) // page_size,
+        'has_next': end_index < total_count,
+        'has_previous': page > 1
+    }
@@ -108,6 +108,10 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Rendered sale invoices (sales.invoices). Kept outside MEDIA_ROOT, which is
+# served without authentication, because invoices carry customer details.
+INVOICE_CACHE_DIR = os.path.join(BASE_DIR, 'var', 'invoices')
+
 # File upload settings for receipt images - ADDED FOR ADVANCE PAYMENTS
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -163,12 +167,36 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# Caches. The default stays per-process; idempotency keys live in the database
+# so every worker sees them (table created by sales migration 0005).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'idempotency': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'idempotency_keys',
+        # Culling must not evict keys that are still inside their replay window
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'data_versions',
+        # Version counters never expire (core.versions)
+        'TIMEOUT': None,
+    },
+}
+
+# Idempotency-Key replay window for retried POSTs (core.idempotency).
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
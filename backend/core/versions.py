@@ -0,0 +1,51 @@
+import time
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+
+
+# Versions key ETags and cached responses, so every worker must see the same
+# counter and it must survive restarts, otherwise an old ETag matches again
+cache = ConnectionProxy(caches, 'versions')
+
+
+def _initial_version():
+    # A counter lost to culling or a flushed table restarts above every value
+    # handed out before, so no ETag issued earlier can match again
+    return time.time_ns()
+
+
+def get_version(key):
+    """Get the current value of a shared data version counter"""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version())
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """
+    Advance a shared data version counter once the current transaction commits.
+
+    Bumping before the commit would let a concurrent read pair the new version
+    with the old rows. Repeated bumps of one key in a transaction collapse
+    into a single one.
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(
+        getattr(func, 'version_key', None) == key and not func.done
+        for _, func, _ in connection.run_on_commit
+    ):
+        return
+
+    def bump():
+        bump.done = True
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version())
+
+    bump.version_key = key
+    bump.done = False
+    transaction.on_commit(bump)
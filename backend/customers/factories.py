@@ -0,0 +1,14 @@
+import factory
+from factory.django import DjangoModelFactory
+from posapi.factories import UserFactory
+from .models import Customer
+
+
+class CustomerFactory(DjangoModelFactory):
+    class Meta:
+        model = Customer
+
+    name = 'Test Customer'
+    phone = factory.Sequence(lambda n: f'+92-300-{n:07d}')
+    email = factory.Sequence(lambda n: f'customer{n}@example.com')
+    created_by = factory.SubFactory(UserFactory)
@@ -1,3 +1,40 @@
+from decimal import Decimal
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from posapi.factories import UserFactory
+from products.factories import ProductFactory
+from sales.factories import SalesFactory, SaleItemFactory
+from .factories import CustomerFactory
 
-# Create your tests here.
+
+class CustomerConditionalGetTest(TestCase):
+    """Test cases for ETag revalidation of the customer list"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.sale = SalesFactory.build(customer=CustomerFactory(created_by=self.user))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sale.save_with_items([SaleItemFactory.build(product=ProductFactory(), quantity=2)])
+
+    def test_list_revalidation(self):
+        """Test revalidation skips the sales table and committed sale changes invalidate the ETag"""
+        url = reverse('customers:list_customers')
+        etag = self.client.get(url)['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([query for query in queries.captured_queries if '"sales"' in query['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sale.amount_paid = Decimal('50.00')
+            self.sale.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response.status_code, 304)
+        self.assertNotEqual(response['ETag'], etag)
@@ -8,6 +8,7 @@ from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 from .models import Customer
+from sales.models import Sales
 from .serializers import (
     CustomerSerializer,
     CustomerCreateSerializer,
@@ -25,6 +26,8 @@ from .signals import (
     customer_bulk_deleted,
     customer_verification_changed
 )
+from core.pagination import paginate_queryset
+from core.conditional import conditional_get, DataVersion
 
 
 # Function-based views (following your Product module pattern)
@@ -196,6 +199,7 @@ def international_customers(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(Customer, DataVersion(Sales.get_data_version))
 def list_customers(request):
     """
     List all active customers with pagination, search, and filtering
@@ -303,12 +307,8 @@ def list_customers(request):
         # Select related to avoid N+1 queries
         customers = customers.select_related('created_by')
         
-        # Calculate pagination
-        total_count = customers.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        customers = customers[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        customers, pagination = paginate_queryset(request, customers, page, page_size)
         
         serializer = CustomerListSerializer(customers, many=True)
         
@@ -316,14 +316,7 @@ def list_customers(request):
             'success': True,
             'data': {
                 'customers': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                },
+                'pagination': pagination,
                 'filters_applied': {
                     'search': search,
                     'customer_type': customer_type,
@@ -392,6 +385,10 @@ def create_customer(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(
+    lambda request, customer_id: Customer.objects.filter(pk=customer_id),
+    lambda request, customer_id: Sales.objects.filter(customer_id=customer_id),
+)
 def get_customer(request, customer_id):
     """
     Retrieve a specific customer by ID
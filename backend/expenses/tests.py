@@ -1,3 +1,46 @@
+from decimal import Decimal
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from posapi.factories import UserFactory
+from .models import Expense
+from .views import expenses_list_create
 
-# Create your tests here.
+
+class ExpenseListPaginationTest(TestCase):
+    """Test keyset pagination on the expense list"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        now = timezone.localtime()
+        Expense.objects.create(
+            expense='Electricity bill',
+            description='Monthly shop electricity',
+            amount=Decimal('5000.00'),
+            withdrawal_by='Mr Sheikh Zain Maqbool',
+            date=now.date(),
+            time=now.time(),
+            created_by=self.user
+        )
+
+    def _list(self, params):
+        # The expenses app is not routed in core.urls, so the view is called directly
+        request = APIRequestFactory().get('/api/v1/expenses/', params)
+        force_authenticate(request, user=self.user)
+        return expenses_list_create(request)
+
+    def test_first_cursor_page(self):
+        """Test an empty cursor returns the first keyset page"""
+        response = self._list({'cursor': ''})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']['expenses']), 1)
+        self.assertFalse(response.data['data']['pagination']['has_next'])
+
+    def test_invalid_cursor_is_rejected(self):
+        """Test a malformed cursor is a client error, not a server error"""
+        response = self._list({'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Invalid pagination parameters.')
@@ -7,6 +7,7 @@ from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from datetime import datetime, timedelta
+from core.pagination import is_cursor_request, cursor_paginate
 from .models import Expense
 from .serializers import (
     ExpenseSerializer,
@@ -68,22 +69,20 @@ def expenses_list_create(request):
         ordering = request.GET.get('ordering', '-date')
         expenses = expenses.order_by(ordering)
         
-        # Pagination
-        page = int(request.GET.get('page', 1))
-        page_size = int(request.GET.get('page_size', 20))
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        total_count = expenses.count()
-        expenses_page = expenses[start:end]
-        
-        serializer = ExpenseListSerializer(expenses_page, many=True)
-        
-        return Response({
-            'success': True,
-            'data': {
-                'expenses': serializer.data,
-                'pagination': {
+        # Pagination (keyset when ?cursor= is given)
+        try:
+            page = int(request.GET.get('page', 1))
+            page_size = int(request.GET.get('page_size', 20))
+        
+            if is_cursor_request(request):
+                expenses_page, pagination = cursor_paginate(request, expenses, page_size)
+            else:
+                start = (page - 1) * page_size
+                end = start + page_size
+            
+                total_count = expenses.count()
+                expenses_page = expenses[start:end]
+                pagination = {
                     'page': page,
                     'page_size': page_size,
                     'total_count': total_count,
@@ -91,6 +90,20 @@ def expenses_list_create(request):
                     'has_next': end < total_count,
                     'has_previous': page > 1
                 }
+        except ValueError as e:
+            return Response({
+                'success': False,
+                'message': 'Invalid pagination parameters.',
+                'errors': {'detail': str(e)}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = ExpenseListSerializer(expenses_page, many=True)
+        
+        return Response({
+            'success': True,
+            'data': {
+                'expenses': serializer.data,
+                'pagination': pagination
             }
         }, status=status.HTTP_200_OK)
     
@@ -22,12 +22,15 @@ from .serializers import (
 )
 from .signals import labor_bulk_updated
 from . import models
+from core.pagination import paginate_queryset
+from core.conditional import conditional_get
 
 
 # ==================== BASIC CRUD OPERATIONS ====================
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(Labor)
 def list_labors(request):
     """
     List all active labors with pagination, search, and filtering
@@ -174,12 +177,8 @@ def list_labors(request):
         # Select related to avoid N+1 queries
         labors = labors.select_related('created_by')
         
-        # Calculate pagination
-        total_count = labors.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        labors = labors[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        labors, pagination = paginate_queryset(request, labors, page, page_size)
         
         serializer = LaborListSerializer(labors, many=True)
         
@@ -187,14 +186,7 @@ def list_labors(request):
             'success': True,
             'data': {
                 'labors': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                },
+                'pagination': pagination,
                 'filters_applied': {
                     'search': search,
                     'city': city,
@@ -267,6 +259,7 @@ def create_labor(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(lambda request, labor_id: Labor.objects.filter(pk=labor_id))
 def get_labor(request, labor_id):
     """
     Retrieve a specific labor by ID
@@ -0,0 +1,15 @@
+import factory
+from factory.django import DjangoModelFactory
+from orders.factories import OrderFactory
+from products.factories import ProductFactory
+from .models import OrderItem
+
+
+class OrderItemFactory(DjangoModelFactory):
+    class Meta:
+        model = OrderItem
+
+    order = factory.SubFactory(OrderFactory)
+    product = factory.SubFactory(ProductFactory)
+    quantity = 1
+    unit_price = factory.LazyAttribute(lambda item: item.product.price)
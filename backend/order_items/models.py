@@ -235,6 +235,99 @@ class OrderItem(models.Model):
         """Get active order items by product"""
         return cls.active_items().filter(product_id=product_id)
 
+    @classmethod
+    def upsert_for_order(cls, order, rows, remove_missing=False):
+        """
+        Create or update an order's items from one payload, keyed by product.
+        
+        Each row is a dict with a product instance, a quantity and optionally
+        unit_price (defaults to the product price for new items, kept for
+        existing ones) and customization_notes. A soft-deleted item for the
+        same product is restored rather than duplicated. With remove_missing,
+        active items whose product is not in the payload are soft-deleted.
+        
+        The whole set is validated in memory before anything is written, then
+        saved with one bulk_create and one bulk_update, and the order total is
+        recalculated once. Raises ValidationError listing every invalid row.
+        Must run inside a transaction.
+        
+        Returns a dict with the created, updated and removed items.
+        """
+        from django.utils import timezone
+        from orders.models import Order
+        from .signals import order_item_bulk_created, order_item_bulk_updated
+        
+        existing = {item.product_id: item for item in cls.objects.filter(order=order)}
+        now = timezone.now()
+        created, updated, errors = [], [], []
+        
+        for row in rows:
+            product = row['product']
+            item = existing.get(product.pk)
+            held_quantity = item.quantity if item and item.is_active else 0
+            
+            # Only the quantity added on top of what the order already holds needs stock
+            additional = row['quantity'] - held_quantity
+            if additional > 0 and not product.can_fulfill_quantity(additional):
+                errors.append(
+                    f'Not enough stock for {product.name}. '
+                    f'Available: {product.available_quantity}, Additional needed: {additional}'
+                )
+                continue
+            
+            if item is None:
+                item = cls(
+                    order=order,
+                    product=product,
+                    product_name=product.name,
+                    unit_price=product.price,
+                )
+                created.append(item)
+            else:
+                updated.append(item)
+            
+            item.quantity = row['quantity']
+            if row.get('unit_price') is not None:
+                item.unit_price = row['unit_price']
+            if 'customization_notes' in row:
+                item.customization_notes = row['customization_notes']
+            item.is_active = True
+            item.line_total = item.quantity * item.unit_price
+            item.updated_at = now
+            
+            try:
+                # Order and product are already loaded; skip the per-row lookups
+                item.full_clean(exclude=['order', 'product'], validate_unique=False)
+            except ValidationError as e:
+                errors.extend(f'{product.name}: {message}' for message in e.messages)
+        
+        if errors:
+            raise ValidationError(errors)
+        
+        removed = []
+        if remove_missing:
+            kept_product_ids = {row['product'].pk for row in rows}
+            for item in existing.values():
+                if item.is_active and item.product_id not in kept_product_ids:
+                    item.is_active = False
+                    item.updated_at = now
+                    removed.append(item)
+        
+        # bulk_create and bulk_update bypass the per-item signals and auto_now
+        cls.objects.bulk_create(created)
+        cls.objects.bulk_update(
+            updated + removed,
+            ['quantity', 'unit_price', 'line_total', 'customization_notes', 'is_active', 'updated_at']
+        )
+        Order.objects.filter(pk=order.pk).recalculate_totals()
+        
+        if created:
+            order_item_bulk_created.send(sender=cls, order_items=created)
+        if updated or removed:
+            order_item_bulk_updated.send(sender=cls, order_items=updated + removed, action='upsert')
+        
+        return {'created': created, 'updated': updated, 'removed': removed}
+
     @classmethod
     def get_statistics(cls):
         """Get comprehensive order item statistics"""
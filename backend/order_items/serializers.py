@@ -402,4 +402,46 @@ class OrderItemQuantityUpdateSerializer(serializers.Serializer):
         """Validate quantity with stock check"""
         # This validation will be context-dependent and handled in the view
         return value
-    
\ No newline at end of file
+    
+
+class OrderItemUpsertRowSerializer(serializers.Serializer):
+    """One product line of an order item upsert"""
+    
+    product = serializers.UUIDField(help_text="Product UUID")
+    quantity = serializers.IntegerField(min_value=1)
+    unit_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=0, required=False, allow_null=True,
+        help_text="Defaults to the product price for new items"
+    )
+    customization_notes = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_customization_notes(self, value):
+        """Clean customization notes"""
+        return value.strip()
+
+
+class OrderItemUpsertSerializer(serializers.Serializer):
+    """Serializer for creating and updating an order's items in one request"""
+    
+    items = OrderItemUpsertRowSerializer(many=True, allow_empty=False)
+    remove_missing = serializers.BooleanField(
+        default=False,
+        help_text="Soft-delete active items whose product is not in the payload"
+    )
+
+    def validate_items(self, value):
+        """Resolve every product in one query and reject duplicates"""
+        product_ids = [row['product'] for row in value]
+        if len(product_ids) != len(set(product_ids)):
+            raise serializers.ValidationError("Each product may appear only once.")
+        
+        products = Product.objects.filter(id__in=product_ids, is_active=True).in_bulk()
+        missing_ids = [str(product_id) for product_id in product_ids if product_id not in products]
+        if missing_ids:
+            raise serializers.ValidationError(
+                f"Invalid or inactive products: {', '.join(missing_ids)}"
+            )
+        
+        for row in value:
+            row['product'] = products[row['product']]
+        return value
@@ -197,7 +197,11 @@ def update_order_totals(sender, instance, **kwargs):
     """Update parent order totals when order items change"""
     try:
         # Import here to avoid circular imports
-        from orders.models import Order
+        from orders.models import defer_order_totals
+        
+        # Batched writes recalculate each order once when the batch ends
+        if defer_order_totals(instance.order_id):
+            return
         
         order = instance.order
         if order:
@@ -1,3 +1,121 @@
+from decimal import Decimal
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from categories.factories import CategoryFactory
+from customers.factories import CustomerFactory
+from orders.factories import OrderFactory
+from orders.models import Order
+from posapi.factories import UserFactory
+from products.factories import ProductFactory
+from .factories import OrderItemFactory
+from .models import OrderItem
 
-# Create your tests here.
+
+class OrderItemUpsertTest(TestCase):
+    """Test the bulk order item upsert endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.products = ProductFactory.create_batch(6, quantity=50, category=category)
+        self.order = OrderFactory(customer=self.customer)
+
+    def _upsert(self, rows, order=None, **payload):
+        order = order or self.order
+        payload['items'] = rows
+        return self.client.post(
+            reverse('order_items:upsert_order_items', args=[order.id]), payload, format='json'
+        )
+
+    def _rows(self, products, quantity=2):
+        return [{'product': str(product.id), 'quantity': quantity} for product in products]
+
+    def _order_updates(self, queries):
+        return [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "order" ')]
+
+    def test_upsert_creates_and_updates_items(self):
+        """Test new and existing products are written in one pass with one total update"""
+        OrderItemFactory(order=self.order, product=self.products[0], unit_price=Decimal('80.00'))
+        rows = self._rows(self.products[:3])
+        rows[0]['customization_notes'] = '  Long sleeves '
+        rows[1]['unit_price'] = '150.00'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._upsert(rows)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        data = response.data['data']
+        self.assertEqual((data['created_count'], data['updated_count'], data['removed_count']), (2, 1, 0))
+        self.assertEqual(len(self._order_updates(queries)), 1)
+        # Existing items keep their price unless one is given
+        self.assertEqual(data['total_amount'], 160.0 + 300.0 + 200.0)
+        self.assertEqual(len(data['order_items']), 3)
+
+        item = OrderItem.objects.get(order=self.order, product=self.products[0])
+        self.assertEqual((item.quantity, item.customization_notes), (2, 'Long sleeves'))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal('660.00'))
+
+    def test_query_count_does_not_grow_with_items(self):
+        """Test a larger payload runs the same number of queries"""
+        other_order = OrderFactory(customer=self.customer)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self._upsert(self._rows(self.products[:2])).status_code, 200)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self._upsert(self._rows(self.products), order=other_order).status_code, 200)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_remove_missing_and_restore(self):
+        """Test omitted items are soft-deleted and a removed product comes back as the same item"""
+        self._upsert(self._rows(self.products[:2]))
+        removed = OrderItem.objects.get(order=self.order, product=self.products[1])
+
+        response = self._upsert(self._rows(self.products[:1]), remove_missing=True)
+        self.assertEqual(response.data['data']['removed_count'], 1)
+        removed.refresh_from_db()
+        self.assertFalse(removed.is_active)
+        self.assertEqual(response.data['data']['total_amount'], 200.0)
+
+        response = self._upsert(self._rows(self.products[1:2], quantity=4))
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['data']['updated_count'], 1)
+        removed.refresh_from_db()
+        self.assertTrue(removed.is_active)
+        self.assertEqual(removed.quantity, 4)
+        self.assertEqual(response.data['data']['total_amount'], 600.0)
+
+    def test_invalid_row_writes_nothing(self):
+        """Test one row over stock rejects the whole payload"""
+        rows = self._rows(self.products[:2])
+        rows[1]['quantity'] = 51
+
+        response = self._upsert(rows)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(OrderItem.objects.filter(order=self.order).exists())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal('0.00'))
+
+    def test_duplicate_products_rejected(self):
+        """Test a product listed twice is a validation error"""
+        response = self._upsert(self._rows([self.products[0], self.products[0]]))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('items', response.data['errors'])
+
+    def test_order_that_cannot_be_modified(self):
+        """Test items of an order in production cannot be upserted"""
+        Order.objects.filter(pk=self.order.pk).update(status='IN_PRODUCTION')
+
+        response = self._upsert(self._rows(self.products[:1]))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(OrderItem.objects.filter(order=self.order).exists())
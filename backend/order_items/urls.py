@@ -31,6 +31,7 @@ urlpatterns = [
     # Quantity management
     path('<uuid:order_item_id>/quantity/', views.update_order_item_quantity, name='update_order_item_quantity'),
     path('bulk-update/', views.bulk_update_order_items, name='bulk_update_order_items'),
+    path('order/<uuid:order_id>/upsert/', views.upsert_order_items, name='upsert_order_items'),
     
     # Order item operations
     path('<uuid:order_item_id>/duplicate/', views.duplicate_order_item, name='duplicate_order_item'),
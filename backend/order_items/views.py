@@ -3,10 +3,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from decimal import Decimal, InvalidOperation
 from .models import OrderItem
+from orders.models import Order, deferred_order_totals
 from .serializers import (
     OrderItemSerializer,
     OrderItemCreateSerializer,
@@ -15,8 +17,10 @@ from .serializers import (
     OrderItemDetailSerializer,
     OrderItemStatsSerializer,
     OrderItemBulkUpdateSerializer,
-    OrderItemQuantityUpdateSerializer
+    OrderItemQuantityUpdateSerializer,
+    OrderItemUpsertSerializer
 )
+from core.pagination import paginate_queryset
 
 
 # Function-based views (following your pattern)
@@ -121,12 +125,8 @@ def list_order_items(request):
         # Select related to avoid N+1 queries
         order_items = order_items.select_related('order', 'product')
         
-        # Calculate pagination
-        total_count = order_items.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        order_items = order_items[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        order_items, pagination = paginate_queryset(request, order_items, page, page_size)
         
         serializer = OrderItemListSerializer(order_items, many=True)
         
@@ -134,14 +134,7 @@ def list_order_items(request):
             'success': True,
             'data': {
                 'order_items': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                },
+                'pagination': pagination,
                 'filters_applied': {
                     'search': search,
                     'order_id': order_id,
@@ -185,7 +178,7 @@ def create_order_item(request):
     
     if serializer.is_valid():
         try:
-            with transaction.atomic():
+            with transaction.atomic(), deferred_order_totals():
                 order_item = serializer.save()
                 
                 return Response({
@@ -661,7 +654,8 @@ def bulk_update_order_items(request):
     
     if serializer.is_valid():
         try:
-            with transaction.atomic():
+            # Each touched order is recalculated once, not once per field saved
+            with transaction.atomic(), deferred_order_totals():
                 updates = serializer.validated_data['updates']
                 results = []
                 
@@ -721,6 +715,78 @@ def bulk_update_order_items(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upsert_order_items(request, order_id):
+    """
+    Create, update and optionally remove an order's items in one request.
+    
+    Items are matched to the order's existing items by product. The whole
+    payload is validated before anything is written, and the order total is
+    recalculated once. Returns the order's resulting active items.
+    """
+    serializer = OrderItemUpsertSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Order item upsert failed.',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        with transaction.atomic():
+            # Concurrent edits of the same order apply one after the other
+            order = Order.objects.select_for_update().filter(id=order_id, is_active=True).first()
+            if order is None:
+                return Response({
+                    'success': False,
+                    'message': 'Order not found or inactive.'
+                }, status=status.HTTP_404_NOT_FOUND)
+            
+            if not order.can_be_modified():
+                return Response({
+                    'success': False,
+                    'message': 'Order cannot be modified.',
+                    'errors': {'detail': f'Orders with status {order.get_status_display()} cannot be modified.'}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            result = OrderItem.upsert_for_order(
+                order,
+                serializer.validated_data['items'],
+                remove_missing=serializer.validated_data['remove_missing']
+            )
+            order.refresh_from_db(fields=['total_amount', 'remaining_amount'])
+            order_items = OrderItem.items_by_order(order.pk).select_related('order', 'product')
+            
+            return Response({
+                'success': True,
+                'message': 'Order items saved successfully.',
+                'data': {
+                    'order_id': str(order.id),
+                    'created_count': len(result['created']),
+                    'updated_count': len(result['updated']),
+                    'removed_count': len(result['removed']),
+                    'total_amount': float(order.total_amount),
+                    'remaining_amount': float(order.remaining_amount),
+                    'order_items': OrderItemSerializer(order_items, many=True).data
+                }
+            }, status=status.HTTP_200_OK)
+    
+    except DjangoValidationError as e:
+        return Response({
+            'success': False,
+            'message': 'Order item upsert failed.',
+            'errors': {'detail': e.messages}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Order item upsert failed due to server error.',
+            'errors': {'detail': str(e)}
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def items_with_customization(request):
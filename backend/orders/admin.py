@@ -284,6 +284,7 @@ class OrderAdmin(admin.ModelAdmin):
     def mark_as_active(self, request, queryset):
         """Mark selected orders as active"""
         updated = queryset.update(is_active=True)
+        Order.bump_data_version()
         self.message_user(
             request,
             f'{updated} orders were successfully marked as active.'
@@ -293,6 +294,7 @@ class OrderAdmin(admin.ModelAdmin):
     def mark_as_inactive(self, request, queryset):
         """Mark selected orders as inactive"""
         updated = queryset.update(is_active=False)
+        Order.bump_data_version()
         self.message_user(
             request,
             f'{updated} orders were successfully marked as inactive.'
@@ -435,14 +437,7 @@ class OrderAdmin(admin.ModelAdmin):
 
     def recalculate_totals(self, request, queryset):
         """Recalculate order totals from order items"""
-        recalculated = 0
-        
-        for order in queryset:
-            try:
-                order.calculate_totals()
-                recalculated += 1
-            except Exception:
-                pass
+        recalculated = queryset.recalculate_totals()
         
         self.message_user(
             request,
@@ -454,25 +449,20 @@ class OrderAdmin(admin.ModelAdmin):
         """Add extra context to changelist view"""
         extra_context = extra_context or {}
         
-        # Get some quick stats for the admin
-        active_orders = Order.objects.filter(is_active=True)
-        total_orders = active_orders.count()
-        pending_count = active_orders.filter(status='PENDING').count()
-        overdue_count = Order.overdue_orders().count()
-        unpaid_count = Order.unpaid_orders().count()
-        
-        total_value = active_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-        total_advance = active_orders.aggregate(Sum('advance_payment'))['advance_payment__sum'] or 0
-        total_remaining = active_orders.aggregate(Sum('remaining_amount'))['remaining_amount__sum'] or 0
+        # Same single-query statistics as the API, briefly cached across page loads
+        stats = Order.get_statistics(use_cache=True)
+        financial = stats['financial_summary']
+        total_value = financial['total_value']
+        total_advance = financial['total_advance_received']
         
         extra_context.update({
-            'total_orders': total_orders,
-            'pending_orders_count': pending_count,
-            'overdue_orders_count': overdue_count,
-            'unpaid_orders_count': unpaid_count,
+            'total_orders': stats['total_orders'],
+            'pending_orders_count': stats['status_breakdown']['pending'],
+            'overdue_orders_count': stats['delivery_summary']['overdue_orders'],
+            'unpaid_orders_count': stats['payment_summary']['unpaid_orders'],
             'total_order_value': total_value,
             'total_advance_received': total_advance,
-            'total_remaining_amount': total_remaining,
+            'total_remaining_amount': financial['total_remaining'],
             'payment_rate': round((total_advance / total_value * 100) if total_value > 0 else 0, 1),
         })
         
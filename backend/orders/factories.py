@@ -0,0 +1,14 @@
+import factory
+from datetime import date
+from factory.django import DjangoModelFactory
+from customers.factories import CustomerFactory
+from .models import Order
+
+
+class OrderFactory(DjangoModelFactory):
+    class Meta:
+        model = Order
+
+    customer = factory.SubFactory(CustomerFactory)
+    date_ordered = factory.LazyFunction(date.today)
+    created_by = factory.LazyAttribute(lambda order: order.customer.created_by)
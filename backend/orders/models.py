@@ -1,4 +1,6 @@
 import uuid
+import threading
+from contextlib import contextmanager
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -7,6 +9,268 @@ from decimal import Decimal
 from datetime import timedelta, date
 
 
+_deferred_totals = threading.local()
+
+
+@contextmanager
+def deferred_order_totals():
+    """
+    Recalculate order totals once for a batch of order item writes.
+    
+    Inside the block, order item saves and deletes only mark their order as
+    dirty instead of recalculating it. When the outermost block exits, every
+    dirty order is recalculated together; use it inside the request's
+    transaction so the totals commit with the items. Nothing is flushed if
+    the block raises, since the transaction rolls back.
+    """
+    if getattr(_deferred_totals, 'order_ids', None) is not None:
+        yield
+        return
+    
+    _deferred_totals.order_ids = order_ids = set()
+    try:
+        yield
+    finally:
+        _deferred_totals.order_ids = None
+    
+    if order_ids:
+        Order.objects.filter(pk__in=order_ids).recalculate_totals()
+
+
+def defer_order_totals(order_id):
+    """Mark an order dirty inside deferred_order_totals(); returns False outside one"""
+    order_ids = getattr(_deferred_totals, 'order_ids', None)
+    if order_ids is None:
+        return False
+    order_ids.add(order_id)
+    return True
+
+
+class OrderQuerySet(models.QuerySet):
+    """Custom QuerySet for Order model"""
+    
+    def active(self):
+        return self.filter(is_active=True)
+    
+    def by_status(self, status):
+        return self.filter(status=status.upper())
+    
+    def by_customer(self, customer_id):
+        return self.filter(customer_id=customer_id)
+    
+    def search(self, query):
+        """Search orders by customer name, phone, email, or description"""
+        return self.filter(
+            models.Q(customer_name__icontains=query) |
+            models.Q(customer_phone__icontains=query) |
+            models.Q(customer_email__icontains=query) |
+            models.Q(description__icontains=query) |
+            models.Q(id__icontains=query)
+        )
+    
+    def pending(self):
+        """Get pending orders"""
+        return self.filter(status='PENDING')
+    
+    def confirmed(self):
+        """Get confirmed orders"""
+        return self.filter(status='CONFIRMED')
+    
+    def in_production(self):
+        """Get orders in production"""
+        return self.filter(status='IN_PRODUCTION')
+    
+    def ready_for_delivery(self):
+        """Get orders ready for delivery"""
+        return self.filter(status='READY')
+    
+    def delivered(self):
+        """Get delivered orders"""
+        return self.filter(status='DELIVERED')
+    
+    def cancelled(self):
+        """Get cancelled orders"""
+        return self.filter(status='CANCELLED')
+    
+    def overdue(self):
+        """Get overdue orders"""
+        today = timezone.now().date()
+        return self.filter(
+            expected_delivery_date__lt=today,
+            status__in=['PENDING', 'CONFIRMED', 'IN_PRODUCTION', 'READY']
+        )
+    
+    def due_today(self):
+        """Get orders due today"""
+        today = timezone.now().date()
+        return self.filter(
+            expected_delivery_date=today,
+            status__in=['PENDING', 'CONFIRMED', 'IN_PRODUCTION', 'READY']
+        )
+    
+    def due_this_week(self):
+        """Get orders due this week"""
+        today = timezone.now().date()
+        week_end = today + timedelta(days=7)
+        return self.filter(
+            expected_delivery_date__range=[today, week_end],
+            status__in=['PENDING', 'CONFIRMED', 'IN_PRODUCTION', 'READY']
+        )
+    
+    def fully_paid(self):
+        """Get fully paid orders"""
+        return self.filter(is_fully_paid=True)
+    
+    def unpaid(self):
+        """Get unpaid orders"""
+        return self.filter(is_fully_paid=False, total_amount__gt=0)
+    
+    def partially_paid(self):
+        """Get partially paid orders"""
+        return self.filter(
+            advance_payment__gt=0,
+            is_fully_paid=False,
+            total_amount__gt=0
+        )
+    
+    def date_range(self, start_date, end_date):
+        """Filter orders by date range"""
+        return self.filter(date_ordered__range=[start_date, end_date])
+    
+    def this_month(self):
+        """Get orders from this month"""
+        today = timezone.now().date()
+        start_of_month = today.replace(day=1)
+        return self.filter(date_ordered__gte=start_of_month)
+    
+    def this_week(self):
+        """Get orders from this week"""
+        today = timezone.now().date()
+        start_of_week = today - timedelta(days=today.weekday())
+        return self.filter(date_ordered__gte=start_of_week)
+    
+    def with_list_details(self):
+        """
+        Load everything OrderListSerializer reads in one query.
+        
+        Customer and creator are joined, and whether any sale was created from
+        the order (has_sales) and its number of active items
+        (active_item_count) are annotated by correlated subqueries.
+        """
+        from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce
+        from order_items.models import OrderItem
+        from sales.models import Sales
+        
+        item_counts = OrderItem.objects.filter(order=OuterRef('pk'), is_active=True).order_by().values(
+            'order'
+        ).annotate(count=Count('id')).values('count')
+        
+        return self.select_related('customer', 'created_by').annotate(
+            has_sales=Exists(Sales.objects.filter(order_id=OuterRef('pk'))),
+            active_item_count=Coalesce(Subquery(item_counts, output_field=IntegerField()), Value(0))
+        )
+    
+    def recalculate_totals(self):
+        """
+        Recalculate totals of every order in the queryset with a single UPDATE.
+        
+        The total is summed from active order items by a correlated subquery;
+        remaining amount, payment state and, for orders already converted to
+        sales, full or partial conversion are derived from it in the same
+        statement. Returns the number of orders updated.
+        """
+        from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+        from django.db.models.functions import Coalesce, Greatest
+        from django.db.models.lookups import GreaterThan, GreaterThanOrEqual, LessThanOrEqual
+        from order_items.models import OrderItem
+        
+        money = DecimalField(max_digits=15, decimal_places=2)
+        item_totals = OrderItem.objects.filter(order=OuterRef('pk'), is_active=True).order_by().values(
+            'order'
+        ).annotate(total=Sum('line_total')).values('total')
+        total = Coalesce(Subquery(item_totals, output_field=money), Value(Decimal('0.00')), output_field=money)
+        
+        updated = self.update(
+            total_amount=total,
+            remaining_amount=Greatest(
+                ExpressionWrapper(total - F('advance_payment'), output_field=money),
+                Value(Decimal('0.00')),
+                output_field=money
+            ),
+            is_fully_paid=Case(
+                When(
+                    Q(GreaterThan(total, Value(Decimal('0.00'))))
+                    & Q(LessThanOrEqual(total, F('advance_payment'))),
+                    then=Value(True)
+                ),
+                default=Value(False)
+            ),
+            conversion_status=Case(
+                When(conversion_status='NOT_CONVERTED', then=Value('NOT_CONVERTED')),
+                When(Q(GreaterThanOrEqual(F('converted_sales_amount'), total)), then=Value('FULLY_CONVERTED')),
+                default=Value('PARTIALLY_CONVERTED')
+            ),
+            updated_at=timezone.now()
+        )
+        if updated:
+            # Queryset updates skip the post_save signal that invalidates statistics
+            self.model.bump_data_version()
+        return updated
+    
+    def update_conversion_status(self):
+        """
+        Refresh the sales conversion fields of every order in the queryset with a single UPDATE.
+        
+        Mirrors Order.update_conversion_status(): the converted amount is the
+        grand total of the order's active sales, and the conversion date is
+        kept or taken from its first active sale. Returns the number of
+        orders updated.
+        """
+        from django.db.models import Case, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value, When
+        from django.db.models.functions import Coalesce
+        from django.db.models.lookups import GreaterThanOrEqual
+        from sales.models import Sales
+        
+        money = DecimalField(max_digits=15, decimal_places=2)
+        has_sales = Exists(Sales.objects.filter(order_id=OuterRef('pk')))
+        active_sales = Sales.objects.filter(order_id=OuterRef('pk'), is_active=True).order_by()
+        converted = Coalesce(
+            Subquery(active_sales.values('order_id').annotate(total=Sum('grand_total')).values('total'), output_field=money),
+            Value(Decimal('0.00')),
+            output_field=money
+        )
+        first_sale_at = Subquery(active_sales.order_by('created_at').values('created_at')[:1])
+        
+        return self.update(
+            conversion_status=Case(
+                When(~Q(has_sales), then=Value('NOT_CONVERTED')),
+                When(Q(GreaterThanOrEqual(converted, F('total_amount'))), then=Value('FULLY_CONVERTED')),
+                default=Value('PARTIALLY_CONVERTED')
+            ),
+            converted_sales_amount=Case(
+                When(~Q(has_sales), then=Value(Decimal('0.00'))),
+                default=converted,
+                output_field=money
+            ),
+            conversion_date=Case(
+                When(~Q(has_sales), then=Value(None)),
+                When(conversion_date__isnull=True, then=first_sale_at),
+                default=F('conversion_date')
+            ),
+            updated_at=timezone.now()
+        )
+    
+    def value_range(self, min_value=None, max_value=None):
+        """Filter orders by total amount range"""
+        queryset = self
+        if min_value is not None:
+            queryset = queryset.filter(total_amount__gte=min_value)
+        if max_value is not None:
+            queryset = queryset.filter(total_amount__lte=max_value)
+        return queryset
+
+
 class Order(models.Model):
     """Order model for managing customer orders"""
     
@@ -125,6 +389,11 @@ class Order(models.Model):
         help_text="Date when order was first converted to sale"
     )
 
+    # Fields remembered from the last load or save, for change tracking
+    TRACKED_FIELDS = ('status', 'advance_payment', 'expected_delivery_date', 'customer_id', 'created_by_id')
+
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         db_table = 'order'
         verbose_name = 'Order'
@@ -174,8 +443,17 @@ class Order(models.Model):
 
     def has_been_converted_to_sale(self):
         """Check if order has been converted to any sales"""
+        if hasattr(self, 'has_sales'):
+            return self.has_sales
         return self.sales.exists()
 
+    @property
+    def item_count(self):
+        """Count of active items in this order"""
+        if hasattr(self, 'active_item_count'):
+            return self.active_item_count
+        return self.order_items.filter(is_active=True).count()
+
     # Enhanced Sales Integration Methods
     @property
     def conversion_percentage(self):
@@ -185,34 +463,15 @@ class Order(models.Model):
         return float((self.converted_sales_amount / self.total_amount) * 100)
 
     def update_conversion_status(self):
-        """Update conversion status based on related sales"""
-        from django.db.models import Sum
-        
-        if not self.has_been_converted_to_sale():
-            self.conversion_status = 'NOT_CONVERTED'
-            self.converted_sales_amount = Decimal('0.00')
-            self.conversion_date = None
-        else:
-            # Calculate total converted amount
-            total_converted = self.sales.filter(is_active=True).aggregate(
-                total=Sum('grand_total')
-            )['total'] or Decimal('0.00')
-            
-            self.converted_sales_amount = total_converted
-            
-            if total_converted >= self.total_amount:
-                self.conversion_status = 'FULLY_CONVERTED'
-            else:
-                self.conversion_status = 'PARTIALLY_CONVERTED'
-            
-            # Set conversion date if not set
-            if not self.conversion_date:
-                first_sale = self.sales.filter(is_active=True).order_by('created_at').first()
-                if first_sale:
-                    self.conversion_date = first_sale.created_at
-        
-        self.save(update_fields=[
-            'conversion_status', 'converted_sales_amount', 
+        """
+        Update conversion status based on related sales.
+        
+        Written with a single UPDATE, so no save signals run; called when the
+        sales linked to the order change rather than on every order save.
+        """
+        Order.objects.filter(pk=self.pk).update_conversion_status()
+        self.refresh_from_db(fields=[
+            'conversion_status', 'converted_sales_amount',
             'conversion_date', 'updated_at'
         ])
 
@@ -235,7 +494,7 @@ class Order(models.Model):
 
     def save(self, *args, **kwargs):
         # Auto-populate customer information if not set
-        if self.customer and not self.customer_name:
+        if self.customer_id and not self.customer_name:
             self.customer_name = self.customer.name
             self.customer_phone = self.customer.phone
             self.customer_email = self.customer.email or ''
@@ -249,11 +508,35 @@ class Order(models.Model):
         # Calculate remaining amount and payment status
         self.calculate_payment_status()
         
-        self.full_clean()
+        # Partial saves only validate the fields they write, and foreign keys
+        # that still match the stored row need no existence lookup
+        loaded = getattr(self, '_loaded_values', {})
+        exclude = [
+            field for field in ('customer', 'created_by')
+            if f'{field}_id' in loaded and loaded[f'{field}_id'] == getattr(self, f'{field}_id')
+        ]
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            exclude += [field.name for field in self._meta.fields if field.name not in update_fields]
+        self.full_clean(exclude=exclude)
         super().save(*args, **kwargs)
         
-        # Update conversion status after save
-        self.update_conversion_status()
+        self._loaded_values = {
+            **loaded,
+            **{
+                field: getattr(self, field) for field in self.TRACKED_FIELDS
+                if not update_fields or field in update_fields or field.removesuffix('_id') in update_fields
+            }
+        }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded values so pre_save change tracking needs no lookup"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            field: instance.__dict__[field] for field in cls.TRACKED_FIELDS if field in instance.__dict__
+        }
+        return instance
 
     # Properties
     @property
@@ -312,7 +595,7 @@ class Order(models.Model):
     def order_summary(self):
         """Get order summary information"""
         return {
-            'total_items': self.order_items.filter(is_active=True).count(),
+            'total_items': self.item_count,
             'total_quantity': sum(item.quantity for item in self.order_items.filter(is_active=True)),
             'payment_status': 'Fully Paid' if self.is_fully_paid else f'{self.payment_percentage:.1f}% Paid',
             'days_since_ordered': self.days_since_ordered,
@@ -338,21 +621,11 @@ class Order(models.Model):
 
     # Helper methods
     def calculate_totals(self):
-        """Calculate and update order totals from order items"""
-        from order_items.models import OrderItem
+        """Calculate and update order totals from order items in a single UPDATE"""
+        Order.objects.filter(pk=self.pk).recalculate_totals()
+        self.refresh_from_db(fields=['total_amount', 'remaining_amount', 'is_fully_paid', 'conversion_status', 'updated_at'])
         
-        total = OrderItem.objects.filter(
-            order=self,
-            is_active=True
-        ).aggregate(
-            total=models.Sum('line_total')
-        )['total'] or Decimal('0.00')
-        
-        self.total_amount = total
-        self.calculate_payment_status()
-        self.save(update_fields=['total_amount', 'remaining_amount', 'is_fully_paid', 'updated_at'])
-        
-        return total
+        return self.total_amount
 
     def calculate_payment_status(self):
         """Calculate remaining amount and payment status"""
@@ -473,176 +746,89 @@ class Order(models.Model):
         """Get orders that are not fully paid"""
         return cls.active_orders().filter(is_fully_paid=False, total_amount__gt=0)
 
+    # Cache settings for order statistics
+    DATA_VERSION_CACHE_KEY = 'order_data_version'
+    STATISTICS_CACHE_TIMEOUT = 60
+
     @classmethod
-    def get_statistics(cls):
-        """Get comprehensive order statistics"""
-        from django.db.models import Sum, Count, Avg
-        
-        active_orders = cls.active_orders()
-        total_orders = active_orders.count()
-        
-        # Status breakdown
-        status_breakdown = {}
-        for status, _ in cls.STATUS_CHOICES:
-            status_breakdown[status.lower()] = active_orders.filter(status=status).count()
-        
-        # Financial stats
-        total_value = active_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0.00')
-        total_advance = active_orders.aggregate(Sum('advance_payment'))['advance_payment__sum'] or Decimal('0.00')
-        total_remaining = active_orders.aggregate(Sum('remaining_amount'))['remaining_amount__sum'] or Decimal('0.00')
-        
-        average_order_value = active_orders.aggregate(Avg('total_amount'))['total_amount__avg'] or Decimal('0.00')
-        
-        # Payment stats
-        fully_paid_count = active_orders.filter(is_fully_paid=True).count()
-        unpaid_count = active_orders.filter(is_fully_paid=False, total_amount__gt=0).count()
-        
-        # Delivery stats
-        overdue_count = cls.overdue_orders().count()
-        due_today_count = cls.orders_due_today().count()
+    def get_data_version(cls):
+        """Get the current order data version (bumped on every order write)"""
+        from core.versions import get_version
+        return get_version(cls.DATA_VERSION_CACHE_KEY)
+
+    @classmethod
+    def bump_data_version(cls):
+        """Invalidate version-keyed order caches"""
+        from core.versions import bump_version
+        bump_version(cls.DATA_VERSION_CACHE_KEY)
+
+    @classmethod
+    def get_statistics(cls, use_cache=False):
+        """Get comprehensive order statistics, optionally served from a short-lived cache"""
+        today = timezone.now().date()
+        if use_cache:
+            from django.core.cache import cache
+            # Overdue and recent buckets move with the date even when no order changes
+            cache_key = f'order_statistics_v{cls.get_data_version()}_{today.isoformat()}'
+            stats = cache.get(cache_key)
+            if stats is None:
+                stats = cls.get_statistics()
+                cache.set(cache_key, stats, timeout=cls.STATISTICS_CACHE_TIMEOUT)
+            return stats
+        
+        from django.db.models import Avg, Count, DecimalField, Q, Sum, Value
+        from django.db.models.functions import Coalesce
+        
+        money = DecimalField(max_digits=15, decimal_places=2)
+        open_statuses = ['PENDING', 'CONFIRMED', 'IN_PRODUCTION', 'READY']
+        
+        # Totals, status, payment and delivery buckets in a single conditional aggregation
+        totals = cls.active_orders().aggregate(
+            total_orders=Count('id'),
+            **{
+                f'status_{status.lower()}': Count('id', filter=Q(status=status))
+                for status, _ in cls.STATUS_CHOICES
+            },
+            total_value=Coalesce(Sum('total_amount'), Value(Decimal('0.00')), output_field=money),
+            total_advance=Coalesce(Sum('advance_payment'), Value(Decimal('0.00')), output_field=money),
+            total_remaining=Coalesce(Sum('remaining_amount'), Value(Decimal('0.00')), output_field=money),
+            average_order_value=Coalesce(Avg('total_amount'), Value(Decimal('0.00')), output_field=money),
+            fully_paid=Count('id', filter=Q(is_fully_paid=True)),
+            unpaid=Count('id', filter=Q(is_fully_paid=False, total_amount__gt=0)),
+            overdue=Count('id', filter=Q(expected_delivery_date__lt=today, status__in=open_statuses)),
+            due_today=Count('id', filter=Q(expected_delivery_date=today, status__in=open_statuses)),
+            this_week=Count('id', filter=Q(date_ordered__gte=today - timedelta(days=7))),
+            this_month=Count('id', filter=Q(date_ordered__gte=today - timedelta(days=30))),
+        )
         
-        # Recent activity
-        recent_orders_count = cls.recent_orders().count()
-        recent_orders_this_month = cls.recent_orders(30).count()
+        total_orders = totals['total_orders']
+        fully_paid_count = totals['fully_paid']
+        overdue_count = totals['overdue']
         
         return {
             'total_orders': total_orders,
-            'status_breakdown': status_breakdown,
+            'status_breakdown': {
+                status.lower(): totals[f'status_{status.lower()}']
+                for status, _ in cls.STATUS_CHOICES
+            },
             'financial_summary': {
-                'total_value': float(total_value),
-                'total_advance_received': float(total_advance),
-                'total_remaining': float(total_remaining),
-                'average_order_value': float(average_order_value),
+                'total_value': float(totals['total_value']),
+                'total_advance_received': float(totals['total_advance']),
+                'total_remaining': float(totals['total_remaining']),
+                'average_order_value': float(totals['average_order_value']),
             },
             'payment_summary': {
                 'fully_paid_orders': fully_paid_count,
-                'unpaid_orders': unpaid_count,
+                'unpaid_orders': totals['unpaid'],
                 'payment_rate': round((fully_paid_count / total_orders * 100) if total_orders > 0 else 0, 2)
             },
             'delivery_summary': {
                 'overdue_orders': overdue_count,
-                'due_today': due_today_count,
+                'due_today': totals['due_today'],
                 'on_time_rate': round(((total_orders - overdue_count) / total_orders * 100) if total_orders > 0 else 0, 2)
             },
             'recent_activity': {
-                'orders_this_week': recent_orders_count,
-                'orders_this_month': recent_orders_this_month,
+                'orders_this_week': totals['this_week'],
+                'orders_this_month': totals['this_month'],
             }
         }
-
-
-class OrderQuerySet(models.QuerySet):
-    """Custom QuerySet for Order model"""
-    
-    def active(self):
-        return self.filter(is_active=True)
-    
-    def by_status(self, status):
-        return self.filter(status=status.upper())
-    
-    def by_customer(self, customer_id):
-        return self.filter(customer_id=customer_id)
-    
-    def search(self, query):
-        """Search orders by customer name, phone, email, or description"""
-        return self.filter(
-            models.Q(customer_name__icontains=query) |
-            models.Q(customer_phone__icontains=query) |
-            models.Q(customer_email__icontains=query) |
-            models.Q(description__icontains=query) |
-            models.Q(id__icontains=query)
-        )
-    
-    def pending(self):
-        """Get pending orders"""
-        return self.filter(status='PENDING')
-    
-    def confirmed(self):
-        """Get confirmed orders"""
-        return self.filter(status='CONFIRMED')
-    
-    def in_production(self):
-        """Get orders in production"""
-        return self.filter(status='IN_PRODUCTION')
-    
-    def ready_for_delivery(self):
-        """Get orders ready for delivery"""
-        return self.filter(status='READY')
-    
-    def delivered(self):
-        """Get delivered orders"""
-        return self.filter(status='DELIVERED')
-    
-    def cancelled(self):
-        """Get cancelled orders"""
-        return self.filter(status='CANCELLED')
-    
-    def overdue(self):
-        """Get overdue orders"""
-        today = timezone.now().date()
-        return self.filter(
-            expected_delivery_date__lt=today,
-            status__in=['PENDING', 'CONFIRMED', 'IN_PRODUCTION', 'READY']
-        )
-    
-    def due_today(self):
-        """Get orders due today"""
-        today = timezone.now().date()
-        return self.filter(
-            expected_delivery_date=today,
-            status__in=['PENDING', 'CONFIRMED', 'IN_PRODUCTION', 'READY']
-        )
-    
-    def due_this_week(self):
-        """Get orders due this week"""
-        today = timezone.now().date()
-        week_end = today + timedelta(days=7)
-        return self.filter(
-            expected_delivery_date__range=[today, week_end],
-            status__in=['PENDING', 'CONFIRMED', 'IN_PRODUCTION', 'READY']
-        )
-    
-    def fully_paid(self):
-        """Get fully paid orders"""
-        return self.filter(is_fully_paid=True)
-    
-    def unpaid(self):
-        """Get unpaid orders"""
-        return self.filter(is_fully_paid=False, total_amount__gt=0)
-    
-    def partially_paid(self):
-        """Get partially paid orders"""
-        return self.filter(
-            advance_payment__gt=0,
-            is_fully_paid=False,
-            total_amount__gt=0
-        )
-    
-    def date_range(self, start_date, end_date):
-        """Filter orders by date range"""
-        return self.filter(date_ordered__range=[start_date, end_date])
-    
-    def this_month(self):
-        """Get orders from this month"""
-        today = timezone.now().date()
-        start_of_month = today.replace(day=1)
-        return self.filter(date_ordered__gte=start_of_month)
-    
-    def this_week(self):
-        """Get orders from this week"""
-        today = timezone.now().date()
-        start_of_week = today - timedelta(days=today.weekday())
-        return self.filter(date_ordered__gte=start_of_week)
-    
-    def value_range(self, min_value=None, max_value=None):
-        """Filter orders by total amount range"""
-        queryset = self
-        if min_value is not None:
-            queryset = queryset.filter(total_amount__gte=min_value)
-        if max_value is not None:
-            queryset = queryset.filter(total_amount__lte=max_value)
-        return queryset
-
-
-# Add the custom manager to the Order model
-Order.add_to_class('objects', models.Manager.from_queryset(OrderQuerySet)())
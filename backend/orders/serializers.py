@@ -218,6 +218,7 @@ class OrderListSerializer(serializers.ModelSerializer):
     created_by_email = serializers.CharField(source='created_by.email', read_only=True)
     can_convert_to_sale = serializers.BooleanField(source='can_be_converted_to_sale', read_only=True)
     has_sales = serializers.BooleanField(source='has_been_converted_to_sale', read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Order
@@ -240,7 +241,7 @@ class OrderListSerializer(serializers.ModelSerializer):
             'is_active',
             'created_at',
             'created_by_email',
-            'can_convert_to_sale', 'has_sales'
+            'can_convert_to_sale', 'has_sales', 'item_count'
         )
 
 
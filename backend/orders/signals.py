@@ -15,27 +15,34 @@ order_status_changed = Signal()
 order_payment_added = Signal()
 
 
+def loaded_values(instance):
+    """
+    Tracked field values of an order as last loaded or saved.
+    
+    Set by Order.from_db() and Order.save(), so change tracking needs no
+    lookup; orders not loaded through the ORM have nothing to compare.
+    """
+    if instance._state.adding:
+        return {}
+    return getattr(instance, '_loaded_values', {})
+
+
 @receiver(pre_save, sender=Order)
 def order_pre_save(sender, instance, **kwargs):
     """Handle order pre-save operations"""
-    if instance.pk:  # Existing order
-        try:
-            old_instance = Order.objects.get(pk=instance.pk)
-            
-            # Track status changes
-            if old_instance.status != instance.status:
-                instance._old_status = old_instance.status
-            
-            # Track payment changes
-            if old_instance.advance_payment != instance.advance_payment:
-                instance._old_advance_payment = old_instance.advance_payment
-            
-            # Track delivery date changes
-            if old_instance.expected_delivery_date != instance.expected_delivery_date:
-                instance._old_delivery_date = old_instance.expected_delivery_date
-                
-        except Order.DoesNotExist:
-            pass
+    loaded = loaded_values(instance)
+    
+    # Track status changes
+    if 'status' in loaded and loaded['status'] != instance.status:
+        instance._old_status = loaded['status']
+    
+    # Track payment changes
+    if 'advance_payment' in loaded and loaded['advance_payment'] != instance.advance_payment:
+        instance._old_advance_payment = loaded['advance_payment']
+    
+    # Track delivery date changes
+    if 'expected_delivery_date' in loaded and loaded['expected_delivery_date'] != instance.expected_delivery_date:
+        instance._old_delivery_date = loaded['expected_delivery_date']
 
 
 @receiver(post_save, sender=Order)
@@ -55,6 +62,7 @@ def order_post_save(sender, instance, created, **kwargs):
     # Remove None values and clear caches
     for key in filter(None, cache_keys_to_clear):
         cache.delete(key)
+    Order.bump_data_version()
     
     # Log order creation
     if created:
@@ -156,6 +164,7 @@ def order_post_delete(sender, instance, **kwargs):
     # Remove None values and clear caches
     for key in filter(None, cache_keys_to_clear):
         cache.delete(key)
+    Order.bump_data_version()
     
     # Log order deletion
     logger.info(
@@ -169,6 +178,7 @@ def handle_bulk_order_update(sender, orders, action, **kwargs):
     """Handle bulk order updates"""
     # Clear caches
     cache.delete('order_statistics')
+    Order.bump_data_version()
     cache.delete('pending_orders')
     cache.delete('overdue_orders')
     cache.delete('recent_orders')
@@ -214,6 +224,7 @@ def handle_bulk_order_creation(sender, orders, **kwargs):
     """Handle bulk order creation"""
     # Clear caches
     cache.delete('order_statistics')
+    Order.bump_data_version()
     cache.delete('recent_orders')
     
     # Log bulk creation
@@ -250,6 +261,7 @@ def handle_bulk_order_deletion(sender, order_ids, **kwargs):
     
     for key in cache_keys_to_clear:
         cache.delete(key)
+    Order.bump_data_version()
     
     # Log bulk deletion
     order_count = len(order_ids)
@@ -421,28 +433,24 @@ def track_order_completion_time(sender, order, old_status, new_status, **kwargs)
 @receiver(pre_save, sender=Order)
 def validate_status_progression(sender, instance, **kwargs):
     """Validate logical status progression"""
-    if instance.pk:
-        try:
-            old_instance = Order.objects.get(pk=instance.pk)
-            if old_instance.status != instance.status:
-                # Define valid status transitions
-                valid_transitions = {
-                    'PENDING': ['CONFIRMED', 'CANCELLED'],
-                    'CONFIRMED': ['IN_PRODUCTION', 'CANCELLED'],
-                    'IN_PRODUCTION': ['READY', 'CANCELLED'],
-                    'READY': ['DELIVERED', 'CANCELLED'],
-                    'DELIVERED': [],  # Terminal state
-                    'CANCELLED': []   # Terminal state
-                }
-                
-                valid_next_statuses = valid_transitions.get(old_instance.status, [])
-                
-                if instance.status not in valid_next_statuses and instance.status != old_instance.status:
-                    logger.warning(
-                        f"Invalid status transition: Order #{instance.id} cannot go "
-                        f"from {old_instance.status} to {instance.status}. "
-                        f"Valid transitions: {valid_next_statuses}"
-                    )
-        except Order.DoesNotExist:
-            pass
+    old_status = loaded_values(instance).get('status')
+    if old_status and old_status != instance.status:
+        # Define valid status transitions
+        valid_transitions = {
+            'PENDING': ['CONFIRMED', 'CANCELLED'],
+            'CONFIRMED': ['IN_PRODUCTION', 'CANCELLED'],
+            'IN_PRODUCTION': ['READY', 'CANCELLED'],
+            'READY': ['DELIVERED', 'CANCELLED'],
+            'DELIVERED': [],  # Terminal state
+            'CANCELLED': []   # Terminal state
+        }
+        
+        valid_next_statuses = valid_transitions.get(old_status, [])
+        
+        if instance.status not in valid_next_statuses:
+            logger.warning(
+                f"Invalid status transition: Order #{instance.id} cannot go "
+                f"from {old_status} to {instance.status}. "
+                f"Valid transitions: {valid_next_statuses}"
+            )
         
\ No newline at end of file
@@ -1,3 +1,447 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache, caches
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from categories.factories import CategoryFactory
+from customers.factories import CustomerFactory
+from order_items.factories import OrderItemFactory
+from order_items.models import OrderItem
+from posapi.factories import UserFactory
+from products.factories import ProductFactory
+from sales.factories import SalesFactory
+from .models import Order, deferred_order_totals, defer_order_totals
+from .signals import order_status_changed
 
-# Create your tests here.
+
+class OrderRecalculateTotalsTest(TestCase):
+    """Test cases for database-side order total recalculation"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.products = ProductFactory.create_batch(3, category=category)
+
+    def _create_order(self, line_totals, advance_payment='0.00'):
+        order = Order.objects.bulk_create([Order(
+            customer=self.customer,
+            customer_name=self.customer.name,
+            customer_phone=self.customer.phone,
+            advance_payment=Decimal(advance_payment),
+            date_ordered=date.today(),
+            created_by=self.user
+        )])[0]
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=product,
+                product_name=product.name,
+                quantity=1,
+                unit_price=Decimal(line_total),
+                line_total=Decimal(line_total)
+            )
+            for product, line_total in zip(self.products, line_totals)
+        ])
+        return order
+
+    def test_calculate_totals_uses_active_items(self):
+        """Test order totals come from active items and are written without Order.save()"""
+        order = self._create_order(['300.00', '200.00', '50.00'], advance_payment='500.00')
+        OrderItem.objects.filter(order=order, line_total=Decimal('50.00')).update(is_active=False)
+
+        with self.assertNumQueries(2):
+            total = order.calculate_totals()
+
+        self.assertEqual(total, Decimal('500.00'))
+        self.assertEqual(order.remaining_amount, Decimal('0.00'))
+        self.assertTrue(order.is_fully_paid)
+
+    def test_batch_recalculation(self):
+        """Test a queryset of orders is recalculated with one UPDATE"""
+        orders = [self._create_order(['120.00']), self._create_order([])]
+
+        with self.assertNumQueries(1):
+            updated = Order.objects.filter(pk__in=[order.pk for order in orders]).recalculate_totals()
+
+        self.assertEqual(updated, 2)
+        totals = dict(Order.objects.values_list('pk', 'remaining_amount'))
+        self.assertEqual(totals[orders[0].pk], Decimal('120.00'))
+        self.assertEqual(totals[orders[1].pk], Decimal('0.00'))
+        self.assertFalse(Order.objects.filter(is_fully_paid=True).exists())
+
+    def test_recalculation_follows_conversion_of_converted_orders(self):
+        """Test a new total moves converted orders between partial and full conversion"""
+        converted, unconverted = self._create_order(['300.00', '200.00']), self._create_order(['300.00'])
+        Order.objects.filter(pk=converted.pk).update(
+            conversion_status='PARTIALLY_CONVERTED', converted_sales_amount=Decimal('300.00')
+        )
+        OrderItem.objects.filter(order=converted, line_total=Decimal('200.00')).update(is_active=False)
+
+        Order.objects.filter(pk__in=[converted.pk, unconverted.pk]).recalculate_totals()
+
+        statuses = dict(Order.objects.values_list('pk', 'conversion_status'))
+        self.assertEqual(statuses[converted.pk], 'FULLY_CONVERTED')
+        self.assertEqual(statuses[unconverted.pk], 'NOT_CONVERTED')
+
+
+class OrderWriteQueryTest(TestCase):
+    """Test Order.save() does no lookups beyond its own write"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+
+    def _create_order(self):
+        # Bulk created so the setup does not depend on Order.save()
+        return Order.objects.bulk_create([Order(
+            customer=self.customer,
+            customer_name=self.customer.name,
+            customer_phone=self.customer.phone,
+            total_amount=Decimal('500.00'),
+            remaining_amount=Decimal('500.00'),
+            date_ordered=date.today(),
+            created_by=self.user
+        )])[0]
+
+    def _statements(self, queries):
+        return [query['sql'] for query in queries.captured_queries if 'SAVEPOINT' not in query['sql']]
+
+    def _order_writes(self, statements):
+        return [sql for sql in statements if sql.startswith(('INSERT INTO "order" ', 'UPDATE "order" '))]
+
+    def test_create_order_writes_once(self):
+        """Test creating an order inserts it once without a conversion status pass"""
+        payload = {'customer': str(self.customer.id), 'advance_payment': '0.00', 'description': 'Bridal dress'}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('orders:create_order'), payload, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        statements = self._statements(queries)
+        self.assertEqual(len(self._order_writes(statements)), 1)
+        self.assertLessEqual(len(statements), 18)
+        self.assertEqual(response.data['data']['conversion_status'], 'NOT_CONVERTED')
+
+    def test_update_order_saves_without_lookups(self):
+        """Test an edit runs only the view's fetch before the single UPDATE"""
+        order = self._create_order()
+        payload = {'description': 'Add embroidery', 'status': 'CONFIRMED'}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(reverse('orders:update_order', args=[order.id]), payload, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        statements = self._statements(queries)
+        writes = self._order_writes(statements)
+        self.assertEqual(len(writes), 1)
+        # Everything after the write serializes the response
+        self.assertEqual(len(statements[:statements.index(writes[0])]), 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'CONFIRMED')
+
+    def test_add_payment_query_count(self):
+        """Test recording a payment fetches and updates the order only"""
+        order = self._create_order()
+
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                reverse('orders:add_payment', args=[order.id]), {'amount': '200.00'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        order.refresh_from_db()
+        self.assertEqual(order.advance_payment, Decimal('200.00'))
+        self.assertEqual(order.remaining_amount, Decimal('300.00'))
+
+    def test_status_change_is_tracked_from_loaded_values(self):
+        """Test pre_save change tracking compares against the loaded row"""
+        order = Order.objects.get(pk=self._create_order().pk)
+        received = []
+        order_status_changed.connect(lambda sender, **kwargs: received.append(kwargs), weak=False, dispatch_uid='test')
+        self.addCleanup(order_status_changed.disconnect, dispatch_uid='test')
+
+        order.update_status('CONFIRMED')
+        order.update_status('IN_PRODUCTION')
+
+        self.assertEqual(
+            [(change['old_status'], change['new_status']) for change in received],
+            [('PENDING', 'CONFIRMED'), ('CONFIRMED', 'IN_PRODUCTION')]
+        )
+
+
+class DeferredOrderTotalsTest(TestCase):
+    """Test order totals are recalculated once per batch of item writes"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.products = ProductFactory.create_batch(6, quantity=50, category=category)
+        self.order = Order.objects.bulk_create([Order(
+            customer=self.customer,
+            customer_name=self.customer.name,
+            customer_phone=self.customer.phone,
+            date_ordered=date.today(),
+            created_by=self.user
+        )])[0]
+
+    def _add_items(self, products):
+        return [
+            OrderItemFactory(order=self.order, product=product, quantity=2)
+            for product in products
+        ]
+
+    def _order_updates(self, queries):
+        return [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "order" ')]
+
+    def test_batch_recalculates_each_order_once(self):
+        """Test item writes inside the block leave one UPDATE per order"""
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_order_totals():
+                items = self._add_items(self.products)
+                items[0].update_quantity(5)
+                items[1].soft_delete()
+
+        self.assertEqual(len(self._order_updates(queries)), 1)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal('1300.00'))
+        self.assertEqual(self.order.remaining_amount, Decimal('1300.00'))
+
+    def test_failed_batch_is_not_flushed(self):
+        """Test a batch that raises recalculates nothing and does not stay open"""
+        with self.assertRaises(RuntimeError):
+            with deferred_order_totals():
+                self._add_items(self.products[:1])
+                raise RuntimeError('validation failed')
+
+        self.assertFalse(defer_order_totals(self.order.pk))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal('0.00'))
+
+    def test_items_outside_a_batch_recalculate_immediately(self):
+        """Test single item writes still keep the order total current"""
+        self._add_items(self.products[:2])
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal('400.00'))
+
+    def test_bulk_update_order_items(self):
+        """Test a bulk item update recalculates the order once"""
+        items = self._add_items(self.products[:3])
+        payload = {'updates': [
+            {'order_item_id': str(items[0].id), 'quantity': '4', 'customization_notes': 'Long sleeves'},
+            {'order_item_id': str(items[1].id), 'quantity': '3'},
+        ]}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('order_items:bulk_update_order_items'), payload, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(self._order_updates(queries)), 1)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal('900.00'))
+
+    def test_duplicate_order_recalculates_once(self):
+        """Test duplicating a many-item order writes the copy's total once"""
+        self._add_items(self.products)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('orders:duplicate_order', args=[self.order.id]), format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(self._order_updates(queries)), 1)
+        self.assertEqual(Decimal(response.data['data']['total_amount']), Decimal('1200.00'))
+
+
+class OrderStatisticsTest(TestCase):
+    """Test single-query order statistics"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        today = date.today()
+        rows = [
+            # status, total, advance, fully paid, due, ordered, active
+            ('PENDING', '100.00', '0.00', False, today - timedelta(days=1), today - timedelta(days=2), True),
+            ('CONFIRMED', '200.00', '200.00', True, today, today - timedelta(days=10), True),
+            ('DELIVERED', '0.00', '0.00', False, today - timedelta(days=1), today - timedelta(days=40), True),
+            ('PENDING', '500.00', '0.00', False, today - timedelta(days=1), today, False),
+        ]
+        self.orders = Order.objects.bulk_create([
+            Order(
+                customer=self.customer,
+                customer_name=self.customer.name,
+                customer_phone=self.customer.phone,
+                status=order_status,
+                total_amount=Decimal(total),
+                advance_payment=Decimal(advance),
+                remaining_amount=Decimal(total) - Decimal(advance),
+                is_fully_paid=fully_paid,
+                expected_delivery_date=due,
+                date_ordered=ordered,
+                is_active=active,
+                created_by=self.user
+            )
+            for order_status, total, advance, fully_paid, due, ordered, active in rows
+        ])
+
+    def test_statistics_in_one_query(self):
+        """Test every bucket comes from a single aggregate over active orders"""
+        with self.assertNumQueries(1):
+            stats = Order.get_statistics()
+
+        self.assertEqual(stats['total_orders'], 3)
+        self.assertEqual(stats['status_breakdown']['pending'], 1)
+        self.assertEqual(stats['status_breakdown']['confirmed'], 1)
+        self.assertEqual(stats['status_breakdown']['delivered'], 1)
+        self.assertEqual(stats['status_breakdown']['cancelled'], 0)
+        self.assertEqual(stats['financial_summary'], {
+            'total_value': 300.0,
+            'total_advance_received': 200.0,
+            'total_remaining': 100.0,
+            'average_order_value': 100.0,
+        })
+        self.assertEqual(stats['payment_summary']['fully_paid_orders'], 1)
+        self.assertEqual(stats['payment_summary']['unpaid_orders'], 1)
+        # Delivered orders past their date are not overdue
+        self.assertEqual(stats['delivery_summary']['overdue_orders'], 1)
+        self.assertEqual(stats['delivery_summary']['due_today'], 1)
+        self.assertEqual(stats['recent_activity'], {'orders_this_week': 1, 'orders_this_month': 2})
+
+    def test_cached_statistics_invalidated_on_write(self):
+        """Test cached statistics are reused until an order changes"""
+        Order.get_statistics(use_cache=True)
+        # Only the shared version counter is read
+        with self.assertNumQueries(1):
+            stats = Order.get_statistics(use_cache=True)
+        self.assertEqual(stats['delivery_summary']['overdue_orders'], 1)
+
+        order = Order.objects.get(pk=self.orders[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.update_status('CONFIRMED')
+
+        stats = Order.get_statistics(use_cache=True)
+        self.assertEqual(stats['status_breakdown']['pending'], 0)
+        self.assertEqual(stats['status_breakdown']['confirmed'], 2)
+
+        # Total recalculation is a queryset update, which must invalidate too
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(pk=order.pk).recalculate_totals()
+        stats = Order.get_statistics(use_cache=True)
+        self.assertEqual(stats['financial_summary']['total_value'], 200.0)
+
+    def test_cached_statistics_see_other_workers_writes(self):
+        """Test a version bumped through another process's cache connection invalidates cached statistics"""
+        Order.get_statistics(use_cache=True)
+
+        Order.objects.filter(pk=self.orders[2].pk).update(is_active=False)
+        caches.create_connection('versions').incr(Order.DATA_VERSION_CACHE_KEY)
+
+        stats = Order.get_statistics(use_cache=True)
+        self.assertEqual(stats['total_orders'], 2)
+
+    def test_statistics_endpoint(self):
+        """Test the API serves the cached statistics unless refresh is requested"""
+        response = self.client.get(reverse('orders:order_statistics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['total_orders'], 3)
+
+        Order.objects.filter(pk=self.orders[2].pk).update(is_active=False)
+        response = self.client.get(reverse('orders:order_statistics'))
+        self.assertEqual(response.data['data']['total_orders'], 3)
+        response = self.client.get(reverse('orders:order_statistics'), {'refresh': 'true'})
+        self.assertEqual(response.data['data']['total_orders'], 2)
+
+
+class OrderListQueryTest(TestCase):
+    """Test order list endpoints run a fixed number of queries"""
+
+    LIST_URLS = ['orders:list_orders', 'orders:pending_orders', 'orders:overdue_orders', 'orders:unpaid_orders']
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.product = ProductFactory(quantity=50, category=category)
+
+    def _create_orders(self, count):
+        """Pending, overdue and unpaid orders with one item each"""
+        today = date.today()
+        orders = Order.objects.bulk_create([
+            Order(
+                customer=self.customer,
+                customer_name=self.customer.name,
+                customer_phone=self.customer.phone,
+                total_amount=Decimal('100.00'),
+                remaining_amount=Decimal('100.00'),
+                date_ordered=today - timedelta(days=3),
+                expected_delivery_date=today - timedelta(days=1),
+                created_by=self.user
+            )
+            for _ in range(count)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=self.product,
+                product_name=self.product.name,
+                quantity=1,
+                unit_price=self.product.price,
+                line_total=self.product.price
+            )
+            for order in orders
+        ])
+        return orders
+
+    def _list(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['data']['orders'], len(queries.captured_queries)
+
+    def test_list_queries_do_not_grow_with_orders(self):
+        """Test each list endpoint costs the same for two orders as for six"""
+        self._create_orders(2)
+        small = {url_name: self._list(url_name)[1] for url_name in self.LIST_URLS}
+
+        converted = self._create_orders(4)[0]
+        SalesFactory(customer=self.customer, order_id=converted)
+
+        for url_name in self.LIST_URLS:
+            orders, query_count = self._list(url_name)
+            self.assertEqual(len(orders), 6, url_name)
+            self.assertEqual(query_count, small[url_name], url_name)
+
+            rows = {row['id']: row for row in orders}
+            self.assertTrue(rows[str(converted.id)]['has_sales'])
+            self.assertEqual(sum(row['has_sales'] for row in orders), 1)
+            self.assertTrue(all(row['item_count'] == 1 for row in orders))
+
+    def test_annotations_match_instance_lookups(self):
+        """Test annotated values agree with the per-instance fallbacks"""
+        order = self._create_orders(1)[0]
+
+        annotated = Order.objects.with_list_details().get(pk=order.pk)
+        plain = Order.objects.get(pk=order.pk)
+
+        self.assertEqual(annotated.has_been_converted_to_sale(), plain.has_been_converted_to_sale())
+        self.assertEqual(annotated.item_count, plain.item_count)
+        self.assertEqual(annotated.item_count, 1)
@@ -7,7 +7,7 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, date
-from .models import Order
+from .models import Order, deferred_order_totals
 from .serializers import (
     OrderSerializer,
     OrderCreateSerializer,
@@ -21,6 +21,8 @@ from .serializers import (
     OrderSearchSerializer,
     OrderCustomerUpdateSerializer
 )
+from core.pagination import paginate_queryset
+from core.idempotency import idempotent
 
 
 # Function-based views (following your pattern)
@@ -138,15 +140,11 @@ def list_orders(request):
                 order_field = f'-{order_field}'
             orders = orders.order_by(order_field)
         
-        # Select related to avoid N+1 queries
-        orders = orders.select_related('customer', 'created_by')
+        # Join and annotate everything the list serializer reads to avoid N+1 queries
+        orders = orders.with_list_details()
         
-        # Calculate pagination
-        total_count = orders.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        orders = orders[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        orders, pagination = paginate_queryset(request, orders, page, page_size)
         
         serializer = OrderListSerializer(orders, many=True)
         
@@ -154,14 +152,7 @@ def list_orders(request):
             'success': True,
             'data': {
                 'orders': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                },
+                'pagination': pagination,
                 'filters_applied': {
                     'search': search,
                     'customer_id': customer_id,
@@ -195,6 +186,7 @@ def list_orders(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_order(request):
     """
     Create a new order
@@ -448,7 +440,7 @@ def search_orders(request):
         
         # Search orders
         orders = Order.active_orders().search(query)
-        orders = orders.select_related('customer', 'created_by')
+        orders = orders.with_list_details()
         
         # Calculate pagination
         total_count = orders.count()
@@ -511,7 +503,7 @@ def orders_by_status(request, status_name):
         
         # Get orders by status
         orders = Order.orders_by_status(status_name)
-        orders = orders.select_related('customer', 'created_by')
+        orders = orders.with_list_details()
         
         # Calculate pagination
         total_count = orders.count()
@@ -566,7 +558,7 @@ def orders_by_customer(request, customer_id):
         
         # Get orders by customer
         orders = Order.orders_by_customer(customer_id)
-        orders = orders.select_related('customer', 'created_by')
+        orders = orders.with_list_details()
         
         # Calculate pagination
         total_count = orders.count()
@@ -620,7 +612,7 @@ def pending_orders(request):
         
         # Get pending orders
         orders = Order.pending_orders()
-        orders = orders.select_related('customer', 'created_by')
+        orders = orders.with_list_details()
         
         # Calculate pagination
         total_count = orders.count()
@@ -674,7 +666,7 @@ def overdue_orders(request):
         
         # Get overdue orders
         orders = Order.overdue_orders()
-        orders = orders.select_related('customer', 'created_by')
+        orders = orders.with_list_details()
         
         # Calculate pagination
         total_count = orders.count()
@@ -728,7 +720,7 @@ def unpaid_orders(request):
         
         # Get unpaid orders
         orders = Order.unpaid_orders()
-        orders = orders.select_related('customer', 'created_by')
+        orders = orders.with_list_details()
         
         # Calculate pagination
         total_count = orders.count()
@@ -783,7 +775,7 @@ def recent_orders(request):
         
         # Get recent orders
         orders = Order.recent_orders(days=days)
-        orders = orders.select_related('customer', 'created_by')
+        orders = orders.with_list_details()
         
         # Calculate pagination
         total_count = orders.count()
@@ -830,10 +822,11 @@ def recent_orders(request):
 @permission_classes([IsAuthenticated])
 def order_statistics(request):
     """
-    Get comprehensive order statistics
+    Get comprehensive order statistics (cached briefly; pass refresh=true to bypass)
     """
     try:
-        stats = Order.get_statistics()
+        refresh = request.GET.get('refresh', 'false').lower() == 'true'
+        stats = Order.get_statistics(use_cache=not refresh)
         serializer = OrderStatsSerializer(stats)
         
         return Response({
@@ -851,6 +844,7 @@ def order_statistics(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def add_payment(request, order_id):
     """
     Add payment to an order
@@ -1146,7 +1140,7 @@ def due_today_orders(request):
         
         # Get orders due today
         orders = Order.orders_due_today()
-        orders = orders.select_related('customer', 'created_by')
+        orders = orders.with_list_details()
         
         # Calculate pagination
         total_count = orders.count()
@@ -1190,6 +1184,7 @@ def due_today_orders(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def duplicate_order(request, order_id):
     """
     Duplicate an existing order for a customer
@@ -1225,26 +1220,26 @@ def duplicate_order(request, order_id):
             
             duplicate_order = Order.objects.create(**duplicate_data)
             
-            # Duplicate order items if they exist
-            original_items = original_order.get_order_items()
+            # Duplicate order items if they exist; totals are recalculated once at the end
+            original_items = original_order.get_order_items().select_related('product')
             duplicated_items = []
             
-            for item in original_items:
-                from order_items.models import OrderItem
-                item_data = {
-                    'order': duplicate_order,
-                    'product': item.product,
-                    'product_name': item.product_name,
-                    'quantity': item.quantity,
-                    'unit_price': item.unit_price,
-                    'customization_notes': item.customization_notes,
-                    'line_total': item.line_total
-                }
-                duplicate_item = OrderItem.objects.create(**item_data)
-                duplicated_items.append(duplicate_item)
+            with deferred_order_totals():
+                for item in original_items:
+                    from order_items.models import OrderItem
+                    item_data = {
+                        'order': duplicate_order,
+                        'product': item.product,
+                        'product_name': item.product_name,
+                        'quantity': item.quantity,
+                        'unit_price': item.unit_price,
+                        'customization_notes': item.customization_notes,
+                        'line_total': item.line_total
+                    }
+                    duplicate_item = OrderItem.objects.create(**item_data)
+                    duplicated_items.append(duplicate_item)
             
-            # Recalculate order totals
-            duplicate_order.calculate_totals()
+            duplicate_order.refresh_from_db(fields=['total_amount', 'remaining_amount', 'is_fully_paid', 'conversion_status', 'updated_at'])
             
             return Response({
                 'success': True,
@@ -22,6 +22,7 @@ from .serializers import (
     PayablePaymentCreateSerializer,
 )
 from .signals import payable_bulk_updated
+from core.pagination import paginate_queryset
 
 
 @api_view(['GET'])
@@ -148,12 +149,8 @@ def list_payables(request):
         # Select related to avoid N+1 queries
         payables = payables.select_related('created_by', 'vendor')
         
-        # Calculate pagination
-        total_count = payables.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        payables = payables[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        payables, pagination = paginate_queryset(request, payables, page, page_size)
         
         serializer = PayableListSerializer(payables, many=True)
         
@@ -161,14 +158,7 @@ def list_payables(request):
             'success': True,
             'data': {
                 'payables': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                },
+                'pagination': pagination,
                 'filters_applied': {
                     'search': search,
                     'status': status_filter,
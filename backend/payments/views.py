@@ -13,6 +13,8 @@ from .serializers import (
     PaymentUpdateSerializer,
     PaymentDetailSerializer
 )
+from core.pagination import paginate_queryset
+from core.idempotency import idempotent
 
 
 # Function-based views (following your module pattern)
@@ -92,12 +94,8 @@ def list_payments(request):
         if search:
             payments = payments.search(search)
         
-        # Calculate pagination
-        total_count = payments.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        payments = payments[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        payments, pagination = paginate_queryset(request, payments, page, page_size)
         
         serializer = PaymentListSerializer(payments, many=True)
         
@@ -105,14 +103,7 @@ def list_payments(request):
             'success': True,
             'data': {
                 'payments': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                }
+                'pagination': pagination
             }
         }, status=status.HTTP_200_OK)
         
@@ -133,6 +124,7 @@ def list_payments(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_payment(request):
     """
     Create a new payment
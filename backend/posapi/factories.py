@@ -0,0 +1,18 @@
+import factory
+from factory.django import DjangoModelFactory
+from .models import User
+
+
+class UserFactory(DjangoModelFactory):
+    """Staff user with a usable password"""
+
+    class Meta:
+        model = User
+
+    email = factory.Sequence(lambda n: f'user{n}@example.com')
+    full_name = 'Test User'
+    password = 'testpass123'
+
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        return model_class.objects.create_user(*args, **kwargs)
@@ -3,7 +3,7 @@ from django.utils.html import format_html
 from django.db.models import Sum, F
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import Product
+from .models import Product, StockMovement
 
 
 @admin.register(Product)
@@ -141,6 +141,8 @@ class ProductAdmin(admin.ModelAdmin):
     def mark_as_active(self, request, queryset):
         """Mark selected products as active"""
         updated = queryset.update(is_active=True)
+        # Queryset updates skip the post_save signal that invalidates product caches
+        Product.bump_data_version()
         self.message_user(
             request,
             f'{updated} products were successfully marked as active.'
@@ -150,6 +152,7 @@ class ProductAdmin(admin.ModelAdmin):
     def mark_as_inactive(self, request, queryset):
         """Mark selected products as inactive"""
         updated = queryset.update(is_active=False)
+        Product.bump_data_version()
         self.message_user(
             request,
             f'{updated} products were successfully marked as inactive.'
@@ -232,7 +235,35 @@ class ProductAdmin(admin.ModelAdmin):
         return super().changelist_view(request, extra_context)
 
 
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = (
+        'product',
+        'movement_type',
+        'quantity_change',
+        'reserved_change',
+        'unit_price',
+        'sale',
+        'created_by',
+        'created_at'
+    )
+    list_filter = ('movement_type', 'created_at')
+    search_fields = ('product__name', 'note')
+    list_select_related = ('product', 'sale', 'created_by')
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+
+    def has_change_permission(self, request, obj=None):
+        """The ledger is append-only"""
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        """The ledger is append-only"""
+        return False
+
+
 # Optional: Custom admin site title and header
 admin.site.site_header = "Product Inventory Management"
 admin.site.site_title = "Product Admin"
 admin.site.index_title = "Welcome to Product Inventory Management"
+
@@ -0,0 +1,22 @@
+import factory
+from decimal import Decimal
+from factory.django import DjangoModelFactory
+from categories.factories import CategoryFactory
+from .models import Product
+
+
+class ProductFactory(DjangoModelFactory):
+    """In-stock product at 100.00, created by its category's owner unless given"""
+
+    class Meta:
+        model = Product
+
+    name = factory.Sequence(lambda n: f'Product {n}')
+    detail = 'Test product detail'
+    price = Decimal('100.00')
+    color = 'Red'
+    fabric = 'Cotton'
+    pieces = factory.LazyFunction(lambda: ['Shirt'])
+    quantity = 10
+    category = factory.SubFactory(CategoryFactory)
+    created_by = factory.LazyAttribute(lambda product: product.category.created_by)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from products.models import ProductSalesRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized product sales rollup table from active sale items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            action='append',
+            dest='product_ids',
+            help='Only rebuild the rollup for this product ID (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        product_ids = options.get('product_ids')
+        rebuilt = ProductSalesRollup.rebuild(product_ids=product_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sales rollups for {rebuilt} products.'))
@@ -0,0 +1,35 @@
+from datetime import datetime, time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from products.models import StockSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Snapshot product stock positions from the stock movement ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--as-of',
+            dest='as_of',
+            help='Snapshot stock as of the start of this date (YYYY-MM-DD, default today)'
+        )
+        parser.add_argument(
+            '--product',
+            action='append',
+            dest='product_ids',
+            help='Only snapshot this product ID (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            as_of_date = (
+                datetime.strptime(options['as_of'], '%Y-%m-%d').date()
+                if options.get('as_of') else timezone.localdate()
+            )
+        except ValueError:
+            raise CommandError('--as-of must be in YYYY-MM-DD format.')
+        
+        # Day boundaries keep snapshots clear of in-flight stock transactions
+        as_of = timezone.make_aware(datetime.combine(as_of_date, time.min))
+        created = StockSnapshot.take(as_of=as_of, product_ids=options.get('product_ids'))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {created} stock snapshots as of {as_of:%Y-%m-%d %H:%M}.'))
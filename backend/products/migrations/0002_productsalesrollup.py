@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:37
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesRollup',
+            fields=[
+                ('product', models.OneToOneField(help_text='Product these totals belong to', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_rollup', serialize=False, to='products.product')),
+                ('quantity_sold', models.IntegerField(default=0, help_text='Total quantity sold across active sale items')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Total line revenue across active sale items', max_digits=15)),
+                ('first_sale_at', models.DateTimeField(blank=True, help_text='Timestamp of the earliest active sale item', null=True)),
+                ('last_sale_at', models.DateTimeField(blank=True, help_text='Timestamp of the latest active sale item', null=True)),
+                ('daily_buckets', models.JSONField(blank=True, default=dict, help_text='Per-day {quantity, revenue} totals for the last 30 days, keyed by ISO date')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Product Sales Rollup',
+                'verbose_name_plural': 'Product Sales Rollups',
+                'db_table': 'product_sales_rollup',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+TRIGRAM_INDEXES = [
+    ('product_name_trgm_idx', 'name'),
+    ('product_color_trgm_idx', 'color'),
+    ('product_fabric_trgm_idx', 'fabric'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Create pg_trgm GIN indexes matching the UPPER(...) LIKE lookups used by icontains"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON product '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_productsalesrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:45
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_conversion_date_order_conversion_status_and_more'),
+        ('products', '0003_product_search_trigram_indexes'),
+        ('sales', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reserved_quantity',
+            field=models.PositiveIntegerField(default=0, help_text='Units held by active stock reservations (not yet sold)'),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField(help_text='Number of units reserved')),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active'), ('COMMITTED', 'Committed'), ('RELEASED', 'Released')], default='ACTIVE', help_text='Reservation state', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this reservation', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_stock_reservations', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(blank=True, help_text='Order holding this reservation', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='orders.order')),
+                ('product', models.ForeignKey(help_text='Reserved product', on_delete=django.db.models.deletion.PROTECT, related_name='stock_reservations', to='products.product')),
+                ('sale', models.ForeignKey(blank=True, help_text='Sale holding this reservation', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='sales.sales')),
+            ],
+            options={
+                'verbose_name': 'Stock Reservation',
+                'verbose_name_plural': 'Stock Reservations',
+                'db_table': 'stock_reservation',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['product', 'status'], name='stock_reser_product_69e498_idx'), models.Index(fields=['sale', 'status'], name='stock_reser_sale_id_e29d1c_idx'), models.Index(fields=['order', 'status'], name='stock_reser_order_i_291c71_idx')],
+            },
+        ),
+    ]
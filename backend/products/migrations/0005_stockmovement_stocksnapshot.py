@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:49
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def snapshot_existing_stock(apps, schema_editor):
+    """Seed the ledger with each existing product's current stock position"""
+    Product = apps.get_model('products', 'Product')
+    StockSnapshot = apps.get_model('products', 'StockSnapshot')
+    taken_at = django.utils.timezone.now()
+    StockSnapshot.objects.bulk_create(
+        [
+            StockSnapshot(
+                id=uuid.uuid4(),
+                product_id=product['id'],
+                taken_at=taken_at,
+                quantity=product['quantity'],
+                reserved_quantity=product['reserved_quantity'],
+                unit_price=product['price']
+            )
+            for product in Product.objects.values('id', 'quantity', 'reserved_quantity', 'price').iterator()
+        ],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_conversion_date_order_conversion_status_and_more'),
+        ('products', '0004_product_reserved_quantity_stockreservation'),
+        ('sales', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockreservation',
+            name='status',
+            field=models.CharField(choices=[('ACTIVE', 'Active'), ('COMMITTED', 'Committed'), ('RELEASED', 'Released'), ('RETURNED', 'Returned')], default='ACTIVE', help_text='Reservation state', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('movement_type', models.CharField(choices=[('OPENING', 'Opening Balance'), ('SALE', 'Sale'), ('RETURN', 'Return'), ('ADJUSTMENT', 'Adjustment'), ('RESERVATION', 'Reservation'), ('RELEASE', 'Reservation Release')], help_text='Reason for the stock change', max_length=20)),
+                ('quantity_change', models.IntegerField(default=0, help_text='Signed change to on-hand quantity')),
+                ('reserved_change', models.IntegerField(default=0, help_text='Signed change to reserved quantity')),
+                ('unit_price', models.DecimalField(decimal_places=2, help_text='Product price when the movement was recorded', max_digits=10)),
+                ('note', models.CharField(blank=True, help_text='Additional context for the movement', max_length=200)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who caused this movement', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_stock_movements', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(blank=True, help_text='Order that caused this movement', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='orders.order')),
+                ('product', models.ForeignKey(help_text='Product whose stock changed', on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='products.product')),
+                ('sale', models.ForeignKey(blank=True, help_text='Sale that caused this movement', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='sales.sales')),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'db_table': 'stock_movement',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['product', 'created_at'], name='stock_movem_product_bbd07a_idx'), models.Index(fields=['movement_type', 'created_at'], name='stock_movem_movemen_dda0c6_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('taken_at', models.DateTimeField(help_text='Point in time the snapshot covers (movements up to and including it)')),
+                ('quantity', models.IntegerField(help_text='On-hand quantity at taken_at')),
+                ('reserved_quantity', models.IntegerField(default=0, help_text='Reserved quantity at taken_at')),
+                ('unit_price', models.DecimalField(decimal_places=2, help_text='Product price at taken_at', max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(help_text='Product this snapshot belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'db_table': 'stock_snapshot',
+                'ordering': ['-taken_at'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'taken_at'), name='unique_product_stock_snapshot')],
+            },
+        ),
+        migrations.RunPython(snapshot_existing_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_data_version_cache_table(apps, schema_editor):
+    """Create the table backing the shared 'versions' cache (core.versions)"""
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_stockmovement_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_data_version_cache_table, migrations.RunPython.noop),
+    ]
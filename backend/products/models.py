@@ -1,11 +1,152 @@
 import uuid
 from django.db import models
+from django.db.models.functions import Greatest
 from django.conf import settings
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 import json
 
 
+class ProductQuerySet(models.QuerySet):
+    """Custom QuerySet for Product model"""
+    
+    def active(self):
+        return self.filter(is_active=True)
+    
+    def by_category(self, category_id):
+        return self.filter(category_id=category_id)
+    
+    def search(self, query):
+        """Search products by name, color, fabric, or category name"""
+        from categories.models import Category
+        
+        # Resolve matching categories up front: an OR across the category join rules out
+        # combining the product trigram indexes, while a plain category_id IN (...) does not
+        category_ids = list(Category.objects.filter(name__icontains=query).values_list('id', flat=True))
+        return self.filter(
+            models.Q(name__icontains=query) |
+            models.Q(color__icontains=query) |
+            models.Q(fabric__icontains=query) |
+            models.Q(category_id__in=category_ids)
+        )
+    
+    def ranked_search(self, query):
+        """Search products and order them by relevance to the query"""
+        from django.db import connection
+        
+        if connection.vendor == 'postgresql':
+            # Substring filters are served by the pg_trgm GIN indexes; similarity only ranks
+            from django.contrib.postgres.search import TrigramWordSimilarity
+            relevance = Greatest(
+                TrigramWordSimilarity(query, 'name'),
+                TrigramWordSimilarity(query, 'color'),
+                TrigramWordSimilarity(query, 'fabric'),
+                TrigramWordSimilarity(query, 'category__name'),
+            )
+        else:
+            relevance = models.Case(
+                models.When(name__iexact=query, then=models.Value(1.0)),
+                models.When(name__istartswith=query, then=models.Value(0.8)),
+                models.When(name__icontains=query, then=models.Value(0.6)),
+                models.When(
+                    models.Q(color__istartswith=query) | models.Q(fabric__istartswith=query),
+                    then=models.Value(0.5)
+                ),
+                default=models.Value(0.3),
+                output_field=models.FloatField()
+            )
+        
+        return self.search(query).annotate(
+            search_relevance=relevance
+        ).order_by('-search_relevance', 'name')
+    
+    def with_sales_totals(self):
+        """Annotate quantity sold and sales revenue per product from the sales rollup"""
+        from django.db.models import DecimalField
+        from django.db.models.functions import Coalesce
+        
+        return self.annotate(
+            sales_quantity=Coalesce('sales_rollup__quantity_sold', 0),
+            sales_revenue=Coalesce(
+                'sales_rollup__revenue',
+                Decimal('0.00'),
+                output_field=DecimalField(max_digits=15, decimal_places=2)
+            )
+        )
+    
+    def with_stock_as_of(self, as_of):
+        """
+        Annotate stock_as_of, reserved_as_of and price_as_of per product.
+        
+        Each product starts from its latest stock snapshot at or before as_of
+        and only sums the ledger movements recorded after that snapshot.
+        """
+        from datetime import datetime, timezone as dt_timezone
+        from django.db.models import OuterRef, Subquery, Sum, F, DecimalField, DateTimeField
+        from django.db.models.functions import Coalesce
+        
+        snapshots = StockSnapshot.objects.filter(
+            product=OuterRef('pk'),
+            taken_at__lte=as_of
+        ).order_by('-taken_at')
+        queryset = self.annotate(
+            snapshot_at=Subquery(snapshots.values('taken_at')[:1]),
+            snapshot_quantity=Subquery(snapshots.values('quantity')[:1]),
+            snapshot_reserved=Subquery(snapshots.values('reserved_quantity')[:1]),
+            snapshot_price=Subquery(snapshots.values('unit_price')[:1]),
+        )
+        
+        since_snapshot = StockMovement.objects.filter(
+            product=OuterRef('pk'),
+            created_at__lte=as_of,
+            created_at__gt=Coalesce(
+                OuterRef('snapshot_at'),
+                models.Value(datetime.min.replace(tzinfo=dt_timezone.utc), output_field=DateTimeField())
+            )
+        ).order_by().values('product')
+        latest_movement = StockMovement.objects.filter(
+            product=OuterRef('pk'),
+            created_at__lte=as_of
+        ).order_by('-created_at')
+        
+        return queryset.annotate(
+            stock_as_of=Coalesce('snapshot_quantity', 0) + Coalesce(
+                Subquery(since_snapshot.annotate(total=Sum('quantity_change')).values('total')), 0
+            ),
+            reserved_as_of=Coalesce('snapshot_reserved', 0) + Coalesce(
+                Subquery(since_snapshot.annotate(total=Sum('reserved_change')).values('total')), 0
+            ),
+            price_as_of=Coalesce(
+                Subquery(latest_movement.values('unit_price')[:1]),
+                'snapshot_price',
+                F('price'),
+                output_field=DecimalField(max_digits=10, decimal_places=2)
+            ),
+        )
+    
+    def price_range(self, min_price=None, max_price=None):
+        """Filter products by price range"""
+        queryset = self
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+        return queryset
+    
+    def stock_level(self, level):
+        """Filter by stock level"""
+        if level == 'OUT_OF_STOCK':
+            return self.filter(quantity=0)
+        elif level == 'LOW_STOCK':
+            return self.filter(quantity__gt=0, quantity__lte=5)
+        elif level == 'MEDIUM_STOCK':
+            return self.filter(quantity__gt=5, quantity__lte=20)
+        elif level == 'HIGH_STOCK':
+            return self.filter(quantity__gt=20)
+        return self
+
+
 class Product(models.Model):
     """Product model for inventory management"""
     
@@ -42,6 +183,10 @@ class Product(models.Model):
         default=0,
         help_text="Available quantity in stock"
     )
+    reserved_quantity = models.PositiveIntegerField(
+        default=0,
+        help_text="Units held by active stock reservations (not yet sold)"
+    )
     category = models.ForeignKey(
         'categories.Category',
         on_delete=models.PROTECT,
@@ -63,6 +208,8 @@ class Product(models.Model):
         help_text="User who created this product"
     )
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         db_table = 'product'
         verbose_name = 'Product'
@@ -116,36 +263,33 @@ class Product(models.Model):
         else:
             return 'HIGH_STOCK'
         
+    def get_sales_rollup(self):
+        """Get the materialized sales rollup for this product (None if never sold)"""
+        try:
+            return self.sales_rollup
+        except ProductSalesRollup.DoesNotExist:
+            return None
+
     def get_total_sales_quantity(self):
         """Get total quantity sold through sales"""
-        from django.db.models import Sum
-        return self.sale_items.aggregate(
-            total=Sum('quantity')
-        )['total'] or 0
+        rollup = self.get_sales_rollup()
+        return rollup.quantity_sold if rollup else 0
 
     def get_sales_revenue(self):
         """Get total revenue from sales of this product"""
-        from django.db.models import Sum
-        return self.sale_items.aggregate(
-            total=Sum('line_total')
-        )['total'] or Decimal('0.00')
+        rollup = self.get_sales_rollup()
+        return rollup.revenue if rollup else Decimal('0.00')
 
     # Enhanced Sales Integration Properties and Methods
     @property
     def total_sales_quantity(self):
         """Get total quantity sold through sales"""
-        from django.db.models import Sum
-        return self.sale_items.aggregate(
-            total=Sum('quantity')
-        )['total'] or 0
+        return self.get_total_sales_quantity()
 
     @property
     def total_sales_revenue(self):
         """Get total revenue from sales of this product"""
-        from django.db.models import Sum
-        return self.sale_items.aggregate(
-            total=Sum('line_total')
-        )['total'] or Decimal('0.00')
+        return self.get_sales_revenue()
 
     @property
     def average_sale_price(self):
@@ -161,12 +305,12 @@ class Product(models.Model):
             return 0.0
         
         # Calculate days since first sale
-        first_sale = self.sale_items.filter(is_active=True).order_by('created_at').first()
-        if not first_sale:
+        rollup = self.get_sales_rollup()
+        if not rollup or not rollup.first_sale_at:
             return 0.0
         
         from django.utils import timezone
-        days_since_first_sale = (timezone.now() - first_sale.created_at).days
+        days_since_first_sale = (timezone.now() - rollup.first_sale_at).days
         if days_since_first_sale == 0:
             return float(self.total_sales_quantity)
         
@@ -209,14 +353,12 @@ class Product(models.Model):
         from django.db.models import Sum
         active_sale_items = self.sale_items.filter(is_active=True)
         
-        # Sales by period
-        recent_sales = self.get_sales_by_period(30)
-        recent_sales_quantity = recent_sales.aggregate(
-            total=Sum('quantity')
-        )['total'] or 0
-        recent_sales_revenue = recent_sales.aggregate(
-            total=Sum('line_total')
-        )['total'] or Decimal('0.00')
+        # Sales by period (read from the rollup's daily buckets)
+        rollup = self.get_sales_rollup()
+        if rollup:
+            recent_sales_quantity, recent_sales_revenue = rollup.get_recent_totals(30)
+        else:
+            recent_sales_quantity, recent_sales_revenue = 0, Decimal('0.00')
         
         # Top customers
         top_customers = active_sale_items.values(
@@ -242,15 +384,130 @@ class Product(models.Model):
             'stock_status': self.stock_status,
         }
 
-    def reduce_stock_for_sale(self, quantity_sold, user=None):
-        """Reduce stock when product is sold"""
-        if not self.can_fulfill_quantity(quantity_sold):
-            raise ValidationError("Insufficient stock for sale")
+    def _apply_stock_update(self, conditions, quantity_delta=0, reserved_delta=0):
+        """
+        Run a conditional UPDATE against this product's stock row.
+        
+        The condition is evaluated by the database under the row lock taken by
+        the UPDATE, so concurrent tills cannot both pass it. Returns False when
+        no row matched (e.g. insufficient stock).
+        """
+        from django.db.models import F
+        from django.utils import timezone
+        from categories.models import Category
+        updated = Product.objects.filter(pk=self.pk, **conditions).update(
+            quantity=F('quantity') + quantity_delta,
+            reserved_quantity=F('reserved_quantity') + reserved_delta,
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['quantity', 'reserved_quantity', 'updated_at'])
+        if updated:
+            if quantity_delta and self.is_active:
+                Category.adjust_stock_counters(self.category_id, quantity_delta, self.price)
+            Product.bump_data_version()
+        return bool(updated)
+
+    def build_stock_movement(self, movement_type, quantity_change=0, reserved_change=0,
+                             sale=None, order=None, user=None, note=''):
+        """Build an unsaved ledger row for a stock change of this product"""
+        return StockMovement(
+            product=self,
+            movement_type=movement_type,
+            quantity_change=quantity_change,
+            reserved_change=reserved_change,
+            unit_price=self.price,
+            sale=sale,
+            order=order,
+            created_by=user,
+            note=note
+        )
+
+    def reduce_stock_for_sale(self, quantity_sold, user=None, sale=None):
+        """Reduce stock when product is sold, failing atomically on insufficient stock"""
+        from django.db import transaction
+        from django.db.models import F
+        with transaction.atomic():
+            if not self._apply_stock_update(
+                {'quantity__gte': F('reserved_quantity') + quantity_sold},
+                quantity_delta=-quantity_sold
+            ):
+                raise ValidationError("Insufficient stock for sale")
+            self.build_stock_movement('SALE', -quantity_sold, sale=sale, user=user).save()
+        
+        return {
+            'old_quantity': self.quantity + quantity_sold,
+            'new_quantity': self.quantity,
+            'difference': -quantity_sold
+        }
+
+    def reserve_stock(self, quantity):
+        """Hold units for a pending sale/order; False if not enough unreserved stock"""
+        from django.db.models import F
+        return self._apply_stock_update(
+            {'quantity__gte': F('reserved_quantity') + quantity},
+            reserved_delta=quantity
+        )
+
+    def deduct_stock(self, quantity):
+        """Take units straight out of unreserved stock; False if not enough is available"""
+        from django.db.models import F
+        return self._apply_stock_update(
+            {'quantity__gte': F('reserved_quantity') + quantity},
+            quantity_delta=-quantity
+        )
+
+    def commit_reserved_stock(self, quantity):
+        """Turn held units into a stock reduction"""
+        return self._apply_stock_update(
+            {'reserved_quantity__gte': quantity, 'quantity__gte': quantity},
+            quantity_delta=-quantity,
+            reserved_delta=-quantity
+        )
+
+    def release_reserved_stock(self, quantity):
+        """Return held units to the available pool"""
+        return self._apply_stock_update(
+            {'reserved_quantity__gte': quantity},
+            reserved_delta=-quantity
+        )
+
+    def restock_returned_stock(self, quantity):
+        """Put returned units back on hand"""
+        return self._apply_stock_update({}, quantity_delta=quantity)
+
+    def get_stock_as_of(self, as_of):
+        """
+        Get on-hand and reserved quantities at a point in time.
+        
+        Starts from the latest snapshot at or before as_of and replays only the
+        movements recorded after it.
+        """
+        from django.db.models import Sum
+        from django.db.models.functions import Coalesce
         
-        return self.update_quantity(
-            self.quantity - quantity_sold,
-            user=user
+        snapshot = self.stock_snapshots.filter(taken_at__lte=as_of).order_by('-taken_at').first()
+        movements = self.stock_movements.filter(created_at__lte=as_of)
+        quantity = reserved_quantity = 0
+        if snapshot:
+            movements = movements.filter(created_at__gt=snapshot.taken_at)
+            quantity = snapshot.quantity
+            reserved_quantity = snapshot.reserved_quantity
+        
+        totals = movements.aggregate(
+            quantity=Coalesce(Sum('quantity_change'), 0),
+            reserved_quantity=Coalesce(Sum('reserved_change'), 0)
         )
+        return {
+            'quantity': quantity + totals['quantity'],
+            'reserved_quantity': reserved_quantity + totals['reserved_quantity']
+        }
+
+    @property
+    def available_quantity(self):
+        """Units in stock that are not held by reservations"""
+        if self.quantity is None:
+            return 0
+        return max(0, self.quantity - self.reserved_quantity)
 
     @property
     def stock_status_display(self):
@@ -285,15 +542,72 @@ class Product(models.Model):
         """Update product quantity with optional user tracking"""
         old_quantity = self.quantity
         self.quantity = new_quantity
+        # Picked up by the post_save signal when it records the adjustment movement
+        self._stock_changed_by = user
         self.save(update_fields=['quantity', 'updated_at'])
         
-        # You can extend this to log quantity changes if needed
         return {
             'old_quantity': old_quantity,
             'new_quantity': new_quantity,
             'difference': new_quantity - old_quantity
         }
 
+    @classmethod
+    def bulk_update_quantities(cls, updates, user=None):
+        """
+        Set quantities for many products in one locked fetch and one bulk write.
+        
+        `updates` is a list of {'product_id', 'quantity'} dicts; returns the
+        per-product result payloads in the same order.
+        """
+        from django.db import transaction
+        from django.utils import timezone
+        from .signals import product_quantity_bulk_updated
+        
+        with transaction.atomic():
+            products = cls.objects.select_for_update().in_bulk(
+                [update['product_id'] for update in updates]
+            )
+            products = {str(pk): product for pk, product in products.items()}
+            
+            now = timezone.now()
+            changed = []
+            movements = []
+            results = []
+            for update in updates:
+                product = products.get(str(update['product_id']))
+                if product is None:
+                    raise ValidationError(f"Product {update['product_id']} not found.")
+                
+                new_quantity = update['quantity']
+                if new_quantity < 0:
+                    raise ValidationError({'quantity': 'Quantity cannot be negative.'})
+                
+                old_quantity = product.quantity
+                if new_quantity != old_quantity:
+                    product.quantity = new_quantity
+                    product.updated_at = now
+                    changed.append(product)
+                    movements.append(product.build_stock_movement(
+                        'ADJUSTMENT', new_quantity - old_quantity, user=user, note='Bulk quantity update'
+                    ))
+                
+                results.append({
+                    'product_id': update['product_id'],
+                    'product_name': product.name,
+                    'old_quantity': old_quantity,
+                    'new_quantity': new_quantity,
+                    'difference': new_quantity - old_quantity,
+                    'stock_status': product.stock_status
+                })
+            
+            if changed:
+                cls.objects.bulk_update(changed, ['quantity', 'updated_at'], batch_size=500)
+                StockMovement.objects.bulk_create(movements, batch_size=500)
+                product_quantity_bulk_updated.send(sender=cls, products=changed, user=user)
+        
+        return results
+
     def is_low_stock(self, threshold=5):
         """Check if product is low in stock"""
         if self.quantity is None:
@@ -301,10 +615,10 @@ class Product(models.Model):
         return 0 < self.quantity <= threshold
 
     def can_fulfill_quantity(self, requested_quantity):
-        """Check if we have enough stock for requested quantity"""
+        """Check if we have enough unreserved stock for requested quantity"""
         if self.quantity is None:
             return False
-        return self.quantity >= requested_quantity
+        return self.available_quantity >= requested_quantity
 
     @classmethod
     def active_products(cls):
@@ -329,94 +643,771 @@ class Product(models.Model):
         """Get active products by category"""
         return cls.active_products().filter(category_id=category_id)
 
+    # Cache settings for inventory statistics
+    DATA_VERSION_CACHE_KEY = 'product_data_version'
+    STATISTICS_CACHE_TIMEOUT = 60
+
     @classmethod
-    def get_statistics(cls):
-        """Get inventory statistics"""
-        active_products = cls.active_products()
+    def get_data_version(cls):
+        """Get the current product data version (bumped on every product write)"""
+        from core.versions import get_version
+        return get_version(cls.DATA_VERSION_CACHE_KEY)
+
+    @classmethod
+    def bump_data_version(cls):
+        """Invalidate version-keyed product caches"""
+        from core.versions import bump_version
+        bump_version(cls.DATA_VERSION_CACHE_KEY)
+
+    @classmethod
+    def get_inventory_valuation(cls, as_of):
+        """Get on-hand quantity and value of all products at a point in time"""
+        from django.db.models import Sum, Count, F, Q, DecimalField
+        from django.db.models.functions import Coalesce
         
-        total_products = active_products.count()
+        products = cls.objects.filter(created_at__lte=as_of).with_stock_as_of(as_of)
+        value_expression = Sum(
+            F('stock_as_of') * F('price_as_of'),
+            output_field=DecimalField(max_digits=15, decimal_places=2)
+        )
+        totals = products.aggregate(
+            product_count=Count('id', filter=Q(stock_as_of__gt=0)),
+            total_quantity=Coalesce(Sum('stock_as_of'), 0),
+            total_value=Coalesce(
+                value_expression,
+                Decimal('0.00'),
+                output_field=DecimalField(max_digits=15, decimal_places=2)
+            ),
+        )
+        category_breakdown = products.values('category__name').annotate(
+            total_quantity=Sum('stock_as_of'),
+            total_value=value_expression
+        ).order_by('category__name')
         
-        # Calculate total value safely
-        total_value = Decimal('0.00')
-        for product in active_products:
-            if product.price is not None and product.quantity is not None:
-                total_value += product.price * product.quantity
+        return {
+            'as_of': as_of,
+            'product_count': totals['product_count'],
+            'total_quantity': totals['total_quantity'],
+            'total_value': float(totals['total_value']),
+            'category_breakdown': list(category_breakdown),
+        }
+
+    @classmethod
+    def get_statistics(cls, use_cache=False):
+        """Get inventory statistics, optionally served from a short-lived cache"""
+        if use_cache:
+            from django.core.cache import cache
+            cache_key = f'product_statistics_v{cls.get_data_version()}'
+            stats = cache.get(cache_key)
+            if stats is None:
+                stats = cls.get_statistics()
+                cache.set(cache_key, stats, timeout=cls.STATISTICS_CACHE_TIMEOUT)
+            return stats
         
-        low_stock_count = cls.low_stock_products().count()
-        out_of_stock_count = cls.out_of_stock_products().count()
+        from django.db.models import Count, Sum, Q, F, DecimalField
+        from django.db.models.functions import Coalesce
+        active_products = cls.active_products()
+        value_expression = Sum(
+            F('price') * F('quantity'),
+            output_field=DecimalField(max_digits=15, decimal_places=2)
+        )
         
-        # Category breakdown
-        from django.db.models import Count, Sum, Case, When, DecimalField
-        category_stats = active_products.values(
-            'category__name'
-        ).annotate(
-            count=Count('id'),
-            total_quantity=Sum('quantity'),
-            total_value=Sum(
-                Case(
-                    When(price__isnull=False, quantity__isnull=False, 
-                         then=models.F('price') * models.F('quantity')),
-                    default=0,
-                    output_field=DecimalField(max_digits=15, decimal_places=2)
-                )
+        # Totals and stock buckets in a single conditional aggregation
+        totals = active_products.aggregate(
+            total_products=Count('id'),
+            total_value=Coalesce(
+                value_expression,
+                Decimal('0.00'),
+                output_field=DecimalField(max_digits=15, decimal_places=2)
+            ),
+            in_stock=Count('id', filter=Q(quantity__gt=20)),
+            medium_stock=Count('id', filter=Q(quantity__gt=5, quantity__lte=20)),
+            low_stock=Count('id', filter=Q(quantity__gt=0, quantity__lte=5)),
+            out_of_stock=Count('id', filter=Q(quantity=0)),
+        )
+        
+        # Category breakdown from the counters maintained on each category
+        from categories.models import Category
+        category_stats = [
+            {
+                'category__name': name,
+                'count': count,
+                'total_quantity': quantity,
+                'total_value': value,
+            }
+            for name, count, quantity, value in Category.objects.filter(
+                active_product_count__gt=0
+            ).order_by('-active_product_count', 'name').values_list(
+                'name', 'active_product_count', 'stock_quantity', 'inventory_value'
             )
-        ).order_by('-count')
+        ]
 
         return {
-            'total_products': total_products,
-            'total_inventory_value': float(total_value),
-            'low_stock_count': low_stock_count,
-            'out_of_stock_count': out_of_stock_count,
-            'category_breakdown': list(category_stats),
+            'total_products': totals['total_products'],
+            'total_inventory_value': float(totals['total_value']),
+            'low_stock_count': totals['low_stock'],
+            'out_of_stock_count': totals['out_of_stock'],
+            'category_breakdown': category_stats,
             'stock_status_summary': {
-                'in_stock': active_products.filter(quantity__gt=20).count(),
-                'medium_stock': active_products.filter(quantity__gt=5, quantity__lte=20).count(),
-                'low_stock': low_stock_count,
-                'out_of_stock': out_of_stock_count,
+                'in_stock': totals['in_stock'],
+                'medium_stock': totals['medium_stock'],
+                'low_stock': totals['low_stock'],
+                'out_of_stock': totals['out_of_stock'],
             }
         }
 
 
-class ProductQuerySet(models.QuerySet):
-    """Custom QuerySet for Product model"""
+class ProductSalesRollup(models.Model):
+    """Materialized per-product sales totals, maintained incrementally from sale items"""
     
-    def active(self):
-        return self.filter(is_active=True)
+    # Number of days of daily buckets kept for recent activity figures
+    BUCKET_WINDOW_DAYS = 30
     
-    def by_category(self, category_id):
-        return self.filter(category_id=category_id)
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='sales_rollup',
+        help_text="Product these totals belong to"
+    )
+    quantity_sold = models.IntegerField(
+        default=0,
+        help_text="Total quantity sold across active sale items"
+    )
+    revenue = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Total line revenue across active sale items"
+    )
+    first_sale_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Timestamp of the earliest active sale item"
+    )
+    last_sale_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Timestamp of the latest active sale item"
+    )
+    daily_buckets = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Per-day {quantity, revenue} totals for the last 30 days, keyed by ISO date"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'product_sales_rollup'
+        verbose_name = 'Product Sales Rollup'
+        verbose_name_plural = 'Product Sales Rollups'
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity_sold} sold"
+
+    def get_recent_totals(self, days=30):
+        """Get (quantity, revenue) sold within the last N days from the daily buckets"""
+        from django.utils import timezone
+        from datetime import timedelta
+        cutoff = timezone.localdate(timezone.now() - timedelta(days=days)).isoformat()
+        
+        quantity = 0
+        revenue = Decimal('0.00')
+        for day, bucket in self.daily_buckets.items():
+            if day >= cutoff:
+                quantity += bucket['quantity']
+                revenue += Decimal(bucket['revenue'])
+        return quantity, revenue
+
+    def add_to_bucket(self, quantity, revenue, sold_at):
+        """Add a delta to the day bucket of sold_at, dropping buckets outside the window"""
+        from django.utils import timezone
+        from datetime import timedelta
+        cutoff = timezone.localdate(
+            timezone.now() - timedelta(days=self.BUCKET_WINDOW_DAYS)
+        ).isoformat()
+        day = timezone.localdate(sold_at).isoformat()
+        
+        buckets = {key: value for key, value in self.daily_buckets.items() if key >= cutoff}
+        if day >= cutoff:
+            bucket = buckets.get(day, {'quantity': 0, 'revenue': '0.00'})
+            bucket_quantity = bucket['quantity'] + quantity
+            bucket_revenue = Decimal(bucket['revenue']) + revenue
+            if bucket_quantity:
+                buckets[day] = {'quantity': bucket_quantity, 'revenue': str(bucket_revenue)}
+            else:
+                buckets.pop(day, None)
+        self.daily_buckets = buckets
+
+    def apply(self, quantity, revenue, sold_at):
+        """Add (or, with negative values, remove) one sale item's contribution in memory"""
+        self.quantity_sold += quantity
+        self.revenue += revenue
+        
+        if quantity > 0:
+            if self.first_sale_at is None or sold_at < self.first_sale_at:
+                self.first_sale_at = sold_at
+            if self.last_sale_at is None or sold_at > self.last_sale_at:
+                self.last_sale_at = sold_at
+        
+        self.add_to_bucket(quantity, revenue, sold_at)
+
+    def refresh_sale_dates(self):
+        """Recompute first/last sale timestamps from the product's active sale items"""
+        from django.db.models import Min, Max
+        dates = self.product.sale_items.filter(is_active=True).aggregate(
+            first=Min('created_at'),
+            last=Max('created_at')
+        )
+        self.first_sale_at = dates['first']
+        self.last_sale_at = dates['last']
+
+    @classmethod
+    def record_sale_item_change(cls, product_id, quantity, revenue, sold_at):
+        """Apply a sale item delta to the product's rollup row under a row lock"""
+        from django.db import transaction
+        
+        with transaction.atomic():
+            rollup, _ = cls.objects.select_for_update().get_or_create(product_id=product_id)
+            rollup.apply(quantity, revenue, sold_at)
+            
+            # Removing a sale may drop the earliest/latest one, so re-derive the dates
+            if quantity < 0:
+                if rollup.quantity_sold <= 0:
+                    rollup.first_sale_at = None
+                    rollup.last_sale_at = None
+                elif sold_at in (rollup.first_sale_at, rollup.last_sale_at):
+                    rollup.refresh_sale_dates()
+            
+            rollup.save()
+        # Rollup totals are part of product responses
+        Product.bump_data_version()
+        return rollup
+
+    @classmethod
+    def record_sale_items(cls, sale_items):
+        """Add the contributions of newly created sale items in one locked batch"""
+        from django.db import transaction
+        
+        sale_items = [item for item in sale_items if item.is_active]
+        if not sale_items:
+            return []
+        product_ids = {item.product_id for item in sale_items}
+        
+        with transaction.atomic():
+            cls.objects.bulk_create([cls(product_id=product_id) for product_id in product_ids], ignore_conflicts=True)
+            rollups = {
+                rollup.product_id: rollup
+                for rollup in cls.objects.select_for_update().filter(product_id__in=product_ids).order_by('product_id')
+            }
+            for item in sale_items:
+                rollups[item.product_id].apply(item.quantity, item.line_total, item.created_at)
+            
+            now = timezone.now()
+            for rollup in rollups.values():
+                rollup.updated_at = now
+            cls.objects.bulk_update(
+                rollups.values(),
+                ['quantity_sold', 'revenue', 'first_sale_at', 'last_sale_at', 'daily_buckets', 'updated_at']
+            )
+        Product.bump_data_version()
+        return list(rollups.values())
+
+    @classmethod
+    def rebuild(cls, product_ids=None):
+        """Rebuild rollup rows from scratch by aggregating active sale items"""
+        from django.db import transaction
+        from django.db.models import Sum, Min, Max
+        from django.utils import timezone
+        from datetime import timedelta
+        from sales.models import SaleItem
+        
+        sale_items = SaleItem.objects.filter(is_active=True)
+        if product_ids is not None:
+            sale_items = sale_items.filter(product_id__in=product_ids)
+        
+        totals = sale_items.values('product_id').annotate(
+            quantity=Sum('quantity'),
+            revenue=Sum('line_total'),
+            first=Min('created_at'),
+            last=Max('created_at')
+        ).order_by()
+        
+        cutoff = timezone.now() - timedelta(days=cls.BUCKET_WINDOW_DAYS)
+        rollups = {}
+        for row in totals:
+            rollups[row['product_id']] = cls(
+                product_id=row['product_id'],
+                quantity_sold=row['quantity'] or 0,
+                revenue=row['revenue'] or Decimal('0.00'),
+                first_sale_at=row['first'],
+                last_sale_at=row['last'],
+                daily_buckets={}
+            )
+        
+        recent_items = sale_items.filter(created_at__gte=cutoff).values_list(
+            'product_id', 'quantity', 'line_total', 'created_at'
+        )
+        for product_id, quantity, line_total, created_at in recent_items.iterator():
+            rollups[product_id].add_to_bucket(quantity, line_total, created_at)
+        
+        with transaction.atomic():
+            existing = cls.objects.all()
+            if product_ids is not None:
+                existing = existing.filter(product_id__in=product_ids)
+            existing.delete()
+            cls.objects.bulk_create(rollups.values(), batch_size=1000)
+        Product.bump_data_version()
+        
+        return len(rollups)
+
+
+class StockReservation(models.Model):
+    """Units of a product held for a sale or order until committed or released"""
     
-    def search(self, query):
-        """Search products by name, color, fabric, or category name"""
-        return self.filter(
-            models.Q(name__icontains=query) |
-            models.Q(color__icontains=query) |
-            models.Q(fabric__icontains=query) |
-            models.Q(category__name__icontains=query)
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('COMMITTED', 'Committed'),
+        ('RELEASED', 'Released'),
+        ('RETURNED', 'Returned'),
+    ]
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.PROTECT,
+        related_name='stock_reservations',
+        help_text="Reserved product"
+    )
+    quantity = models.PositiveIntegerField(
+        help_text="Number of units reserved"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='ACTIVE',
+        help_text="Reservation state"
+    )
+    sale = models.ForeignKey(
+        'sales.Sales',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='stock_reservations',
+        help_text="Sale holding this reservation"
+    )
+    order = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='stock_reservations',
+        help_text="Order holding this reservation"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='created_stock_reservations',
+        help_text="User who created this reservation"
+    )
+
+    class Meta:
+        db_table = 'stock_reservation'
+        verbose_name = 'Stock Reservation'
+        verbose_name_plural = 'Stock Reservations'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', 'status']),
+            models.Index(fields=['sale', 'status']),
+            models.Index(fields=['order', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x{self.quantity} ({self.status})"
+
+    @classmethod
+    def reserve(cls, product, quantity, sale=None, order=None, user=None):
+        """Hold stock for a sale or order, raising ValidationError if it is not available"""
+        return cls.reserve_many([(product, quantity)], sale=sale, order=order, user=user)[0]
+
+    @classmethod
+    def reserve_many(cls, product_quantities, sale=None, order=None, user=None):
+        """
+        Hold stock of several products for a sale or order, all or nothing.
+        
+        Each product's stock row is updated conditionally; the ledger rows and
+        reservations are then inserted in one batch each.
+        """
+        from django.db import transaction
+        
+        with transaction.atomic():
+            movements = []
+            reservations = []
+            # Reserve in product order so concurrent checkouts lock rows consistently
+            for product, quantity in sorted(product_quantities, key=lambda pair: str(pair[0].pk)):
+                if not product.reserve_stock(quantity):
+                    raise ValidationError(
+                        f"Insufficient stock. Only {product.available_quantity} available for {product.name}."
+                    )
+                movements.append(product.build_stock_movement(
+                    'RESERVATION', reserved_change=quantity, sale=sale, order=order, user=user
+                ))
+                reservations.append(cls(
+                    product=product,
+                    quantity=quantity,
+                    sale=sale,
+                    order=order,
+                    created_by=user
+                ))
+            StockMovement.objects.bulk_create(movements)
+            return cls.objects.bulk_create(reservations)
+
+    @classmethod
+    def sell_many(cls, sale_quantities, user=None):
+        """
+        Deduct stock for several confirmed sales at once, all or nothing.
+        
+        sale_quantities holds (sale, product, quantity) triples with one entry
+        per sale and product. Each product's stock row is updated once for the
+        combined quantity; every sale still gets a committed reservation and
+        the reservation and sale ledger rows it would have had when reserved
+        and committed on its own.
+        """
+        from django.db import transaction
+        
+        totals = {}
+        products = {}
+        for sale, product, quantity in sale_quantities:
+            totals[product.pk] = totals.get(product.pk, 0) + quantity
+            products[product.pk] = product
+        
+        with transaction.atomic():
+            # Update in product order so concurrent batches lock rows consistently
+            for product_id in sorted(totals, key=str):
+                product = products[product_id]
+                if not product.deduct_stock(totals[product_id]):
+                    raise ValidationError(
+                        f"Insufficient stock. Only {product.available_quantity} available for {product.name}."
+                    )
+            
+            movements = []
+            reservations = []
+            for sale, product, quantity in sale_quantities:
+                movements.append(product.build_stock_movement(
+                    'RESERVATION', reserved_change=quantity, sale=sale, user=user
+                ))
+                movements.append(product.build_stock_movement(
+                    'SALE', quantity_change=-quantity, reserved_change=-quantity, sale=sale, user=user
+                ))
+                reservations.append(cls(
+                    product=product,
+                    quantity=quantity,
+                    status='COMMITTED',
+                    sale=sale,
+                    created_by=user
+                ))
+            StockMovement.objects.bulk_create(movements)
+            return cls.objects.bulk_create(reservations)
+
+    # Status a reservation must be in before moving to each target status
+    TRANSITIONS = {
+        'COMMITTED': 'ACTIVE',
+        'RELEASED': 'ACTIVE',
+        'RETURNED': 'COMMITTED',
+    }
+
+    def _finish(self, new_status):
+        """Apply a locked reservation's stock change and return its unsaved ledger row"""
+        product = self.product
+        if new_status == 'COMMITTED':
+            applied = product.commit_reserved_stock(self.quantity)
+            movement_type, quantity_change, reserved_change = 'SALE', -self.quantity, -self.quantity
+        elif new_status == 'RELEASED':
+            applied = product.release_reserved_stock(self.quantity)
+            movement_type, quantity_change, reserved_change = 'RELEASE', 0, -self.quantity
+        else:
+            applied = product.restock_returned_stock(self.quantity)
+            movement_type, quantity_change, reserved_change = 'RETURN', self.quantity, 0
+        
+        if not applied:
+            raise ValidationError(
+                f"Stock reservation for {product.name} no longer matches product stock."
+            )
+        
+        self.status = new_status
+        self.save(update_fields=['status', 'updated_at'])
+        movement = product.build_stock_movement(
+            movement_type,
+            quantity_change=quantity_change,
+            reserved_change=reserved_change
         )
+        movement.sale_id = self.sale_id
+        movement.order_id = self.order_id
+        movement.created_by_id = self.created_by_id
+        return movement
+
+    def _transition(self, new_status):
+        from django.db import transaction
+        
+        with transaction.atomic():
+            locked = StockReservation.objects.select_for_update().select_related('product').get(pk=self.pk)
+            if locked.status != self.TRANSITIONS[new_status]:
+                raise ValidationError(f"Reservation is already {locked.status.lower()}.")
+            locked._finish(new_status).save()
+        self.status = locked.status
+
+    def commit(self):
+        """Convert this reservation into a stock reduction"""
+        self._transition('COMMITTED')
+
+    def release(self):
+        """Return this reservation's units to available stock"""
+        self._transition('RELEASED')
+
+    @classmethod
+    def _finish_all(cls, new_status, sale=None, order=None):
+        from django.db import transaction
+        
+        filters = {'status': cls.TRANSITIONS[new_status]}
+        if sale is not None:
+            filters['sale'] = sale
+        if order is not None:
+            filters['order'] = order
+        
+        with transaction.atomic():
+            # Lock in product order so concurrent batches cannot deadlock
+            reservations = list(
+                cls.objects.select_for_update().select_related('product')
+                .filter(**filters).order_by('product_id', 'pk')
+            )
+            movements = [reservation._finish(new_status) for reservation in reservations]
+            StockMovement.objects.bulk_create(movements)
+        return len(reservations)
+
+    @classmethod
+    def commit_for(cls, sale=None, order=None):
+        """Commit every active reservation held by a sale or order"""
+        return cls._finish_all('COMMITTED', sale=sale, order=order)
+
+    @classmethod
+    def release_for(cls, sale=None, order=None):
+        """Release every active reservation held by a sale or order"""
+        return cls._finish_all('RELEASED', sale=sale, order=order)
+
+    @classmethod
+    def return_for(cls, sale=None, order=None):
+        """Put the stock of every committed reservation of a sale or order back on hand"""
+        return cls._finish_all('RETURNED', sale=sale, order=order)
+
+    @classmethod
+    def reduce_for(cls, product, quantity, sale=None, order=None):
+        """
+        Give back some units of a product held by a sale or order.
+        
+        Active units are released and committed units returned to stock,
+        newest reservations first. A reservation larger than what is still to
+        give back is split so only the excess is released. Returns the number
+        of units given back, which is less than quantity when the sale or
+        order holds fewer.
+        """
+        from django.db import transaction
+        
+        filters = {'product': product, 'status__in': ['ACTIVE', 'COMMITTED']}
+        if sale is not None:
+            filters['sale'] = sale
+        if order is not None:
+            filters['order'] = order
+        
+        remaining = quantity
+        with transaction.atomic():
+            reservations = list(
+                cls.objects.select_for_update().select_related('product')
+                .filter(**filters).order_by('-created_at', 'pk')
+            )
+            movements = []
+            for reservation in reservations:
+                if remaining <= 0:
+                    break
+                given_back = min(reservation.quantity, remaining)
+                if given_back < reservation.quantity:
+                    reservation.quantity -= given_back
+                    reservation.save(update_fields=['quantity', 'updated_at'])
+                    reservation = cls.objects.create(
+                        product=reservation.product,
+                        quantity=given_back,
+                        status=reservation.status,
+                        sale_id=reservation.sale_id,
+                        order_id=reservation.order_id,
+                        created_by_id=reservation.created_by_id
+                    )
+                new_status = 'RELEASED' if reservation.status == 'ACTIVE' else 'RETURNED'
+                movements.append(reservation._finish(new_status))
+                remaining -= given_back
+            StockMovement.objects.bulk_create(movements)
+        return quantity - remaining
+
+
+class StockMovement(models.Model):
+    """Append-only ledger row recording one change to a product's stock"""
     
-    def price_range(self, min_price=None, max_price=None):
-        """Filter products by price range"""
-        queryset = self
-        if min_price is not None:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price is not None:
-            queryset = queryset.filter(price__lte=max_price)
-        return queryset
+    MOVEMENT_TYPE_CHOICES = [
+        ('OPENING', 'Opening Balance'),
+        ('SALE', 'Sale'),
+        ('RETURN', 'Return'),
+        ('ADJUSTMENT', 'Adjustment'),
+        ('RESERVATION', 'Reservation'),
+        ('RELEASE', 'Reservation Release'),
+    ]
     
-    def stock_level(self, level):
-        """Filter by stock level"""
-        if level == 'OUT_OF_STOCK':
-            return self.filter(quantity=0)
-        elif level == 'LOW_STOCK':
-            return self.filter(quantity__gt=0, quantity__lte=5)
-        elif level == 'MEDIUM_STOCK':
-            return self.filter(quantity__gt=5, quantity__lte=20)
-        elif level == 'HIGH_STOCK':
-            return self.filter(quantity__gt=20)
-        return self
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_movements',
+        help_text="Product whose stock changed"
+    )
+    movement_type = models.CharField(
+        max_length=20,
+        choices=MOVEMENT_TYPE_CHOICES,
+        help_text="Reason for the stock change"
+    )
+    quantity_change = models.IntegerField(
+        default=0,
+        help_text="Signed change to on-hand quantity"
+    )
+    reserved_change = models.IntegerField(
+        default=0,
+        help_text="Signed change to reserved quantity"
+    )
+    unit_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Product price when the movement was recorded"
+    )
+    sale = models.ForeignKey(
+        'sales.Sales',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_movements',
+        help_text="Sale that caused this movement"
+    )
+    order = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_movements',
+        help_text="Order that caused this movement"
+    )
+    note = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text="Additional context for the movement"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='created_stock_movements',
+        help_text="User who caused this movement"
+    )
+
+    class Meta:
+        db_table = 'stock_movement'
+        verbose_name = 'Stock Movement'
+        verbose_name_plural = 'Stock Movements'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', 'created_at']),
+            models.Index(fields=['movement_type', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.movement_type} {self.quantity_change:+d}"
+
+
+class StockSnapshot(models.Model):
+    """Per-product stock position at a point in time, so as-of queries skip older movements"""
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots',
+        help_text="Product this snapshot belongs to"
+    )
+    taken_at = models.DateTimeField(
+        help_text="Point in time the snapshot covers (movements up to and including it)"
+    )
+    quantity = models.IntegerField(
+        help_text="On-hand quantity at taken_at"
+    )
+    reserved_quantity = models.IntegerField(
+        default=0,
+        help_text="Reserved quantity at taken_at"
+    )
+    unit_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Product price at taken_at"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        db_table = 'stock_snapshot'
+        verbose_name = 'Stock Snapshot'
+        verbose_name_plural = 'Stock Snapshots'
+        ordering = ['-taken_at']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'taken_at'], name='unique_product_stock_snapshot'),
+        ]
 
-# Add the custom manager to the Product model
-Product.add_to_class('objects', models.Manager.from_queryset(ProductQuerySet)())
-    
\ No newline at end of file
+    def __str__(self):
+        return f"{self.product_id} @ {self.taken_at:%Y-%m-%d %H:%M}: {self.quantity}"
+
+    @classmethod
+    def take(cls, as_of=None, product_ids=None):
+        """
+        Snapshot stock positions as of a point in time from the ledger.
+        
+        Products that already have a snapshot at as_of are skipped. Returns the
+        number of snapshots written.
+        """
+        as_of = as_of or timezone.now()
+        products = Product.objects.filter(created_at__lte=as_of).exclude(stock_snapshots__taken_at=as_of)
+        if product_ids:
+            products = products.filter(id__in=product_ids)
+        
+        snapshots = [
+            cls(
+                product_id=product['id'],
+                taken_at=as_of,
+                quantity=product['stock_as_of'],
+                reserved_quantity=product['reserved_as_of'],
+                unit_price=product['price_as_of']
+            )
+            for product in products.with_stock_as_of(as_of).values(
+                'id', 'stock_as_of', 'reserved_as_of', 'price_as_of'
+            )
+        ]
+        created = cls.objects.bulk_create(snapshots, batch_size=500, ignore_conflicts=True)
+        return len(created)
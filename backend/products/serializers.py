@@ -281,6 +281,7 @@ class ProductListSerializer(serializers.ModelSerializer):
     stock_status = serializers.CharField(read_only=True)
     stock_status_display = serializers.CharField(read_only=True)
     total_value = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
+    available_quantity = serializers.IntegerField(read_only=True)
     total_sold = serializers.SerializerMethodField()
     
     class Meta:
@@ -294,6 +295,7 @@ class ProductListSerializer(serializers.ModelSerializer):
             'fabric',
             'pieces',  # Added
             'quantity',
+            'available_quantity',
             'category_name',
             'stock_status',
             'stock_status_display',
@@ -305,7 +307,9 @@ class ProductListSerializer(serializers.ModelSerializer):
         )
 
     def get_total_sold(self, obj):
-        """Get total quantity sold"""
+        """Get total quantity sold, preferring the with_sales_totals() annotation"""
+        if hasattr(obj, 'sales_quantity'):
+            return obj.sales_quantity
         return obj.get_total_sales_quantity()
 
 
@@ -317,6 +321,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     stock_status = serializers.CharField(read_only=True)
     stock_status_display = serializers.CharField(read_only=True)
     total_value = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
+    available_quantity = serializers.IntegerField(read_only=True)
     total_sales_quantity = serializers.SerializerMethodField()
     total_sales_revenue = serializers.SerializerMethodField()
     sales_performance = serializers.SerializerMethodField()
@@ -332,6 +337,8 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'fabric',
             'pieces',
             'quantity',
+            'reserved_quantity',
+            'available_quantity',
             'category',
             'stock_status',
             'stock_status_display',
@@ -1,8 +1,11 @@
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
-from .models import Product
+from .models import Product, ProductSalesRollup
+from categories.models import Category
+from sales.models import SaleItem
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +20,8 @@ def product_pre_save(sender, instance, **kwargs):
     if instance.pk:  # Existing product
         try:
             old_instance = Product.objects.get(pk=instance.pk)
+            # Store old category so both categories' counters are refreshed
+            instance._old_category_id = old_instance.category_id
             if old_instance.quantity != instance.quantity:
                 # Store old quantity for post_save signal
                 instance._old_quantity = old_instance.quantity
@@ -30,8 +35,8 @@ def product_post_save(sender, instance, created, **kwargs):
     Handle product post-save operations
     """
     # Clear related caches
+    Product.bump_data_version()
     cache_keys_to_clear = [
-        'product_statistics',
         f'products_by_category_{instance.category_id}',
         'low_stock_products',
         'out_of_stock_products',
@@ -40,8 +45,16 @@ def product_post_save(sender, instance, created, **kwargs):
     for key in cache_keys_to_clear:
         cache.delete(key)
     
+    # Refresh category counters
+    old_category_id = instance.__dict__.pop('_old_category_id', instance.category_id)
+    Category.refresh_counters({instance.category_id, old_category_id})
+    
     # Log product creation
     if created:
+        if instance.quantity:
+            instance.build_stock_movement(
+                'OPENING', instance.quantity, user=instance.created_by
+            ).save()
         logger.info(
             f"New product created: {instance.name} (ID: {instance.id}) "
             f"by user {instance.created_by}"
@@ -53,6 +66,10 @@ def product_post_save(sender, instance, created, **kwargs):
         new_qty = instance.quantity
         difference = new_qty - old_qty
         
+        instance.build_stock_movement(
+            'ADJUSTMENT', difference, user=getattr(instance, '_stock_changed_by', None)
+        ).save()
+        
         logger.info(
             f"Product quantity updated: {instance.name} (ID: {instance.id}) "
             f"from {old_qty} to {new_qty} (difference: {difference:+d})"
@@ -72,8 +89,10 @@ def product_post_save(sender, instance, created, **kwargs):
                 f"is now out of stock"
             )
         
-        # Clean up the temporary attribute
+        # Clean up the temporary attributes
         delattr(instance, '_old_quantity')
+        if hasattr(instance, '_stock_changed_by'):
+            delattr(instance, '_stock_changed_by')
 
 
 @receiver(post_delete, sender=Product)
@@ -82,8 +101,8 @@ def product_post_delete(sender, instance, **kwargs):
     Handle product deletion
     """
     # Clear related caches
+    Product.bump_data_version()
     cache_keys_to_clear = [
-        'product_statistics',
         f'products_by_category_{instance.category_id}',
         'low_stock_products',
         'out_of_stock_products',
@@ -92,12 +111,68 @@ def product_post_delete(sender, instance, **kwargs):
     for key in cache_keys_to_clear:
         cache.delete(key)
     
+    Category.refresh_counters([instance.category_id])
+    
     # Log product deletion
     logger.info(
         f"Product deleted: {instance.name} (ID: {instance.id})"
     )
 
 
+@receiver(pre_save, sender=SaleItem)
+def sale_item_pre_save(sender, instance, **kwargs):
+    """
+    Remember the previous contribution of a sale item to its product's sales rollup
+    """
+    instance._old_rollup_contribution = None
+    if not instance._state.adding:
+        old_values = SaleItem.objects.filter(pk=instance.pk).values(
+            'product_id', 'quantity', 'line_total', 'is_active', 'created_at'
+        ).first()
+        if old_values and old_values['is_active']:
+            instance._old_rollup_contribution = old_values
+
+
+@receiver(post_save, sender=SaleItem)
+def sale_item_post_save(sender, instance, created, **kwargs):
+    """
+    Keep the product sales rollup in step with sale item create/update/soft-delete
+    """
+    old = getattr(instance, '_old_rollup_contribution', None)
+    
+    with transaction.atomic():
+        if old and old['product_id'] == instance.product_id:
+            # Same product: apply the net change in a single rollup update
+            quantity = (instance.quantity if instance.is_active else 0) - old['quantity']
+            revenue = (instance.line_total if instance.is_active else 0) - old['line_total']
+            if quantity or revenue:
+                ProductSalesRollup.record_sale_item_change(
+                    instance.product_id, quantity, revenue, old['created_at']
+                )
+        else:
+            if old:
+                ProductSalesRollup.record_sale_item_change(
+                    old['product_id'], -old['quantity'], -old['line_total'], old['created_at']
+                )
+            if instance.is_active:
+                ProductSalesRollup.record_sale_item_change(
+                    instance.product_id, instance.quantity, instance.line_total, instance.created_at
+                )
+    
+    instance._old_rollup_contribution = None
+
+
+@receiver(post_delete, sender=SaleItem)
+def sale_item_post_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted sale item's contribution from the product sales rollup
+    """
+    if instance.is_active:
+        ProductSalesRollup.record_sale_item_change(
+            instance.product_id, -instance.quantity, -instance.line_total, instance.created_at
+        )
+
+
 # Optional: Custom signal for bulk operations
 from django.dispatch import Signal
 
@@ -113,9 +188,10 @@ def handle_bulk_quantity_update(sender, products, **kwargs):
     Handle bulk quantity updates
     """
     # Clear caches
-    cache.delete('product_statistics')
+    Product.bump_data_version()
     cache.delete('low_stock_products')
     cache.delete('out_of_stock_products')
+    Category.refresh_counters({product.category_id for product in products})
     
     # Log bulk update
     product_count = len(products)
@@ -140,7 +216,8 @@ def handle_bulk_product_creation(sender, products, **kwargs):
     Handle bulk product creation
     """
     # Clear caches
-    cache.delete('product_statistics')
+    Product.bump_data_version()
+    Category.refresh_counters({product.category_id for product in products})
     
     # Log bulk creation
     product_count = len(products)
@@ -153,8 +230,8 @@ def handle_bulk_product_deletion(sender, product_ids, **kwargs):
     Handle bulk product deletion
     """
     # Clear all product-related caches
+    Product.bump_data_version()
     cache_keys_to_clear = [
-        'product_statistics',
         'low_stock_products',
         'out_of_stock_products',
     ]
@@ -162,6 +239,9 @@ def handle_bulk_product_deletion(sender, product_ids, **kwargs):
     for key in cache_keys_to_clear:
         cache.delete(key)
     
+    # The deleted rows are gone, so recount every category
+    Category.refresh_counters()
+    
     # Log bulk deletion
     product_count = len(product_ids)
     logger.info(f"Bulk product deletion completed: {product_count} products deleted")
@@ -1,3 +1,797 @@
-from django.test import TestCase
+import importlib
+import threading
+import time
+from unittest import skipUnless
+from django.test import TestCase, TransactionTestCase
+from django.core.exceptions import ValidationError
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection, transaction, OperationalError
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from .factories import ProductFactory
+from .models import Product, ProductSalesRollup, StockReservation, StockMovement, StockSnapshot
+from categories.factories import CategoryFactory
+from categories.models import Category
+from customers.factories import CustomerFactory
+from posapi.factories import UserFactory
+from sales.factories import SalesFactory, SaleItemFactory
+from sales.models import Sales
 
-# Create your tests here.
+
+class ProductListQueryTest(TestCase):
+    """Test cases for product list endpoints query behaviour"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.category = CategoryFactory(created_by=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        self.sale = SalesFactory(customer=self.customer)
+
+        self.products = []
+        for index in range(12):
+            product = ProductFactory(name=f'Product {index:02d}', quantity=3, category=self.category)
+            SaleItemFactory(sale=self.sale, product=product, quantity=index + 1)
+            self.products.append(product)
+        # Create the shared version counters, so the first request is not the one paying for it
+        Product.get_data_version()
+        Category.get_list_version()
+
+    def count_queries(self, url, params):
+        """Return the number of queries and response for a GET request"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_total_sold_uses_annotation(self):
+        """Test total_sold matches the per-product sales quantity"""
+        _, response = self.count_queries(
+            reverse('products:list_products'), {'page_size': 20}
+        )
+        products = response.data['data']['products']
+        self.assertEqual(len(products), 12)
+        for item in products:
+            product = Product.objects.get(id=item['id'])
+            self.assertEqual(item['total_sold'], product.get_total_sales_quantity())
+
+    def test_constant_query_count(self):
+        """Test list endpoints issue the same number of queries regardless of page size"""
+        endpoints = [
+            (reverse('products:list_products'), {}),
+            (reverse('products:search_products'), {'q': 'Product'}),
+            (reverse('products:products_by_category', args=[self.category.id]), {}),
+            (reverse('products:low_stock_products'), {}),
+        ]
+
+        for url, params in endpoints:
+            small_count, small_response = self.count_queries(url, {**params, 'page_size': 2})
+            large_count, large_response = self.count_queries(url, {**params, 'page_size': 12})
+
+            self.assertEqual(len(small_response.data['data']['products']), 2)
+            self.assertEqual(len(large_response.data['data']['products']), 12)
+            self.assertEqual(small_count, large_count, url)
+
+
+class ProductSalesRollupTest(TestCase):
+    """Test cases for the materialized product sales rollup"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.category = CategoryFactory(created_by=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        self.sale = SalesFactory(customer=self.customer)
+        self.product = ProductFactory(quantity=50, category=self.category)
+
+    def create_sale_item(self, quantity):
+        """Create a sale item for the test product"""
+        return SaleItemFactory(sale=self.sale, product=self.product, quantity=quantity)
+
+    def get_rollup(self):
+        """Fetch the current rollup row"""
+        return ProductSalesRollup.objects.get(product=self.product)
+
+    def test_rollup_tracks_sale_item_changes(self):
+        """Test rollup follows create, update, soft delete and delete"""
+        first_item = self.create_sale_item(2)
+        second_item = self.create_sale_item(3)
+
+        rollup = self.get_rollup()
+        self.assertEqual(rollup.quantity_sold, 5)
+        self.assertEqual(rollup.revenue, Decimal('500.00'))
+        self.assertEqual(rollup.get_recent_totals(30), (5, Decimal('500.00')))
+        self.assertEqual(rollup.first_sale_at, first_item.created_at)
+        self.assertEqual(rollup.last_sale_at, second_item.created_at)
+
+        second_item.quantity = 4
+        second_item.save()
+        self.assertEqual(self.get_rollup().quantity_sold, 6)
+
+        first_item.is_active = False
+        first_item.save()
+        rollup = self.get_rollup()
+        self.assertEqual(rollup.quantity_sold, 4)
+        self.assertEqual(rollup.revenue, Decimal('400.00'))
+        self.assertEqual(rollup.first_sale_at, second_item.created_at)
+
+        second_item.delete()
+        rollup = self.get_rollup()
+        self.assertEqual(rollup.quantity_sold, 0)
+        self.assertIsNone(rollup.first_sale_at)
+        self.assertEqual(rollup.daily_buckets, {})
+
+    def test_rebuild_matches_incremental_rollup(self):
+        """Test rebuilding from scratch gives the same totals"""
+        self.create_sale_item(2)
+        self.create_sale_item(7)
+        incremental = self.get_rollup()
+
+        ProductSalesRollup.objects.all().delete()
+        call_command('rebuild_product_sales_rollups', stdout=StringIO())
+
+        rebuilt = self.get_rollup()
+        self.assertEqual(rebuilt.quantity_sold, incremental.quantity_sold)
+        self.assertEqual(rebuilt.revenue, incremental.revenue)
+        self.assertEqual(rebuilt.first_sale_at, incremental.first_sale_at)
+        self.assertEqual(rebuilt.last_sale_at, incremental.last_sale_at)
+        self.assertEqual(rebuilt.daily_buckets, incremental.daily_buckets)
+
+    def test_sales_statistics_reads_rollup(self):
+        """Test product sales figures come from a single rollup read"""
+        self.create_sale_item(4)
+        product = Product.objects.get(id=self.product.id)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(product.total_sales_quantity, 4)
+            self.assertEqual(product.total_sales_revenue, Decimal('400.00'))
+            self.assertEqual(product.average_sale_price, Decimal('100.00'))
+            self.assertEqual(product.sales_velocity, 4.0)
+            self.assertEqual(product.stock_turnover_ratio, 0.08)
+
+        stats = product.get_sales_statistics()
+        self.assertEqual(stats['recent_activity']['quantity_last_30_days'], 4)
+
+
+class ProductStatisticsTest(TestCase):
+    """Test cases for inventory statistics"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = UserFactory()
+        # Run the version bumps now: one still pending would absorb the bumps made by the test
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = CategoryFactory(created_by=self.user)
+            self.products = [ProductFactory(quantity=quantity, category=self.category) for quantity in [0, 3, 10, 25]]
+
+    def test_statistics_single_pass(self):
+        """Test statistics are computed with one aggregate plus the category breakdown"""
+        with self.assertNumQueries(2):
+            stats = Product.get_statistics()
+
+        self.assertEqual(stats['total_products'], 4)
+        self.assertEqual(stats['total_inventory_value'], 3800.0)
+        self.assertEqual(stats['low_stock_count'], 1)
+        self.assertEqual(stats['out_of_stock_count'], 1)
+        self.assertEqual(stats['stock_status_summary'], {
+            'in_stock': 1,
+            'medium_stock': 1,
+            'low_stock': 1,
+            'out_of_stock': 1,
+        })
+        self.assertEqual(stats['category_breakdown'][0]['count'], 4)
+
+    def test_cached_statistics_invalidated_on_write(self):
+        """Test cached statistics are reused until a product changes"""
+        Product.get_statistics(use_cache=True)
+        # Only the shared version counter is read
+        with self.assertNumQueries(1):
+            stats = Product.get_statistics(use_cache=True)
+        self.assertEqual(stats['total_products'], 4)
+
+        product = Product.objects.get(pk=self.products[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.update_quantity(5)
+
+        stats = Product.get_statistics(use_cache=True)
+        self.assertEqual(stats['out_of_stock_count'], 0)
+        self.assertEqual(stats['low_stock_count'], 2)
+
+
+class ProductSearchTest(TestCase):
+    """Test cases for product search"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.category = CategoryFactory(name='Bridal', created_by=self.user)
+        for name, color, fabric in [
+            ('Velvet Shawl', 'Maroon', 'Velvet'),
+            ('Silk Saree', 'Red', 'Silk'),
+            ('Chiffon Suit', 'Silver', 'Chiffon'),
+            ('Lawn Suit', 'Blue', 'Lawn'),
+        ]:
+            ProductFactory(name=name, color=color, fabric=fabric, category=self.category)
+
+    def test_search_orders_by_relevance(self):
+        """Test name matches rank ahead of color/fabric matches"""
+        response = self.client.get(reverse('products:search_products'), {'q': 'sil'})
+        self.assertEqual(response.status_code, 200)
+        names = [item['name'] for item in response.data['data']['products']]
+        self.assertEqual(names, ['Silk Saree', 'Chiffon Suit'])
+
+    def test_list_search_respects_explicit_sort(self):
+        """Test list_products?search= ranks by relevance unless sort_by is given"""
+        url = reverse('products:list_products')
+
+        response = self.client.get(url, {'search': 'sil'})
+        names = [item['name'] for item in response.data['data']['products']]
+        self.assertEqual(names, ['Silk Saree', 'Chiffon Suit'])
+
+        response = self.client.get(url, {'search': 'suit', 'sort_by': 'name'})
+        names = [item['name'] for item in response.data['data']['products']]
+        self.assertEqual(names, ['Chiffon Suit', 'Lawn Suit'])
+
+    def test_search_matches_category_name(self):
+        """Test products are found through their category name"""
+        other = CategoryFactory(name='Casual', created_by=self.user)
+        Product.objects.filter(name='Lawn Suit').update(category=other)
+
+        names = sorted(Product.objects.search('casu').values_list('name', flat=True))
+
+        self.assertEqual(names, ['Lawn Suit'])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are checked on PostgreSQL only')
+class ProductSearchPlanTest(TestCase):
+    """Test product search can be served by the trigram indexes"""
+
+    def setUp(self):
+        """Set up test data"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                self.skipTest('pg_trgm is not available')
+        # The test database is built without migrations, so create the search indexes here
+        migration = importlib.import_module('products.migrations.0003_product_search_trigram_indexes')
+        with connection.schema_editor() as schema_editor:
+            migration.create_trigram_indexes(None, schema_editor)
+
+        ProductFactory(name='Silk Saree', fabric='Silk', category=CategoryFactory(name='Bridal'))
+
+    def test_search_uses_trigram_indexes(self):
+        """Test the name/color/fabric filters are index scans, not a scan of every product"""
+        with connection.cursor() as cursor:
+            # The table is tiny; make the planner show whether an index path exists at all
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Product.objects.search('bridal').explain()
+
+        self.assertIn('product_name_trgm_idx', plan)
+        self.assertIn('product_color_trgm_idx', plan)
+        self.assertIn('product_fabric_trgm_idx', plan)
+
+
+class ProductCursorPaginationTest(TestCase):
+    """Test cases for keyset pagination on the product list"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.category = CategoryFactory(created_by=self.user)
+        ProductFactory.create_batch(7, category=self.category)
+
+    def test_cursor_walks_all_pages_once(self):
+        """Test following next_cursor returns every product exactly once, newest first"""
+        url = reverse('products:list_products')
+        seen = []
+        params = {'cursor': '', 'page_size': 3}
+
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            pagination = response.data['data']['pagination']
+            self.assertNotIn('total_count', pagination)
+            seen.extend(item['id'] for item in response.data['data']['products'])
+            if not pagination['has_next']:
+                break
+            params['cursor'] = pagination['next_cursor']
+
+        expected = [
+            str(pk) for pk in Product.objects.order_by('-created_at', '-pk').values_list('pk', flat=True)
+        ]
+        self.assertEqual(seen, expected)
+
+    def test_cursor_with_count_and_invalid_cursor(self):
+        """Test with_count=true adds the exact count and bad cursors are rejected"""
+        url = reverse('products:list_products')
+
+        response = self.client.get(url, {'cursor': '', 'with_count': 'true'})
+        self.assertEqual(response.data['data']['pagination']['total_count'], 7)
+
+        response = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_rejects_search_and_other_sorts(self):
+        """Test a cursor cannot silently drop the relevance order or a requested sort"""
+        url = reverse('products:list_products')
+
+        for params in [{'search': 'product'}, {'sort_by': 'price'}, {'sort_by': 'created_at'}]:
+            response = self.client.get(url, {'cursor': '', **params})
+            self.assertEqual(response.status_code, 400, params)
+
+        response = self.client.get(url, {'cursor': '', 'sort_by': 'created_at', 'sort_order': 'desc'})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url, {'cursor': ''})
+        filters = response.data['data']['filters_applied']
+        self.assertEqual((filters['sort_by'], filters['sort_order']), ('created_at', 'desc'))
+
+
+class BulkQuantityUpdateTest(TestCase):
+    """Test cases for bulk quantity updates"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.category = CategoryFactory(created_by=self.user)
+        self.products = ProductFactory.create_batch(20, category=self.category)
+
+    def bulk_update(self, products, quantity):
+        """Post a bulk update and return (query count, response)"""
+        updates = [
+            {'product_id': str(product.id), 'quantity': str(quantity + index)}
+            for index, product in enumerate(products)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse('products:bulk_update_quantities'),
+                {'updates': updates},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_bulk_update_results(self):
+        """Test quantities are written and the per-product payload is preserved"""
+        _, response = self.bulk_update(self.products[:3], 0)
+
+        results = response.data['data']['updated_products']
+        self.assertEqual([result['product_id'] for result in results],
+                         [str(product.id) for product in self.products[:3]])
+        self.assertEqual(results[0]['old_quantity'], 10)
+        self.assertEqual(results[0]['new_quantity'], 0)
+        self.assertEqual(results[0]['difference'], -10)
+        self.assertEqual(results[0]['stock_status'], 'OUT_OF_STOCK')
+        self.assertEqual(
+            list(Product.objects.filter(id__in=[p.id for p in self.products[:3]])
+                 .order_by('quantity').values_list('quantity', flat=True)),
+            [0, 1, 2]
+        )
+
+    def test_bulk_update_query_count_is_constant(self):
+        """Test the number of queries does not grow with the number of products"""
+        small_count, _ = self.bulk_update(self.products[:2], 30)
+        large_count, _ = self.bulk_update(self.products, 50)
+        self.assertEqual(small_count, large_count)
+
+
+class StockReservationTest(TestCase):
+    """Test cases for atomic stock reservation"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.category = CategoryFactory(created_by=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        self.product = ProductFactory(quantity=5, category=self.category)
+
+    def test_reserve_commit_release(self):
+        """Test reservations hold, deduct and return stock"""
+        first = StockReservation.reserve(self.product, 3)
+        self.assertEqual(self.product.reserved_quantity, 3)
+        self.assertEqual(self.product.available_quantity, 2)
+
+        with self.assertRaises(ValidationError):
+            StockReservation.reserve(self.product, 3)
+
+        second = StockReservation.reserve(self.product, 2)
+        first.commit()
+        second.release()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 2)
+        self.assertEqual(self.product.reserved_quantity, 0)
+
+        with self.assertRaises(ValidationError):
+            first.release()
+
+    def test_reduce_stock_for_sale_never_oversells(self):
+        """Test direct sale reduction respects reserved units"""
+        StockReservation.reserve(self.product, 4)
+        with self.assertRaises(ValidationError):
+            self.product.reduce_stock_for_sale(2)
+        self.product.reduce_stock_for_sale(1)
+        self.assertEqual(self.product.quantity, 4)
+
+    def _create_draft_sale(self, quantity):
+        sale = SalesFactory(customer=self.customer)
+        item = SaleItemFactory(sale=sale, product=self.product, quantity=quantity)
+        sale.reserve_stock_for_items([item], user=self.user)
+        return sale
+
+    def test_sale_lifecycle_moves_stock(self):
+        """Test draft sales reserve stock, confirmation deducts it and cancellation returns it"""
+        sale = self._create_draft_sale(2)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.quantity, self.product.reserved_quantity), (5, 2))
+
+        response = self.client.post(
+            reverse('sales:update_status', args=[sale.id]), {'status': 'CONFIRMED'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.quantity, self.product.reserved_quantity), (3, 0))
+
+        with self.assertRaises(ValidationError):
+            self._create_draft_sale(4)
+
+        sale = self._create_draft_sale(3)
+        response = self.client.post(
+            reverse('sales:update_status', args=[sale.id]), {'status': 'CANCELLED'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.quantity, self.product.reserved_quantity), (3, 0))
+
+
+    def _stock(self):
+        self.product.refresh_from_db()
+        return self.product.quantity, self.product.reserved_quantity
+
+    def _set_status(self, sale, new_status):
+        response = self.client.post(
+            reverse('sales:update_status', args=[sale.id]), {'status': new_status}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_cancel_after_confirm_returns_stock(self):
+        """Test cancelling a confirmed sale puts its committed units back on hand"""
+        sale = self._create_draft_sale(3)
+        self._set_status(sale, 'CONFIRMED')
+        self.assertEqual(self._stock(), (2, 0))
+
+        self._set_status(sale, 'CANCELLED')
+        self.assertEqual(self._stock(), (5, 0))
+        self.assertEqual(set(sale.stock_reservations.values_list('status', flat=True)), {'RETURNED'})
+
+    def test_update_sale_status_commits_stock(self):
+        """Test confirming through the sale update endpoint deducts the reserved units"""
+        sale = self._create_draft_sale(3)
+
+        response = self.client.patch(
+            reverse('sales:update_sale', args=[sale.id]), {'status': 'CONFIRMED'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self._stock(), (2, 0))
+
+    def test_deleting_sale_gives_back_stock(self):
+        """Test soft-deleting draft and confirmed sales releases and returns their units"""
+        draft = self._create_draft_sale(2)
+        confirmed = self._create_draft_sale(1)
+        self._set_status(confirmed, 'CONFIRMED')
+        self.assertEqual(self._stock(), (4, 2))
+
+        for sale in (draft, confirmed):
+            response = self.client.delete(reverse('sales:delete_sale', args=[sale.id]))
+            self.assertEqual(response.status_code, 200, response.data)
+
+        self.assertEqual(self._stock(), (5, 0))
+
+    def test_item_quantity_changes_move_reservations(self):
+        """Test item updates hold or give back only the change, and deletion gives back the rest"""
+        sale = self._create_draft_sale(2)
+        item = sale.sale_items.get()
+
+        for url_name in ('sales:update_sale_item', 'sale_items:update_sale_item'):
+            response = self.client.patch(reverse(url_name, args=[item.id]), {'quantity': 4}, format='json')
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(self._stock(), (5, 4))
+
+            response = self.client.patch(reverse(url_name, args=[item.id]), {'quantity': 1}, format='json')
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(self._stock(), (5, 1))
+
+        response = self.client.delete(reverse('sales:delete_sale_item', args=[item.id]))
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self._stock(), (5, 0))
+
+    def test_item_changes_on_confirmed_sale_adjust_stock(self):
+        """Test item updates on a confirmed sale deduct or return the difference on hand"""
+        sale = self._create_draft_sale(2)
+        self._set_status(sale, 'CONFIRMED')
+        item = sale.sale_items.get()
+
+        response = self.client.patch(
+            reverse('sale_items:update_sale_item', args=[item.id]), {'quantity': 3}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self._stock(), (2, 0))
+
+        response = self.client.delete(reverse('sale_items:delete_sale_item', args=[item.id]))
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self._stock(), (5, 0))
+
+    def test_admin_actions_move_stock(self):
+        """Test admin status and activation actions go through the reservation service"""
+        from django.contrib import admin
+        from django.test import RequestFactory
+        from unittest.mock import patch
+        from sales.admin import SalesAdmin
+
+        sale_admin = SalesAdmin(Sales, admin.site)
+        request = RequestFactory().post('/')
+        request.user = self.user
+        sale = self._create_draft_sale(3)
+        sales = Sales.objects.filter(pk=sale.pk)
+
+        with patch.object(SalesAdmin, 'message_user'):
+            sale_admin.confirm_sales(request, sales)
+            self.assertEqual(self._stock(), (2, 0))
+
+            sale_admin.mark_as_inactive(request, sales)
+            self.assertEqual(self._stock(), (5, 0))
+
+            sale_admin.mark_as_active(request, sales)
+            self.assertEqual(self._stock(), (2, 0))
+
+            sale_admin.cancel_sales(request, sales)
+            self.assertEqual(self._stock(), (5, 0))
+
+
+class StockConcurrencyTest(TransactionTestCase):
+    """Test stock reduction under concurrent checkouts"""
+
+    def test_concurrent_sales_do_not_oversell(self):
+        """Test many threads selling the same SKU never push stock below zero"""
+        user = UserFactory()
+        category = CategoryFactory(created_by=user)
+        product = ProductFactory(name='Last Units', category=category)
+
+        outcomes = []
+        lock = threading.Lock()
+
+        def sell_one():
+            try:
+                for _ in range(500):
+                    try:
+                        with transaction.atomic():
+                            Product.objects.get(pk=product.pk).reduce_stock_for_sale(1)
+                        result = 'sold'
+                        break
+                    except ValidationError:
+                        result = 'rejected'
+                        break
+                    except OperationalError:
+                        # SQLite reports write contention instead of blocking
+                        time.sleep(0.01)
+                else:
+                    result = 'error'
+                with lock:
+                    outcomes.append(result)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=sell_one) for _ in range(25)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(outcomes.count('sold'), 10)
+        self.assertEqual(outcomes.count('rejected'), 15)
+        self.assertEqual(product.quantity, 0)
+
+
+class StockLedgerTest(TestCase):
+    """Test cases for the stock movement ledger and snapshots"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.category = CategoryFactory(created_by=self.user)
+        self.product = ProductFactory(category=self.category)
+
+    def _backdate_history(self, when):
+        Product.objects.filter(pk=self.product.pk).update(created_at=when)
+        StockMovement.objects.filter(product=self.product).update(created_at=when)
+
+    def test_stock_changes_are_recorded(self):
+        """Test every stock-changing path writes a ledger row"""
+        self.product.update_quantity(12, user=self.user)
+        self.product.reduce_stock_for_sale(2)
+        Product.bulk_update_quantities([{'product_id': str(self.product.id), 'quantity': 15}])
+        reservation = StockReservation.reserve(self.product, 3)
+        reservation.commit()
+
+        movements = list(
+            self.product.stock_movements.order_by('created_at').values_list(
+                'movement_type', 'quantity_change', 'reserved_change'
+            )
+        )
+        self.assertEqual(movements, [
+            ('OPENING', 10, 0),
+            ('ADJUSTMENT', 2, 0),
+            ('SALE', -2, 0),
+            ('ADJUSTMENT', 5, 0),
+            ('RESERVATION', 0, 3),
+            ('SALE', -3, -3),
+        ])
+
+        position = self.product.get_stock_as_of(timezone.now())
+        self.product.refresh_from_db()
+        self.assertEqual(position['quantity'], self.product.quantity)
+        self.assertEqual(position['reserved_quantity'], self.product.reserved_quantity)
+
+    def test_stock_as_of_uses_latest_snapshot(self):
+        """Test as-of queries start from the snapshot and replay later movements only"""
+        month_start = timezone.now() - timedelta(days=30)
+        self._backdate_history(month_start - timedelta(days=1))
+        self.assertEqual(StockSnapshot.take(as_of=month_start), 1)
+        # Taking the same snapshot again is a no-op
+        self.assertEqual(StockSnapshot.take(as_of=month_start), 0)
+
+        # Movements before the snapshot are no longer read
+        StockMovement.objects.filter(product=self.product).delete()
+        self.product.reduce_stock_for_sale(4)
+
+        self.assertEqual(self.product.get_stock_as_of(month_start)['quantity'], 10)
+        self.assertEqual(self.product.get_stock_as_of(timezone.now())['quantity'], 6)
+        annotated = Product.objects.with_stock_as_of(timezone.now()).get(pk=self.product.pk)
+        self.assertEqual(annotated.stock_as_of, 6)
+
+    def test_returned_sale_restocks(self):
+        """Test returning a delivered sale puts its committed units back"""
+        customer = CustomerFactory(created_by=self.user)
+        sale = SalesFactory(customer=customer)
+        item = SaleItemFactory(sale=sale, product=self.product, quantity=4)
+        sale.reserve_stock_for_items([item])
+        sale.status = 'DELIVERED'
+        sale.sync_stock_reservations()
+        sale.status = 'RETURNED'
+        sale.sync_stock_reservations()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 10)
+        self.assertTrue(
+            self.product.stock_movements.filter(movement_type='RETURN', quantity_change=4, sale=sale).exists()
+        )
+
+    def test_inventory_valuation_endpoint(self):
+        """Test month-end valuation uses the stock and price at that date"""
+        month_end = timezone.now() - timedelta(days=2)
+        self._backdate_history(month_end - timedelta(days=1))
+        self.product.update_quantity(3)
+
+        response = self.client.get(
+            reverse('products:inventory_valuation'),
+            {'as_of': timezone.localdate(month_end).isoformat()}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['total_quantity'], 10)
+        self.assertEqual(response.data['data']['total_value'], 1000.0)
+
+        response = self.client.get(reverse('products:inventory_valuation'))
+        self.assertEqual(response.data['data']['total_quantity'], 3)
+
+        response = self.client.get(reverse('products:inventory_valuation'), {'as_of': 'not-a-date'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductConditionalGetTest(TestCase):
+    """Test cases for ETag revalidation of product reads"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # Run the version bumps now: one still pending would absorb the bumps made by the test
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = CategoryFactory(created_by=self.user)
+            self.product = ProductFactory(category=self.category)
+
+    def test_list_revalidation(self):
+        """Test unchanged lists return 304 and stock changes invalidate the ETag"""
+        url = reverse('products:list_products')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # The ETag comes from maintained versions, not from scanning the product tables
+        self.assertTrue(all('"data_versions"' in query['sql'] for query in queries.captured_queries))
+
+        # Different filters are different representations
+        response = self.client.get(url, {'search': 'test'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.reduce_stock_for_sale(1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_revalidation_sees_other_workers_writes(self):
+        """Test a version bumped through another process's cache connection changes the ETag"""
+        url = reverse('products:list_products')
+        etag = self.client.get(url)['ETag']
+
+        other_worker_cache = caches.create_connection('versions')
+        other_worker_cache.incr(Product.DATA_VERSION_CACHE_KEY)
+        # A restarted worker starts with an empty local cache
+        cache.clear()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_revalidation_sees_rollup_and_category_changes(self):
+        """Test sales totals and category renames shown in the list invalidate its ETag"""
+        url = reverse('products:list_products')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductSalesRollup.record_sale_item_change(self.product.id, 2, Decimal('200.00'), timezone.now())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.category.name = 'Renamed Category'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_revalidation(self):
+        """Test product detail ETags change on edits and deletion"""
+        url = reverse('products:get_product', args=[self.product.id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.category.name = 'Renamed Category'
+        self.category.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        Product.objects.filter(pk=self.product.pk).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def test_unauthenticated_revalidation_is_rejected(self):
+        """Test the 304 shortcut does not bypass authentication"""
+        url = reverse('products:list_products')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(APIClient().get(url, HTTP_IF_NONE_MATCH=etag).status_code, 401)
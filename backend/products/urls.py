@@ -24,6 +24,7 @@ urlpatterns = [
     
     # Statistics and analytics
     path('statistics/', views.product_statistics, name='product_statistics'),
+    path('inventory-valuation/', views.inventory_valuation, name='inventory_valuation'),
     
     # Quantity management
     path('<uuid:product_id>/quantity/', views.update_product_quantity, name='update_product_quantity'),
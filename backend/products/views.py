@@ -5,8 +5,11 @@ from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from django.utils import timezone
+from datetime import datetime, time
 from decimal import Decimal, InvalidOperation
-from .models import Product
+from .models import Product, ProductSalesRollup
+from categories.models import Category
 from .serializers import (
     ProductSerializer,
     ProductCreateSerializer,
@@ -16,15 +19,22 @@ from .serializers import (
     ProductStatsSerializer,
     BulkQuantityUpdateSerializer
 )
+from core.pagination import paginate_queryset, is_cursor_request
+from core.conditional import conditional_get, DataVersion
 
 
 # Function-based views (following your Category module pattern)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(DataVersion(Product.get_data_version), DataVersion(Category.get_list_version))
 def list_products(request):
     """
     List all active products with pagination, search, and filtering
+    
+    Keyset pagination (?cursor=) always walks newest first, so it cannot be
+    combined with search (ordered by relevance) or with a sort_by/sort_order
+    other than created_at/desc; such requests get a 400.
     """
     try:
         # Get query parameters
@@ -47,15 +57,25 @@ def list_products(request):
         sort_by = request.GET.get('sort_by', 'name')  # name, price, quantity, created_at
         sort_order = request.GET.get('sort_order', 'asc')  # asc, desc
         
+        if is_cursor_request(request):
+            explicit_sort = 'sort_by' in request.GET or 'sort_order' in request.GET
+            if search or (explicit_sort and (sort_by, sort_order) != ('created_at', 'desc')):
+                return Response({
+                    'success': False,
+                    'message': 'Invalid pagination parameters.',
+                    'errors': {'detail': 'Cursor pagination is ordered newest first and cannot be combined with search or another sort.'}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            sort_by, sort_order = 'created_at', 'desc'
+        
         # Base queryset
         if show_inactive:
             products = Product.objects.all()
         else:
             products = Product.active_products()
         
-        # Apply search filter
+        # Apply search filter (ordered by relevance unless a sort is requested)
         if search:
-            products = products.search(search)
+            products = products.ranked_search(search)
         
         # Apply category filter
         if category_id:
@@ -95,7 +115,7 @@ def list_products(request):
             'updated_at': 'updated_at'
         }
         
-        if sort_by in sort_fields:
+        if sort_by in sort_fields and (not search or 'sort_by' in request.GET):
             order_field = sort_fields[sort_by]
             if sort_order == 'desc':
                 order_field = f'-{order_field}'
@@ -104,12 +124,11 @@ def list_products(request):
         # Select related to avoid N+1 queries
         products = products.select_related('category', 'created_by')
         
-        # Calculate pagination
-        total_count = products.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
+        # Annotate sales totals so the serializer does not query per row
+        products = products.with_sales_totals()
         
-        products = products[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        products, pagination = paginate_queryset(request, products, page, page_size)
         
         serializer = ProductListSerializer(products, many=True)
         
@@ -117,14 +136,7 @@ def list_products(request):
             'success': True,
             'data': {
                 'products': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                },
+                'pagination': pagination,
                 'filters_applied': {
                     'search': search,
                     'category_id': category_id,
@@ -192,6 +204,11 @@ def create_product(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(
+    lambda request, product_id: Product.objects.filter(pk=product_id),
+    lambda request, product_id: ProductSalesRollup.objects.filter(product_id=product_id),
+    lambda request, product_id: Category.objects.filter(products=product_id),
+)
 def get_product(request, product_id):
     """
     Retrieve a specific product by ID
@@ -400,7 +417,7 @@ def search_products(request):
         page = int(request.GET.get('page', 1))
         
         # Search products
-        products = Product.active_products().search(query)
+        products = Product.active_products().ranked_search(query)
         products = products.select_related('category', 'created_by')
         
         # Calculate pagination
@@ -408,7 +425,8 @@ def search_products(request):
         start_index = (page - 1) * page_size
         end_index = start_index + page_size
         
-        products = products[start_index:end_index]
+        # Annotate sales totals so the serializer does not query per row
+        products = products.with_sales_totals()[start_index:end_index]
         
         serializer = ProductListSerializer(products, many=True)
         
@@ -457,12 +475,15 @@ def products_by_category(request, category_id):
         products = Product.products_by_category(category_id)
         products = products.select_related('category', 'created_by')
         
-        # Calculate pagination
-        total_count = products.count()
+        # Calculate pagination (the count comes from the category's product counter)
+        total_count = Category.objects.filter(pk=category_id).values_list(
+            'active_product_count', flat=True
+        ).first() or 0
         start_index = (page - 1) * page_size
         end_index = start_index + page_size
         
-        products = products[start_index:end_index]
+        # Annotate sales totals so the serializer does not query per row
+        products = products.with_sales_totals()[start_index:end_index]
         
         serializer = ProductListSerializer(products, many=True)
         
@@ -517,7 +538,8 @@ def low_stock_products(request):
         start_index = (page - 1) * page_size
         end_index = start_index + page_size
         
-        products = products[start_index:end_index]
+        # Annotate sales totals so the serializer does not query per row
+        products = products.with_sales_totals()[start_index:end_index]
         
         serializer = ProductListSerializer(products, many=True)
         
@@ -557,10 +579,11 @@ def low_stock_products(request):
 @permission_classes([IsAuthenticated])
 def product_statistics(request):
     """
-    Get comprehensive product statistics
+    Get comprehensive product statistics (cached briefly; pass refresh=true to bypass)
     """
     try:
-        stats = Product.get_statistics()
+        refresh = request.GET.get('refresh', 'false').lower() == 'true'
+        stats = Product.get_statistics(use_cache=not refresh)
         serializer = ProductStatsSerializer(stats)
         
         return Response({
@@ -576,6 +599,40 @@ def product_statistics(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def inventory_valuation(request):
+    """
+    Get inventory quantity and value as of the end of a day (as_of=YYYY-MM-DD, default now)
+    """
+    try:
+        as_of = request.GET.get('as_of')
+        if as_of:
+            try:
+                as_of_date = datetime.strptime(as_of, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({
+                    'success': False,
+                    'message': 'Invalid as_of date.',
+                    'errors': {'detail': 'as_of must be in YYYY-MM-DD format.'}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            as_of = timezone.make_aware(datetime.combine(as_of_date, time.max))
+        else:
+            as_of = timezone.now()
+        
+        return Response({
+            'success': True,
+            'data': Product.get_inventory_valuation(as_of)
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Failed to calculate inventory valuation.',
+            'errors': {'detail': str(e)}
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def update_product_quantity(request, product_id):
@@ -648,23 +705,7 @@ def bulk_update_quantities(request):
         try:
             with transaction.atomic():
                 updates = serializer.validated_data['updates']
-                results = []
-                
-                for update in updates:
-                    product_id = update['product_id']
-                    new_quantity = update['quantity']
-                    
-                    product = Product.objects.get(id=product_id)
-                    update_result = product.update_quantity(new_quantity, user=request.user)
-                    
-                    results.append({
-                        'product_id': product_id,
-                        'product_name': product.name,
-                        'old_quantity': update_result['old_quantity'],
-                        'new_quantity': update_result['new_quantity'],
-                        'difference': update_result['difference'],
-                        'stock_status': product.stock_status
-                    })
+                results = Product.bulk_update_quantities(updates, user=request.user)
                 
                 return Response({
                     'success': True,
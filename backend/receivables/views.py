@@ -15,6 +15,8 @@ from .serializers import (
     ReceivablePaymentSerializer,
     ReceivableSearchSerializer
 )
+from core.pagination import paginate_queryset
+from core.idempotency import idempotent
 
 
 # Function-based views (following existing pattern)
@@ -99,12 +101,8 @@ def list_receivables(request):
                     'errors': {'detail': 'Amount must be a valid number.'}
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate pagination
-        total_count = receivables.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        receivables = receivables[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        receivables, pagination = paginate_queryset(request, receivables, page, page_size)
         
         serializer = ReceivableListSerializer(receivables, many=True)
         
@@ -112,14 +110,7 @@ def list_receivables(request):
             'success': True,
             'data': {
                 'receivables': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                }
+                'pagination': pagination
             }
         }, status=status.HTTP_200_OK)
         
@@ -140,6 +131,7 @@ def list_receivables(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_receivable(request):
     """
     Create a new receivable
@@ -262,6 +254,7 @@ def delete_receivable(request, receivable_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def record_payment(request, receivable_id):
     """
     Record a payment/return on a receivable
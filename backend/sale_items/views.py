@@ -3,6 +3,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from sales.models import SaleItem
 from sales.serializers import SaleItemSerializer, SaleItemListSerializer
 
@@ -74,10 +76,14 @@ def create_sale_item(request):
     
     if serializer.is_valid():
         try:
-            sale_item = serializer.save()
-            
-            # Recalculate sale totals
-            sale_item.sale.recalculate_totals()
+            with transaction.atomic():
+                sale_item = serializer.save()
+                
+                # Hold stock for the new item (deducted at once if the sale is confirmed)
+                sale_item.sale.reserve_stock_for_items([sale_item], user=request.user)
+                
+                # Recalculate sale totals
+                sale_item.sale.recalculate_totals()
             
             return Response({
                 'success': True,
@@ -85,6 +91,12 @@ def create_sale_item(request):
                 'data': SaleItemSerializer(sale_item).data
             }, status=status.HTTP_201_CREATED)
             
+        except DjangoValidationError as e:
+            return Response({
+                'success': False,
+                'message': 'Sale item creation failed.',
+                'errors': {'detail': e.messages}
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'success': False,
@@ -114,10 +126,18 @@ def update_sale_item(request, item_id):
             serializer = SaleItemUpdateSerializer(sale_item, data=request.data, partial=True)
         
         if serializer.is_valid():
-            updated_item = serializer.save()
+            old_quantity = sale_item.quantity
             
-            # Recalculate sale totals
-            updated_item.sale.recalculate_totals()
+            with transaction.atomic():
+                updated_item = serializer.save()
+                
+                # Hold or give back only the change in quantity
+                updated_item.sale.adjust_item_stock(
+                    updated_item.product, updated_item.quantity - old_quantity, user=request.user
+                )
+                
+                # Recalculate sale totals
+                updated_item.sale.recalculate_totals()
             
             return Response({
                 'success': True,
@@ -136,6 +156,12 @@ def update_sale_item(request, item_id):
             'success': False,
             'message': 'Sale item not found.'
         }, status=status.HTTP_404_NOT_FOUND)
+    except DjangoValidationError as e:
+        return Response({
+            'success': False,
+            'message': 'Sale item update failed.',
+            'errors': {'detail': e.messages}
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'success': False,
@@ -151,11 +177,15 @@ def delete_sale_item(request, item_id):
     try:
         sale_item = get_object_or_404(SaleItem, id=item_id, is_active=True)
         
-        sale_item.is_active = False
-        sale_item.save()
-        
-        # Recalculate sale totals
-        sale_item.sale.recalculate_totals()
+        with transaction.atomic():
+            sale_item.is_active = False
+            sale_item.save()
+            
+            # Give back the stock held for the removed item
+            sale_item.sale.adjust_item_stock(sale_item.product, -sale_item.quantity)
+            
+            # Recalculate sale totals
+            sale_item.sale.recalculate_totals()
         
         return Response({
             'success': True,
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from django.db import transaction
 from django.db.models import Sum, Count
 from django.utils import timezone
 from decimal import Decimal
-from .models import Sales, SaleItem
+from .models import Sales, SaleItem, DailySalesFact
 
 
 @admin.register(SaleItem)
@@ -201,60 +202,79 @@ class SalesAdmin(admin.ModelAdmin):
     tax_breakdown.short_description = 'Tax Breakdown'
     
     # Admin Actions
+    def _move_sales(self, request, queryset, **changes):
+        """Save each sale with the changes and move its stock reservations to match"""
+        with transaction.atomic():
+            sales = list(queryset.select_for_update(of=('self',)))
+            for sale in sales:
+                was_active = sale.is_active
+                for field, value in changes.items():
+                    setattr(sale, field, value)
+                sale.save(update_fields=list(changes) + ['updated_at'])
+                
+                if sale.is_active and not was_active:
+                    sale.restore_stock_reservations(user=request.user)
+                else:
+                    sale.sync_stock_reservations()
+        return len(sales)
+    
     def mark_as_active(self, request, queryset):
         """Mark selected sales as active"""
-        updated = queryset.update(is_active=True)
+        updated = self._move_sales(request, queryset.filter(is_active=False), is_active=True)
         self.message_user(request, f'{updated} sales marked as active.')
     mark_as_active.short_description = "Mark selected sales as active"
     
     def mark_as_inactive(self, request, queryset):
         """Mark selected sales as inactive"""
-        updated = queryset.update(is_active=False)
+        updated = self._move_sales(request, queryset.filter(is_active=True), is_active=False)
         self.message_user(request, f'{updated} sales marked as inactive.')
     mark_as_inactive.short_description = "Mark selected sales as inactive"
     
     def confirm_sales(self, request, queryset):
         """Mark selected sales as confirmed"""
-        updated = queryset.filter(status='DRAFT').update(status='CONFIRMED')
+        updated = self._move_sales(request, queryset.filter(status='DRAFT'), status='CONFIRMED')
         self.message_user(request, f'{updated} sales confirmed.')
     confirm_sales.short_description = "Confirm selected draft sales"
     
     def mark_as_invoiced(self, request, queryset):
         """Mark selected sales as invoiced"""
-        updated = queryset.filter(status='CONFIRMED').update(status='INVOICED')
+        updated = self._move_sales(request, queryset.filter(status='CONFIRMED'), status='INVOICED')
         self.message_user(request, f'{updated} sales marked as invoiced.')
     mark_as_invoiced.short_description = "Mark selected sales as invoiced"
     
     def mark_as_paid(self, request, queryset):
         """Mark selected sales as paid"""
-        updated = queryset.filter(status='INVOICED').update(status='PAID')
+        updated = self._move_sales(request, queryset.filter(status='INVOICED'), status='PAID')
         self.message_user(request, f'{updated} sales marked as paid.')
     mark_as_paid.short_description = "Mark selected sales as paid"
     
     def mark_as_delivered(self, request, queryset):
         """Mark selected sales as delivered"""
-        updated = queryset.filter(status='PAID').update(status='DELIVERED')
+        updated = self._move_sales(request, queryset.filter(status='PAID'), status='DELIVERED')
         self.message_user(request, f'{updated} sales marked as delivered.')
     mark_as_delivered.short_description = "Mark selected sales as delivered"
     
     def cancel_sales(self, request, queryset):
         """Cancel selected sales"""
-        updated = queryset.filter(status__in=['DRAFT', 'CONFIRMED', 'INVOICED']).update(status='CANCELLED')
+        updated = self._move_sales(
+            request, queryset.filter(status__in=['DRAFT', 'CONFIRMED', 'INVOICED']), status='CANCELLED'
+        )
         self.message_user(request, f'{updated} sales cancelled.')
     cancel_sales.short_description = "Cancel selected sales"
     
     def return_sales(self, request, queryset):
         """Mark selected sales as returned"""
-        updated = queryset.filter(status='DELIVERED').update(status='RETURNED')
+        updated = self._move_sales(request, queryset.filter(status='DELIVERED'), status='RETURNED')
         self.message_user(request, f'{updated} sales marked as returned.')
     return_sales.short_description = "Mark selected sales as returned"
     
     def recalculate_totals(self, request, queryset):
         """Recalculate totals for selected sales"""
-        updated = 0
-        for sale in queryset:
-            sale.recalculate_totals()
-            updated += 1
+        days = {timezone.localdate(date_of_sale) for date_of_sale in queryset.values_list('date_of_sale', flat=True)}
+        updated = queryset.recalculate_totals()
+        # Queryset updates send no post_save, so invalidate sales-derived responses here
+        Sales.bump_data_version()
+        DailySalesFact.refresh_days(days)
         self.message_user(request, f'Totals recalculated for {updated} sales.')
     recalculate_totals.short_description = "Recalculate totals for selected sales"
     
@@ -268,9 +288,13 @@ class SalesAdmin(admin.ModelAdmin):
             date_of_sale__date__lte=today
         )
         
-        total_sales = monthly_sales.count()
-        total_revenue = monthly_sales.aggregate(total=Sum('grand_total'))['total'] or Decimal('0.00')
-        total_items = monthly_sales.aggregate(total=Sum('total_items'))['total'] or 0
+        totals = monthly_sales.aggregate(count=Count('id'), revenue=Sum('grand_total'))
+        total_sales = totals['count']
+        total_revenue = totals['revenue'] or Decimal('0.00')
+        total_items = SaleItem.objects.filter(
+            sale__in=monthly_sales,
+            is_active=True
+        ).aggregate(total=Sum('quantity'))['total'] or 0
         
         self.message_user(
             request, 
@@ -279,3 +303,28 @@ class SalesAdmin(admin.ModelAdmin):
             f'Revenue: PKR {total_revenue:,.2f}'
         )
     generate_monthly_report.short_description = "Generate monthly sales report"
+
+
+@admin.register(DailySalesFact)
+class DailySalesFactAdmin(admin.ModelAdmin):
+    list_display = (
+        'date',
+        'sales_count',
+        'items_sold',
+        'revenue',
+        'tax',
+        'discounts',
+        'paid_count',
+        'unpaid_count',
+        'updated_at'
+    )
+    date_hierarchy = 'date'
+    ordering = ('-date',)
+
+    def has_add_permission(self, request):
+        """Facts are derived from sales"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Facts are derived from sales"""
+        return False
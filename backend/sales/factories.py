@@ -0,0 +1,29 @@
+import factory
+from django.utils import timezone
+from factory.django import DjangoModelFactory
+from customers.factories import CustomerFactory
+from products.factories import ProductFactory
+from .models import Sales, SaleItem
+
+
+class SalesFactory(DjangoModelFactory):
+    """Empty sale; add items with Sales.save_with_items() or SaleItemFactory"""
+
+    class Meta:
+        model = Sales
+
+    customer = factory.SubFactory(CustomerFactory)
+    date_of_sale = factory.LazyFunction(timezone.now)
+    created_by = factory.LazyAttribute(lambda sale: sale.customer.created_by)
+
+
+class SaleItemFactory(DjangoModelFactory):
+    """Sale item at the product's list price; use build() for Sales.save_with_items()"""
+
+    class Meta:
+        model = SaleItem
+
+    sale = factory.SubFactory(SalesFactory)
+    product = factory.SubFactory(ProductFactory)
+    unit_price = factory.LazyAttribute(lambda item: item.product.price)
+    quantity = 1
@@ -0,0 +1,168 @@
+import glob
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.utils import timezone
+
+# 80mm thermal receipt at 203 dpi
+RECEIPT_WIDTH = 576
+RECEIPT_MARGIN = 16
+RECEIPT_DPI = 203
+FONT_SIZE = 20
+LINE_HEIGHT = 28
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def invoice_cache_dir():
+    # Invoices carry customer details, so they must never land under the publicly served MEDIA_ROOT
+    return getattr(settings, 'INVOICE_CACHE_DIR', os.path.join(settings.BASE_DIR, 'var', 'invoices'))
+
+
+def invoice_cache_path(sale_id, updated_at):
+    """Path of the rendered invoice for one version of a sale"""
+    version = int(updated_at.timestamp() * 1000000)
+    return os.path.join(invoice_cache_dir(), f'{sale_id}-{version}.pdf')
+
+
+def cached_invoice_path(sale_id, updated_at):
+    """Path of the already rendered invoice for this version of the sale, or None"""
+    path = invoice_cache_path(sale_id, updated_at)
+    return path if os.path.exists(path) else None
+
+
+def invoice_lines(sale):
+    """
+    Lay out a sale as (left, right) receipt lines.
+
+    Reads the sale's active items, so load it with Sales.objects.with_details()
+    to avoid per-line queries.
+    """
+    lines = [
+        ('INVOICE', sale.invoice_display),
+        (timezone.localtime(sale.date_of_sale).strftime('%d %b %Y %H:%M'), sale.get_status_display()),
+        (sale.customer_name, sale.customer_phone),
+        None,
+    ]
+    for item in sale.active_sale_items:
+        lines.append((item.product_name, item.formatted_line_total))
+        lines.append((f'  {item.quantity} x PKR {item.unit_price:,.2f}', ''))
+        if item.item_discount:
+            lines.append(('  Discount', f'- PKR {item.item_discount:,.2f}'))
+        if item.customization_notes:
+            lines.append((f'  {item.customization_notes}', ''))
+
+    tax = sale.tax_breakdown
+    lines += [
+        None,
+        ('Subtotal', f'PKR {sale.subtotal:,.2f}'),
+    ]
+    if sale.overall_discount:
+        lines.append(('Discount', f'- PKR {sale.overall_discount:,.2f}'))
+    lines += [
+        (f"GST {tax['tax_rate_display']} on PKR {tax['taxable_amount']:,.2f}", f"PKR {tax['gst_amount']:,.2f}"),
+        ('Grand Total', sale.formatted_grand_total),
+        ('Paid', f'PKR {sale.amount_paid:,.2f}'),
+        ('Balance', sale.formatted_remaining_amount),
+        None,
+        (sale.get_payment_method_display(), sale.payment_status_display),
+    ]
+    if sale.authorized_initials:
+        lines.append(('Served by', sale.authorized_initials))
+    return lines
+
+
+def render_invoice_pdf(lines):
+    """Draw receipt lines onto a single-page PDF and return its bytes"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    font = ImageFont.load_default(size=FONT_SIZE)
+    height = RECEIPT_MARGIN * 2 + LINE_HEIGHT * len(lines)
+    image = Image.new('L', (RECEIPT_WIDTH, height), 255)
+    draw = ImageDraw.Draw(image)
+    right_edge = RECEIPT_WIDTH - RECEIPT_MARGIN
+
+    for index, line in enumerate(lines):
+        y = RECEIPT_MARGIN + index * LINE_HEIGHT
+        if line is None:
+            draw.line((RECEIPT_MARGIN, y + LINE_HEIGHT // 2, right_edge, y + LINE_HEIGHT // 2), fill=0)
+            continue
+        left, right = line
+        right_width = draw.textlength(right, font=font) if right else 0
+        # Long product names are cut short of the amount column
+        available = right_edge - RECEIPT_MARGIN - right_width - (FONT_SIZE if right else 0)
+        while left and draw.textlength(left, font=font) > available:
+            left = left[:-1]
+        draw.text((RECEIPT_MARGIN, y), left, font=font, fill=0)
+        if right:
+            draw.text((right_edge - right_width, y), right, font=font, fill=0)
+
+    output = io.BytesIO()
+    image.save(output, 'PDF', resolution=RECEIPT_DPI)
+    return output.getvalue()
+
+
+def _write_invoice(path, lines):
+    pdf = render_invoice_pdf(lines)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Readers never see a partially written file
+    temporary_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(temporary_path, 'wb') as output:
+        output.write(pdf)
+    os.replace(temporary_path, path)
+
+    # Earlier versions of the sale can no longer be requested
+    sale_prefix = os.path.basename(path).rsplit('-', 1)[0]
+    for stale_path in glob.glob(os.path.join(os.path.dirname(path), f'{sale_prefix}-*.pdf')):
+        if stale_path != path:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+    return path
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'INVOICE_RENDER_WORKERS', 2),
+                thread_name_prefix='invoice-render'
+            )
+        return _executor
+
+
+def submit_invoice_render(sale):
+    """
+    Render a sale's invoice to the cache directory on the render pool.
+
+    The receipt lines are built here, on the calling thread, so the workers
+    never touch the database. Concurrent requests for the same version of a
+    sale share one render. Returns a future resolving to the file path.
+    """
+    path = invoice_cache_path(sale.pk, sale.updated_at)
+    with _in_flight_lock:
+        future = _in_flight.get(path)
+    if future is not None:
+        return future
+
+    lines = invoice_lines(sale)
+    with _in_flight_lock:
+        future = _in_flight.get(path)
+        if future is not None:
+            return future
+        future = _in_flight[path] = _get_executor().submit(_write_invoice, path, lines)
+    future.add_done_callback(lambda done: _forget(path))
+    return future
+
+
+def _forget(path):
+    with _in_flight_lock:
+        _in_flight.pop(path, None)
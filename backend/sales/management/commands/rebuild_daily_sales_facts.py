@@ -0,0 +1,31 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from sales.models import DailySalesFact
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed daily sales facts from active sales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='start_date',
+            help='Only rebuild days on or after this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--to',
+            dest='end_date',
+            help='Only rebuild days on or before this date (YYYY-MM-DD)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_date, end_date = (
+                datetime.strptime(options[name], '%Y-%m-%d').date() if options.get(name) else None
+                for name in ('start_date', 'end_date')
+            )
+        except ValueError:
+            raise CommandError('--from and --to must be in YYYY-MM-DD format.')
+        
+        rebuilt = DailySalesFact.rebuild(start_date=start_date, end_date=end_date)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sales facts for {rebuilt} days.'))
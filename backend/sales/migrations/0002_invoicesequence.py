@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('year', models.PositiveIntegerField(help_text='Invoice year', primary_key=True, serialize=False)),
+                ('last_number', models.PositiveIntegerField(default=0, help_text='Highest sequence number handed out for the year')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Invoice Sequence',
+                'verbose_name_plural': 'Invoice Sequences',
+                'db_table': 'invoice_sequence',
+            },
+        ),
+    ]
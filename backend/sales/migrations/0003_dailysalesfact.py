@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:11
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_sales_facts(apps, schema_editor):
+    """Compute the daily facts of existing sales"""
+    Sales = apps.get_model('sales', 'Sales')
+    SaleItem = apps.get_model('sales', 'SaleItem')
+    DailySalesFact = apps.get_model('sales', 'DailySalesFact')
+    sales = Sales.objects.filter(is_active=True).annotate(day=TruncDate('date_of_sale'))
+    
+    facts = {}
+    for row in sales.values('day').annotate(
+        sales_count=Count('id'),
+        revenue=Sum('grand_total'),
+        tax=Sum('tax_amount'),
+        discounts=Sum('overall_discount'),
+        amount_paid=Sum('amount_paid'),
+        paid_count=Count('id', filter=Q(is_fully_paid=True))
+    ).order_by():
+        facts[row['day']] = DailySalesFact(
+            date=row['day'],
+            sales_count=row['sales_count'],
+            revenue=row['revenue'] or 0,
+            tax=row['tax'] or 0,
+            discounts=row['discounts'] or 0,
+            amount_paid=row['amount_paid'] or 0,
+            paid_count=row['paid_count'],
+            unpaid_count=row['sales_count'] - row['paid_count'],
+            payment_methods={}
+        )
+    for row in sales.values('day', 'payment_method').annotate(count=Count('id'), revenue=Sum('grand_total')).order_by():
+        facts[row['day']].payment_methods[row['payment_method']] = {
+            'count': row['count'],
+            'revenue': str((row['revenue'] or Decimal('0')).quantize(Decimal('0.01')))
+        }
+    for row in SaleItem.objects.filter(is_active=True, sale__is_active=True).annotate(
+        day=TruncDate('sale__date_of_sale')
+    ).values('day').annotate(items_sold=Sum('quantity')).order_by():
+        if row['day'] in facts:
+            facts[row['day']].items_sold = row['items_sold'] or 0
+    DailySalesFact.objects.bulk_create(facts.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_invoicesequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesFact',
+            fields=[
+                ('date', models.DateField(help_text='Local date of sale', primary_key=True, serialize=False)),
+                ('sales_count', models.PositiveIntegerField(default=0, help_text='Number of active sales')),
+                ('items_sold', models.PositiveIntegerField(default=0, help_text='Units sold across active sale items')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Sum of grand totals', max_digits=15)),
+                ('tax', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Sum of tax amounts', max_digits=15)),
+                ('discounts', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Sum of overall discounts', max_digits=15)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Sum of amounts paid', max_digits=15)),
+                ('paid_count', models.PositiveIntegerField(default=0, help_text='Number of fully paid sales')),
+                ('unpaid_count', models.PositiveIntegerField(default=0, help_text='Number of unpaid or partially paid sales')),
+                ('payment_methods', models.JSONField(blank=True, default=dict, help_text='Per payment method {count, revenue} totals')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Sales Fact',
+                'verbose_name_plural': 'Daily Sales Facts',
+                'db_table': 'daily_sales_fact',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.RunPython(backfill_daily_sales_facts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def uncache_invoice_sequences(apps, schema_editor):
+    """Stop existing per-year invoice sequences from pre-allocating blocks per connection"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT sequencename FROM pg_sequences "
+            "WHERE schemaname = current_schema() AND sequencename LIKE 'sales\\_invoice\\_number\\_%'"
+        )
+        sequence_names = [row[0] for row in cursor.fetchall()]
+    for sequence_name in sequence_names:
+        schema_editor.execute(f'ALTER SEQUENCE {schema_editor.quote_name(sequence_name)} CACHE 1')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_dailysalesfact'),
+    ]
+
+    operations = [
+        migrations.RunPython(uncache_invoice_sequences, migrations.RunPython.noop),
+    ]
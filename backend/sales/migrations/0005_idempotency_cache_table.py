@@ -0,0 +1,18 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_idempotency_cache_table(apps, schema_editor):
+    """Create the table backing the shared 'idempotency' cache (core.idempotency)"""
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_invoice_sequence_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_idempotency_cache_table, migrations.RunPython.noop),
+    ]
@@ -3,31 +3,97 @@ from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from datetime import date
 
 
 def generate_invoice_number():
     """Generate sequential invoice number in format: INV-YYYY-XXXX"""
-    today = date.today()
-    year = today.year
-    
-    # Get the last invoice number for this year
-    last_invoice = Sales.objects.filter(
-        invoice_number__startswith=f'INV-{year}-'
-    ).order_by('-invoice_number').first()
-    
-    if last_invoice:
-        try:
-            # Extract the sequence number and increment
-            last_sequence = int(last_invoice.invoice_number.split('-')[-1])
-            new_sequence = last_sequence + 1
-        except (ValueError, IndexError):
-            new_sequence = 1
-    else:
-        new_sequence = 1
-    
-    return f'INV-{year}-{new_sequence:04d}'
+    year = date.today().year
+    return f'INV-{year}-{InvoiceSequence.next_number(year):04d}'
+
+
+class InvoiceSequence(models.Model):
+    """
+    Per-year invoice number counter.
+    
+    On PostgreSQL numbers come from a per-year database sequence: nextval()
+    never waits on other checkouts. The sequence is not cached per
+    connection, since connections are not persistent and each would throw
+    away the rest of its block. Other backends fall back to this locked
+    counter row. Numbers are unique and increase in the order they are
+    handed out, but sales may commit in a different order and the numbers
+    are not gap-free: on PostgreSQL a rolled-back sale leaves a hole.
+    """
+    
+    year = models.PositiveIntegerField(
+        primary_key=True,
+        help_text="Invoice year"
+    )
+    last_number = models.PositiveIntegerField(
+        default=0,
+        help_text="Highest sequence number handed out for the year"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'invoice_sequence'
+        verbose_name = 'Invoice Sequence'
+        verbose_name_plural = 'Invoice Sequences'
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+    @staticmethod
+    def highest_issued(year):
+        """Highest numeric sequence already used by an invoice of the year"""
+        numbers = Sales.objects.filter(
+            invoice_number__regex=rf'^INV-{year}-[0-9]+$'
+        ).values_list('invoice_number', flat=True)
+        return max((int(number.rsplit('-', 1)[1]) for number in numbers.iterator()), default=0)
+
+    @classmethod
+    def next_number(cls, year):
+        """Hand out the next invoice sequence number for a year"""
+        from django.db import connection, transaction
+        from django.db.models import F
+        
+        if connection.vendor == 'postgresql':
+            return cls._next_from_database_sequence(year)
+        
+        with transaction.atomic():
+            # The UPDATE locks the counter row until the caller's transaction ends
+            if not cls.objects.filter(pk=year).update(last_number=F('last_number') + 1):
+                cls.objects.get_or_create(year=year, defaults={'last_number': cls.highest_issued(year)})
+                cls.objects.filter(pk=year).update(last_number=F('last_number') + 1)
+            return cls.objects.values_list('last_number', flat=True).get(pk=year)
+
+    @classmethod
+    def _next_from_database_sequence(cls, year):
+        from django.db import connection, transaction, DatabaseError
+        
+        sequence_name = f'sales_invoice_number_{int(year)}'
+        with connection.cursor() as cursor:
+            # Savepoint so a missing sequence does not abort the caller's transaction
+            try:
+                with transaction.atomic():
+                    cursor.execute('SELECT nextval(%s)', [sequence_name])
+                    return cursor.fetchone()[0]
+            except DatabaseError:
+                pass
+            
+            # First invoice of the year: create the sequence after the highest issued number.
+            # A concurrent creator makes this fail harmlessly, after which nextval succeeds.
+            try:
+                with transaction.atomic():
+                    cursor.execute(
+                        f'CREATE SEQUENCE IF NOT EXISTS {sequence_name} '
+                        f'START WITH {cls.highest_issued(year) + 1} CACHE 1'
+                    )
+            except DatabaseError:
+                pass
+            cursor.execute('SELECT nextval(%s)', [sequence_name])
+            return cursor.fetchone()[0]
 
 
 class SalesQuerySet(models.QuerySet):
@@ -96,6 +162,79 @@ class SalesQuerySet(models.QuerySet):
     def by_order(self, order_id):
         """Get sales created from a specific order"""
         return self.filter(order_id=order_id)
+    
+    def with_item_count(self):
+        """Annotate the number of active sale items as active_item_count"""
+        from django.db.models import Count, Q
+        
+        return self.annotate(
+            active_item_count=Count('sale_items', filter=Q(sale_items__is_active=True))
+        )
+    
+    def with_details(self):
+        """
+        Load everything SalesSerializer reads in a fixed number of queries.
+        
+        Customer, order and creator are joined, active sale items are
+        prefetched with their products into prefetched_active_items and the
+        active item count is annotated.
+        """
+        from django.db.models import Prefetch
+        
+        return self.select_related('customer', 'order_id', 'created_by').prefetch_related(
+            Prefetch(
+                'sale_items',
+                queryset=SaleItem.objects.filter(is_active=True).select_related('product').order_by('created_at'),
+                to_attr='prefetched_active_items'
+            )
+        ).with_item_count()
+    
+    def recalculate_totals(self):
+        """
+        Recalculate totals of every sale in the queryset with a single UPDATE.
+        
+        The subtotal is summed from active sale items by a correlated subquery
+        and tax, grand total, remaining amount and payment state are derived
+        from it in the same statement. Returns the number of sales updated.
+        """
+        from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+        from django.db.models.functions import Coalesce, Greatest, Round
+        from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
+        
+        money = DecimalField(max_digits=15, decimal_places=2)
+        item_totals = SaleItem.objects.filter(sale=OuterRef('pk'), is_active=True).order_by().values(
+            'sale'
+        ).annotate(total=Sum('line_total')).values('total')
+        
+        # SET expressions see the old row, so each one derives from the subtotal expression
+        subtotal = Coalesce(Subquery(item_totals, output_field=money), Value(Decimal('0.00')), output_field=money)
+        taxable_amount = ExpressionWrapper(subtotal - F('overall_discount'), output_field=money)
+        tax_amount = Round(
+            ExpressionWrapper(taxable_amount * F('gst_percentage') * Value(Decimal('0.01')), output_field=money),
+            2,
+            output_field=money
+        )
+        grand_total = ExpressionWrapper(taxable_amount + tax_amount, output_field=money)
+        
+        return self.update(
+            subtotal=subtotal,
+            tax_amount=tax_amount,
+            grand_total=grand_total,
+            remaining_amount=Greatest(
+                ExpressionWrapper(grand_total - F('amount_paid'), output_field=money),
+                Value(Decimal('0.00')),
+                output_field=money
+            ),
+            is_fully_paid=Case(
+                When(
+                    Q(GreaterThan(grand_total, Value(Decimal('0.00'))))
+                    & Q(GreaterThanOrEqual(F('amount_paid'), grand_total)),
+                    then=Value(True)
+                ),
+                default=Value(False)
+            ),
+            updated_at=timezone.now()
+        )
 
 
 class Sales(models.Model):
@@ -122,6 +261,11 @@ class Sales(models.Model):
         ('CREDIT', 'Credit Sale'),
     ]
     
+    # Statuses at which reserved stock is taken out of inventory
+    STOCK_COMMITTED_STATUSES = ['CONFIRMED', 'INVOICED', 'PAID', 'DELIVERED']
+    # Statuses whose stock goes back on hand
+    STOCK_RELEASED_STATUSES = ['CANCELLED', 'RETURNED']
+    
     # Primary fields
     id = models.UUIDField(
         primary_key=True,
@@ -304,7 +448,24 @@ class Sales(models.Model):
     
     def save(self, *args, **kwargs):
         """Auto-calculate financial fields and validate before saving"""
-        # Cache customer information if not set
+        self.cache_customer_details()
+        
+        # Calculate tax, grand total and payment state
+        self.calculate_totals()
+        
+        # Partial saves only validate the fields they write, which skips the
+        # foreign key and uniqueness lookups for the untouched columns
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            self.full_clean(exclude=[
+                field.name for field in self._meta.fields if field.name not in update_fields
+            ])
+        else:
+            self.full_clean()
+        super().save(*args, **kwargs)
+    
+    def cache_customer_details(self):
+        """Copy customer information onto the sale if not set"""
         if self.customer and not self.customer_name:
             self.customer_name = self.customer.name
         
@@ -313,26 +474,14 @@ class Sales(models.Model):
         
         if self.customer and not self.customer_email:
             self.customer_email = self.customer.email
-        
-        # Calculate tax amount
-        if self.subtotal and self.overall_discount and self.gst_percentage:
-            taxable_amount = self.subtotal - self.overall_discount
-            self.tax_amount = (taxable_amount * self.gst_percentage) / 100
-        
-        # Calculate grand total
-        if self.subtotal and self.overall_discount and self.tax_amount:
-            self.grand_total = self.subtotal - self.overall_discount + self.tax_amount
-        
-        # Calculate remaining amount
-        if self.grand_total and self.amount_paid:
-            self.remaining_amount = self.grand_total - self.amount_paid
-        
-        # Update payment status
-        if self.grand_total and self.amount_paid:
-            self.is_fully_paid = self.amount_paid >= self.grand_total
-        
-        self.full_clean()
-        super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded status and date so post-commit work can detect changes"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_date_of_sale = instance.__dict__.get('date_of_sale')
+        return instance
     
     @property
     def sales_age_days(self):
@@ -385,8 +534,19 @@ class Sales(models.Model):
     
     @property
     def total_items(self):
-        """Count of items in this sale"""
-        return self.sale_items.count()
+        """Count of active items in this sale"""
+        if hasattr(self, 'active_item_count'):
+            return self.active_item_count
+        if hasattr(self, 'prefetched_active_items'):
+            return len(self.prefetched_active_items)
+        return self.sale_items.filter(is_active=True).count()
+    
+    @property
+    def active_sale_items(self):
+        """Active items of this sale, from the with_details() prefetch when loaded"""
+        if hasattr(self, 'prefetched_active_items'):
+            return self.prefetched_active_items
+        return self.sale_items.filter(is_active=True).select_related('product').order_by('created_at')
     
     @property
     def profit_margin(self):
@@ -406,6 +566,228 @@ class Sales(models.Model):
             'tax_rate_display': f"{self.gst_percentage}%"
         }
     
+    def save_with_items(self, sale_items, user=None):
+        """
+        Insert a new sale together with its unsaved items.
+        
+        Line totals and the subtotal are computed in memory, so the sale is
+        inserted once with its final totals and the items in a single batch.
+        bulk_create skips the sale item signals, so the product sales rollups
+        are updated here in one aggregated pass.
+        """
+        from products.models import ProductSalesRollup
+        
+        self._attach_items(sale_items)
+        self.save()
+        
+        SaleItem.objects.bulk_create(sale_items)
+        ProductSalesRollup.record_sale_items(sale_items)
+        
+        # Hold (or, for confirmed sales, deduct) stock atomically
+        self.reserve_stock_for_items(sale_items, user=user)
+    
+    def _attach_items(self, sale_items):
+        """Link unsaved items to this sale, validate them and derive the subtotal"""
+        for item in sale_items:
+            item.sale = self
+            item.calculate_line_total()
+            # Products come validated from the caller; skip the per-row lookups
+            item.full_clean(exclude=['sale', 'product'], validate_unique=False)
+        self.subtotal = sum((item.line_total for item in sale_items), Decimal('0.00'))
+    
+    @classmethod
+    def create_from_orders(cls, conversions, user=None, **sale_fields):
+        """
+        Convert several orders into confirmed sales in one batch.
+        
+        Each conversion is a dict with an order_id and optionally amount_paid
+        and overall_discount; sale_fields (payment method, GST, notes) apply
+        to every sale. The orders and the products they sell are locked, and
+        an order that cannot be converted is reported without failing the
+        others. Sales, sale items, stock deductions and the orders'
+        conversion fields are then written in batches. Must run inside a
+        transaction.
+        
+        Returns one {'order_id', 'sale', 'errors'} dict per conversion, in
+        the given order.
+        """
+        from django.db import transaction
+        from django.db.models import Exists, OuterRef, Prefetch
+        from orders.models import Order
+        from order_items.models import OrderItem
+        from products.models import Product, ProductSalesRollup, StockReservation
+        from .signals import run_sales_batch_followup
+        
+        orders = {
+            order.pk: order
+            for order in Order.objects.select_for_update(of=('self',)).select_related('customer').filter(
+                pk__in=[conversion['order_id'] for conversion in conversions], is_active=True
+            ).annotate(
+                has_sales=Exists(cls.objects.filter(order_id=OuterRef('pk')))
+            ).prefetch_related(
+                Prefetch(
+                    'order_items',
+                    queryset=OrderItem.objects.filter(is_active=True).order_by('created_at'),
+                    to_attr='active_order_items'
+                )
+            ).order_by('pk')
+        }
+        product_ids = {item.product_id for order in orders.values() for item in order.active_order_items}
+        products = {
+            product.pk: product
+            for product in Product.objects.select_for_update().filter(pk__in=product_ids).order_by('pk')
+        }
+        # Stock still unclaimed by earlier orders of the batch
+        available = {product_id: product.available_quantity for product_id, product in products.items()}
+        
+        results = []
+        converted = []
+        seen = set()
+        for conversion in conversions:
+            order_id = conversion['order_id']
+            result = {'order_id': order_id, 'sale': None, 'errors': []}
+            results.append(result)
+            
+            order = orders.get(order_id)
+            if order is None:
+                result['errors'].append("Order not found or inactive.")
+            elif order_id in seen:
+                result['errors'].append("Order is listed more than once.")
+            elif order.status not in ['READY', 'DELIVERED']:
+                result['errors'].append(
+                    f"Order must be in READY or DELIVERED status to convert to sale. Current status: {order.status}"
+                )
+            elif order.has_sales:
+                result['errors'].append("This order has already been converted to a sale.")
+            elif not order.active_order_items:
+                result['errors'].append("Order has no items to convert.")
+            if result['errors']:
+                continue
+            seen.add(order_id)
+            
+            quantities = {}
+            for order_item in order.active_order_items:
+                quantities[order_item.product_id] = quantities.get(order_item.product_id, 0) + order_item.quantity
+            short = [products[product_id] for product_id, quantity in quantities.items() if quantity > available[product_id]]
+            if short:
+                result['errors'].extend(
+                    f"Insufficient stock. Only {available[product.pk]} available for {product.name}." for product in short
+                )
+                continue
+            
+            sale = cls(
+                order_id=order,
+                customer=order.customer,
+                amount_paid=conversion.get('amount_paid', Decimal('0.00')),
+                overall_discount=conversion.get('overall_discount', Decimal('0.00')),
+                status='CONFIRMED',
+                created_by=user,
+                **sale_fields
+            )
+            sale_items = [
+                SaleItem(
+                    order_item=order_item.id,
+                    product=products[order_item.product_id],
+                    unit_price=order_item.unit_price,
+                    quantity=order_item.quantity,
+                    customization_notes=order_item.customization_notes
+                )
+                for order_item in order.active_order_items
+            ]
+            try:
+                sale._attach_items(sale_items)
+                sale.cache_customer_details()
+                sale.calculate_totals()
+                # Order, customer and user come from the locked rows above
+                sale.full_clean(exclude=['order_id', 'customer', 'created_by'], validate_unique=False)
+            except ValidationError as e:
+                result['errors'].extend(e.messages)
+                continue
+            
+            for product_id, quantity in quantities.items():
+                available[product_id] -= quantity
+            result['sale'] = sale
+            converted.append((sale, sale_items, quantities))
+        
+        if converted:
+            sales = cls.objects.bulk_create([sale for sale, _, _ in converted])
+            new_items = [item for _, sale_items, _ in converted for item in sale_items]
+            SaleItem.objects.bulk_create(new_items)
+            ProductSalesRollup.record_sale_items(new_items)
+            # Converted sales are confirmed, so their stock is deducted right away
+            StockReservation.sell_many(
+                [
+                    (sale, products[product_id], quantity)
+                    for sale, _, quantities in converted
+                    for product_id, quantity in quantities.items()
+                ],
+                user=user
+            )
+            Order.objects.filter(pk__in=[sale.order_id_id for sale in sales]).update_conversion_status()
+            
+            # bulk_create skips post_save, so the per-sale follow-up runs once for the batch
+            transaction.on_commit(lambda: run_sales_batch_followup(sales))
+        
+        return results
+    
+    def reserve_stock_for_items(self, sale_items, user=None):
+        """Reserve stock for new sale items, then commit/release to match the sale status"""
+        from products.models import StockReservation
+        
+        # One reservation per product, however many lines it appears on
+        quantities = {}
+        products = {}
+        for item in sale_items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+            products[item.product_id] = item.product
+        StockReservation.reserve_many(
+            [(products[product_id], quantity) for product_id, quantity in quantities.items()],
+            sale=self,
+            user=user
+        )
+        
+        self.sync_stock_reservations()
+    
+    def sync_stock_reservations(self):
+        """
+        Commit, release or return this sale's stock reservations according to its status.
+        
+        Cancelled, returned and soft-deleted sales give back everything they
+        hold: active reservations are released and committed ones returned
+        to stock. Safe to call after any status change, as reservations
+        already in the target state are left alone.
+        """
+        from products.models import StockReservation
+        
+        if not self.is_active or self.status in self.STOCK_RELEASED_STATUSES:
+            StockReservation.release_for(sale=self)
+            StockReservation.return_for(sale=self)
+        elif self.status in self.STOCK_COMMITTED_STATUSES:
+            StockReservation.commit_for(sale=self)
+    
+    def adjust_item_stock(self, product, quantity_delta, user=None):
+        """
+        Move this sale's hold on a product by quantity_delta units.
+        
+        Added units are reserved (and committed right away on confirmed
+        sales), removed units are released or returned to stock. Call with
+        the difference whenever an item's quantity changes, and with minus
+        its quantity when the item is removed.
+        """
+        from products.models import StockReservation
+        
+        if quantity_delta > 0:
+            StockReservation.reserve_many([(product, quantity_delta)], sale=self, user=user)
+            self.sync_stock_reservations()
+        elif quantity_delta < 0:
+            StockReservation.reduce_for(product, -quantity_delta, sale=self)
+    
+    def restore_stock_reservations(self, user=None):
+        """Hold stock again for the active items of a sale brought back from soft deletion"""
+        sale_items = list(self.sale_items.filter(is_active=True).select_related('product'))
+        if sale_items:
+            self.reserve_stock_for_items(sale_items, user=user)
+    
     def can_be_cancelled(self):
         """Check if sale can be cancelled"""
         return self.status in ['DRAFT', 'CONFIRMED', 'INVOICED']
@@ -414,26 +796,45 @@ class Sales(models.Model):
         """Check if sale can be returned"""
         return self.status == 'DELIVERED' and self.is_fully_paid
     
+    # Fields derived from the sale items and the payment inputs
+    TOTALS_FIELDS = ['subtotal', 'tax_amount', 'grand_total', 'remaining_amount', 'is_fully_paid']
+    
+    def calculate_totals(self):
+        """Derive tax, grand total and payment state from subtotal, discount, GST and amount paid"""
+        taxable_amount = self.subtotal - self.overall_discount
+        self.tax_amount = (taxable_amount * self.gst_percentage / 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        self.grand_total = taxable_amount + self.tax_amount
+        self.remaining_amount = max(Decimal('0.00'), self.grand_total - self.amount_paid)
+        self.is_fully_paid = self.grand_total > 0 and self.amount_paid >= self.grand_total
+    
     def update_payment_status(self):
         """Update payment status based on amount paid"""
-        if self.grand_total > 0:
-            self.is_fully_paid = self.amount_paid >= self.grand_total
-            self.remaining_amount = max(0, self.grand_total - self.amount_paid)
-            self.save(update_fields=['is_fully_paid', 'remaining_amount'])
+        self.save(update_fields=['tax_amount', 'grand_total', 'remaining_amount', 'is_fully_paid', 'updated_at'])
     
     def recalculate_totals(self):
-        """Recalculate all financial totals from sale items"""
-        total_subtotal = sum(item.line_total for item in self.sale_items.all())
-        self.subtotal = total_subtotal
+        """Recalculate all financial totals from active sale items in a single UPDATE"""
+        from .signals import schedule_sale_followup
         
-        # Recalculate tax and grand total
-        taxable_amount = self.subtotal - self.overall_discount
-        self.tax_amount = (taxable_amount * self.gst_percentage) / 100
-        self.grand_total = self.subtotal - self.overall_discount + self.tax_amount
+        Sales.objects.filter(pk=self.pk).recalculate_totals()
+        self.refresh_from_db(fields=self.TOTALS_FIELDS + ['updated_at'])
         
-        # Update payment status
-        self.update_payment_status()
-        self.save(update_fields=['subtotal', 'tax_amount', 'grand_total'])
+        # The UPDATE sends no post_save, so queue the follow-up explicitly
+        schedule_sale_followup(self)
+
+    # Cache settings for sales-derived responses
+    DATA_VERSION_CACHE_KEY = 'sales_data_version'
+
+    @classmethod
+    def get_data_version(cls):
+        """Get the current sales data version (bumped whenever a sale write commits)"""
+        from core.versions import get_version
+        return get_version(cls.DATA_VERSION_CACHE_KEY)
+
+    @classmethod
+    def bump_data_version(cls):
+        """Invalidate version-keyed sales caches"""
+        from core.versions import bump_version
+        bump_version(cls.DATA_VERSION_CACHE_KEY)
 
 
 class SaleItemQuerySet(models.QuerySet):
@@ -566,8 +967,8 @@ class SaleItem(models.Model):
             if self.line_total != expected_total:
                 self.line_total = expected_total
     
-    def save(self, *args, **kwargs):
-        """Auto-populate fields and calculate totals before saving"""
+    def calculate_line_total(self):
+        """Populate product details and the line total"""
         # Auto-populate product name and unit price from product if not set
         if self.product and not self.product_name:
             self.product_name = self.product.name
@@ -578,7 +979,10 @@ class SaleItem(models.Model):
         # Calculate line total
         if self.quantity and self.unit_price:
             self.line_total = (self.quantity * self.unit_price) - self.item_discount
-        
+    
+    def save(self, *args, **kwargs):
+        """Auto-populate fields and calculate totals before saving"""
+        self.calculate_line_total()
         self.full_clean()
         super().save(*args, **kwargs)
     
@@ -622,3 +1026,245 @@ class SaleItem(models.Model):
             'quantity': self.quantity,
             'customization_notes': self.customization_notes
         }
+
+
+class DailySalesFact(models.Model):
+    """
+    Precomputed per-day sales totals for statistics and dashboards.
+    
+    One row per local sale date, recomputed from that day's active sales
+    whenever one of them commits a change, so reports over any date range
+    read at most one row per day instead of scanning sales.
+    """
+    
+    date = models.DateField(
+        primary_key=True,
+        help_text="Local date of sale"
+    )
+    sales_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of active sales"
+    )
+    items_sold = models.PositiveIntegerField(
+        default=0,
+        help_text="Units sold across active sale items"
+    )
+    revenue = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Sum of grand totals"
+    )
+    tax = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Sum of tax amounts"
+    )
+    discounts = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Sum of overall discounts"
+    )
+    amount_paid = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Sum of amounts paid"
+    )
+    paid_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of fully paid sales"
+    )
+    unpaid_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of unpaid or partially paid sales"
+    )
+    payment_methods = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Per payment method {count, revenue} totals"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'daily_sales_fact'
+        verbose_name = 'Daily Sales Fact'
+        verbose_name_plural = 'Daily Sales Facts'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date}: {self.sales_count} sales"
+
+    STORED_FIELDS = [
+        'sales_count', 'items_sold', 'revenue', 'tax', 'discounts', 'amount_paid',
+        'paid_count', 'unpaid_count', 'payment_methods', 'updated_at'
+    ]
+    
+    # First key of the PostgreSQL advisory locks serializing refreshes
+    LOCK_NAMESPACE = 7301
+
+    @classmethod
+    def refresh_days(cls, days):
+        """Recompute the facts of the given local dates from their sales"""
+        days = set(days)
+        if not days:
+            return 0
+        return cls._store(
+            Sales.objects.filter(is_active=True, date_of_sale__date__in=days),
+            cls.objects.filter(date__in=days),
+            days=days
+        )
+
+    @classmethod
+    def rebuild(cls, start_date=None, end_date=None):
+        """Rebuild the facts of every day (optionally within a date range) from scratch"""
+        sales = Sales.objects.filter(is_active=True)
+        facts = cls.objects.all()
+        if start_date:
+            sales = sales.filter(date_of_sale__date__gte=start_date)
+            facts = facts.filter(date__gte=start_date)
+        if end_date:
+            sales = sales.filter(date_of_sale__date__lte=end_date)
+            facts = facts.filter(date__lte=end_date)
+        return cls._store(sales, facts)
+
+    @classmethod
+    def _lock_days(cls, days=None):
+        """
+        Hold the refresh lock of the given dates (or of every date) until the transaction ends.
+        
+        Refreshes of the same day run one after the other, so the one that
+        writes last has also aggregated last and no committed sale is
+        dropped from a fact. A rebuild locks every date. Other backends
+        already serialize writing transactions.
+        """
+        from django.db import connection
+        
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            if days is None:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s, 0)', [cls.LOCK_NAMESPACE])
+                return
+            cursor.execute('SELECT pg_advisory_xact_lock_shared(%s, 0)', [cls.LOCK_NAMESPACE])
+            # Sorted so refreshes of overlapping dates cannot deadlock
+            for day in sorted(days):
+                cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [cls.LOCK_NAMESPACE, day.toordinal()])
+    
+    @classmethod
+    def _store(cls, sales, existing_facts, days=None):
+        """
+        Aggregate sales per local date and upsert the facts, deleting days left without sales.
+        
+        Runs in one transaction that first takes the refresh lock of the
+        dates (all dates when days is None), so the aggregation sees every
+        sale committed before an earlier refresh of those dates wrote.
+        """
+        from django.db import transaction
+        
+        with transaction.atomic():
+            cls._lock_days(days)
+            facts = cls._aggregate(sales)
+            existing_facts.exclude(date__in=list(facts)).delete()
+            cls.objects.bulk_create(
+                facts.values(),
+                update_conflicts=True,
+                unique_fields=['date'],
+                update_fields=cls.STORED_FIELDS,
+                batch_size=500
+            )
+        return len(facts)
+    
+    @classmethod
+    def _aggregate(cls, sales):
+        """Build unsaved facts per local date from the given sales"""
+        from django.db.models import Count, Q, Sum
+        from django.db.models.functions import TruncDate
+        
+        facts = {}
+        daily_totals = sales.annotate(day=TruncDate('date_of_sale')).values('day').annotate(
+            sales_count=Count('id'),
+            revenue=Sum('grand_total'),
+            tax=Sum('tax_amount'),
+            discounts=Sum('overall_discount'),
+            amount_paid=Sum('amount_paid'),
+            paid_count=Count('id', filter=Q(is_fully_paid=True))
+        ).order_by()
+        for row in daily_totals:
+            facts[row['day']] = cls(
+                date=row['day'],
+                sales_count=row['sales_count'],
+                revenue=row['revenue'] or Decimal('0.00'),
+                tax=row['tax'] or Decimal('0.00'),
+                discounts=row['discounts'] or Decimal('0.00'),
+                amount_paid=row['amount_paid'] or Decimal('0.00'),
+                paid_count=row['paid_count'],
+                unpaid_count=row['sales_count'] - row['paid_count'],
+                payment_methods={}
+            )
+        
+        method_totals = sales.annotate(day=TruncDate('date_of_sale')).values('day', 'payment_method').annotate(
+            count=Count('id'),
+            revenue=Sum('grand_total')
+        ).order_by()
+        for row in method_totals:
+            facts[row['day']].payment_methods[row['payment_method']] = {
+                'count': row['count'],
+                'revenue': str((row['revenue'] or Decimal('0')).quantize(Decimal('0.01')))
+            }
+        
+        item_totals = SaleItem.objects.filter(is_active=True, sale__in=sales).annotate(
+            day=TruncDate('sale__date_of_sale')
+        ).values('day').annotate(items_sold=Sum('quantity')).order_by()
+        for row in item_totals:
+            facts[row['day']].items_sold = row['items_sold'] or 0
+        return facts
+
+    @classmethod
+    def summarize(cls, start_date, end_date):
+        """Get sales totals, payment method split and monthly trends for a date range"""
+        from django.db.models import Sum
+        from django.db.models.functions import TruncMonth
+        
+        facts = cls.objects.filter(date__range=[start_date, end_date])
+        totals = facts.aggregate(
+            sales_count=Sum('sales_count'),
+            items_sold=Sum('items_sold'),
+            revenue=Sum('revenue'),
+            tax=Sum('tax'),
+            discounts=Sum('discounts'),
+            amount_paid=Sum('amount_paid'),
+            paid_count=Sum('paid_count')
+        )
+        
+        payment_methods = {}
+        for methods in facts.values_list('payment_methods', flat=True):
+            for method, bucket in methods.items():
+                total = payment_methods.setdefault(method, {'count': 0, 'revenue': Decimal('0.00')})
+                total['count'] += bucket['count']
+                total['revenue'] += Decimal(bucket['revenue'])
+        
+        monthly_trends = facts.annotate(month=TruncMonth('date')).values('month').annotate(
+            sales_count=Sum('sales_count'),
+            revenue=Sum('revenue')
+        ).order_by('month')
+        
+        return {
+            'sales_count': totals['sales_count'] or 0,
+            'items_sold': totals['items_sold'] or 0,
+            'revenue': totals['revenue'] or Decimal('0.00'),
+            'tax': totals['tax'] or Decimal('0.00'),
+            'discounts': totals['discounts'] or Decimal('0.00'),
+            'amount_paid': totals['amount_paid'] or Decimal('0.00'),
+            'paid_count': totals['paid_count'] or 0,
+            'payment_methods': [
+                {'payment_method': method, 'count': total['count'], 'revenue': total['revenue']}
+                for method, total in sorted(payment_methods.items())
+            ],
+            'monthly_trends': [
+                {'month': row['month'].strftime('%Y-%m'), 'sales_count': row['sales_count'], 'revenue': row['revenue']}
+                for row in monthly_trends
+            ]
+        }
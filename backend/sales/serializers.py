@@ -46,11 +46,12 @@ class SaleItemSerializer(serializers.ModelSerializer):
         if value <= 0:
             raise serializers.ValidationError("Quantity must be greater than zero.")
         
-        # Check if we have a product to validate against
-        if self.instance and self.instance.product:
-            if value > self.instance.product.quantity:
+        # Check additional units against current (not cached) available stock
+        if self.instance and self.instance.product_id:
+            product = Product.objects.get(pk=self.instance.product_id)
+            if value - self.instance.quantity > product.available_quantity:
                 raise serializers.ValidationError(
-                    f"Insufficient stock. Only {self.instance.product.quantity} available."
+                    f"Insufficient stock. Only {product.available_quantity} available."
                 )
         
         return value
@@ -95,9 +96,9 @@ class SaleItemCreateSerializer(serializers.ModelSerializer):
         quantity = attrs.get('quantity', 0)
         unit_price = attrs.get('unit_price', 0)
         
-        if product and quantity > product.quantity:
+        if product and quantity > product.available_quantity:
             raise serializers.ValidationError(
-                f"Insufficient stock. Only {product.quantity} available for {product.name}."
+                f"Insufficient stock. Only {product.available_quantity} available for {product.name}."
             )
         
         if unit_price < 0:
@@ -106,6 +107,13 @@ class SaleItemCreateSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class SaleItemNestedCreateSerializer(SaleItemCreateSerializer):
+    """Serializer for sale items created together with their sale"""
+    
+    class Meta(SaleItemCreateSerializer.Meta):
+        fields = tuple(field for field in SaleItemCreateSerializer.Meta.fields if field != 'sale')
+
+
 class SaleItemUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating sale items"""
     
@@ -120,11 +128,12 @@ class SaleItemUpdateSerializer(serializers.ModelSerializer):
         instance = self.instance
         if instance:
             new_quantity = attrs.get('quantity', instance.quantity)
-            product = instance.product
+            product = Product.objects.get(pk=instance.product_id)
             
-            if new_quantity > product.quantity:
+            # Only the additional units need to come out of current available stock
+            if new_quantity - instance.quantity > product.available_quantity:
                 raise serializers.ValidationError(
-                    f"Insufficient stock. Only {product.quantity} available for {product.name}."
+                    f"Insufficient stock. Only {product.available_quantity} available for {product.name}."
                 )
         
         return attrs
@@ -157,7 +166,7 @@ class SalesSerializer(serializers.ModelSerializer):
     order_id = serializers.UUIDField(source='order_id.id', read_only=True)
     
     # Sale items
-    sale_items = SaleItemSerializer(many=True, read_only=True)
+    sale_items = SaleItemSerializer(source='active_sale_items', many=True, read_only=True)
     
     # Computed fields
     sales_age_days = serializers.IntegerField(read_only=True)
@@ -227,7 +236,7 @@ class SalesSerializer(serializers.ModelSerializer):
 class SalesCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating sales"""
     
-    sale_items = SaleItemCreateSerializer(many=True, required=False)
+    sale_items = SaleItemNestedCreateSerializer(many=True, required=False)
     
     class Meta:
         model = Sales
@@ -260,15 +269,12 @@ class SalesCreateSerializer(serializers.ModelSerializer):
         """Create sale with items"""
         sale_items_data = validated_data.pop('sale_items', [])
         
-        # Create the sale
-        sale = Sales.objects.create(**validated_data)
-        
-        # Create sale items
-        for item_data in sale_items_data:
-            SaleItem.objects.create(sale=sale, **item_data)
-        
-        # Recalculate totals
-        sale.recalculate_totals()
+        # Create the sale with its items and totals in one pass
+        sale = Sales(**validated_data)
+        sale.save_with_items(
+            [SaleItem(**item_data) for item_data in sale_items_data],
+            user=validated_data.get('created_by')
+        )
         
         return sale
 
@@ -412,11 +418,17 @@ class SalesBulkActionSerializer(serializers.Serializer):
 class SalesStatisticsSerializer(serializers.Serializer):
     """Serializer for sales statistics"""
     
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
     total_sales = serializers.IntegerField()
     total_revenue = serializers.DecimalField(max_digits=15, decimal_places=2)
+    total_tax = serializers.DecimalField(max_digits=15, decimal_places=2)
+    total_discounts = serializers.DecimalField(max_digits=15, decimal_places=2)
+    total_amount_paid = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_items_sold = serializers.IntegerField()
     average_sale_value = serializers.DecimalField(max_digits=15, decimal_places=2)
     payment_completion_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
+    payment_methods = serializers.ListField()
     top_products = serializers.ListField()
     top_customers = serializers.ListField()
     monthly_trends = serializers.ListField()
@@ -498,3 +510,60 @@ class OrderToSaleConversionSerializer(serializers.Serializer):
         if value < 0 or value > 100:
             raise serializers.ValidationError("GST percentage must be between 0 and 100.")
         return value
+
+
+class OrderConversionEntrySerializer(serializers.Serializer):
+    """One order of a bulk order to sale conversion"""
+    
+    order_id = serializers.UUIDField(
+        help_text="ID of the order to convert"
+    )
+    amount_paid = serializers.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        min_value=Decimal('0.00'),
+        default=Decimal('0.00'),
+        help_text="Amount paid immediately"
+    )
+    overall_discount = serializers.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        min_value=Decimal('0.00'),
+        default=Decimal('0.00'),
+        help_text="Overall discount to apply"
+    )
+
+
+class BulkOrderToSaleConversionSerializer(serializers.Serializer):
+    """Serializer for converting many orders to sales at once"""
+    
+    # Upper bound on orders per request, keeps the locks short
+    MAX_ORDERS = 100
+    
+    orders = OrderConversionEntrySerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_ORDERS,
+        help_text="Orders to convert, each with its own payment and discount"
+    )
+    payment_method = serializers.ChoiceField(
+        choices=Sales.PAYMENT_METHOD_CHOICES,
+        help_text="Method of payment for every sale"
+    )
+    gst_percentage = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=Decimal('0.00'),
+        max_value=Decimal('100.00'),
+        default=Decimal('17.00'),
+        help_text="GST percentage to apply"
+    )
+    split_payment_details = serializers.JSONField(
+        required=False,
+        help_text="Details for split payments"
+    )
+    notes = serializers.CharField(
+        max_length=1000,
+        required=False,
+        help_text="Additional sale notes"
+    )
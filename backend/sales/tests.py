@@ -0,0 +1,969 @@
+import csv
+import os
+import shutil
+import tempfile
+import uuid
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+from datetime import date, timedelta
+from unittest import skipUnless
+from decimal import Decimal
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction, OperationalError
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from categories.factories import CategoryFactory
+from customers.factories import CustomerFactory
+from orders.models import Order
+from order_items.models import OrderItem
+from posapi.factories import UserFactory
+from products.factories import ProductFactory
+from products.models import Product, ProductSalesRollup
+from .factories import SalesFactory, SaleItemFactory
+from .models import Sales, SaleItem, DailySalesFact, InvoiceSequence, generate_invoice_number
+
+
+def sequence_of(invoice_number):
+    return int(invoice_number.rsplit('-', 1)[1])
+
+
+class InvoiceNumberTest(TestCase):
+    """Test cases for invoice number generation"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.customer = CustomerFactory(created_by=self.user)
+        self.year = date.today().year
+
+    def test_sequence_continues_after_existing_invoices(self):
+        """Test the first number of a year follows the numerically highest existing invoice"""
+        for number in ['9999', '10000']:
+            SalesFactory(customer=self.customer, invoice_number=f'INV-{self.year}-{number}')
+
+        self.assertEqual(generate_invoice_number(), f'INV-{self.year}-10001')
+        sale = SalesFactory(customer=self.customer)
+        self.assertEqual(sale.invoice_number, f'INV-{self.year}-10002')
+
+    def test_rolled_back_number_is_never_issued_twice(self):
+        """Test a rolled-back checkout cannot make a committed invoice number repeat"""
+        first = sequence_of(generate_invoice_number())
+        try:
+            with transaction.atomic():
+                skipped = sequence_of(generate_invoice_number())
+                raise RuntimeError('checkout failed')
+        except RuntimeError:
+            pass
+        after = sequence_of(generate_invoice_number())
+
+        self.assertEqual(skipped, first + 1)
+        if connection.vendor == 'postgresql':
+            # Sequence values are not transactional: the rolled-back number is a gap
+            self.assertEqual(after, skipped + 1)
+        else:
+            # The counter row rolls back with the failed checkout, so nothing was skipped
+            self.assertEqual(after, skipped)
+
+
+class RecalculateTotalsTest(TestCase):
+    """Test cases for database-side sale total recalculation"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.product = ProductFactory(quantity=100, category=category)
+
+    def _create_sale(self, line_totals, **fields):
+        sale = SalesFactory(customer=self.customer, gst_percentage=Decimal('17.00'), **fields)
+        SaleItem.objects.bulk_create([
+            SaleItem(
+                sale=sale,
+                product=self.product,
+                product_name=self.product.name,
+                unit_price=Decimal(line_total),
+                quantity=1,
+                line_total=Decimal(line_total)
+            )
+            for line_total in line_totals
+        ])
+        return sale
+
+    def test_recalculate_totals_in_one_update(self):
+        """Test totals come from active items only and are written by a single statement"""
+        sale = self._create_sale(['100.00', '33.33'])
+        SaleItem.objects.filter(sale=sale, line_total=Decimal('33.33')).update(is_active=False)
+        Sales.objects.filter(pk=sale.pk).update(overall_discount=Decimal('10.00'), amount_paid=Decimal('105.30'))
+        sale.refresh_from_db()
+
+        with self.assertNumQueries(2):
+            sale.recalculate_totals()
+
+        self.assertEqual(sale.subtotal, Decimal('100.00'))
+        self.assertEqual(sale.tax_amount, Decimal('15.30'))
+        self.assertEqual(sale.grand_total, Decimal('105.30'))
+        self.assertEqual(sale.remaining_amount, Decimal('0.00'))
+        self.assertTrue(sale.is_fully_paid)
+
+        # The in-memory calculation used by save() agrees with the database
+        sale.calculate_totals()
+        self.assertEqual((sale.tax_amount, sale.grand_total), (Decimal('15.30'), Decimal('105.30')))
+
+    def test_batch_recalculation(self):
+        """Test a queryset of sales is recalculated with one UPDATE"""
+        first = self._create_sale(['100.00'])
+        second = self._create_sale(['50.00', '50.00'], amount_paid=Decimal('0.00'))
+
+        with self.assertNumQueries(1):
+            updated = Sales.objects.filter(pk__in=[first.pk, second.pk]).recalculate_totals()
+
+        self.assertEqual(updated, 2)
+        for sale in (first, second):
+            sale.refresh_from_db()
+            self.assertEqual(sale.grand_total, Decimal('117.00'))
+            self.assertEqual(sale.remaining_amount, Decimal('117.00'))
+            self.assertFalse(sale.is_fully_paid)
+
+
+class DailySalesFactTest(TestCase):
+    """Test cases for the precomputed daily sales facts and the statistics endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.product = ProductFactory(quantity=100, category=category)
+        self.today = timezone.localdate()
+
+    def _create_sale(self, quantity, payment_method='CASH', when=None, amount_paid='0.00'):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = SalesFactory.build(
+                customer=self.customer,
+                date_of_sale=when or timezone.now(),
+                gst_percentage=Decimal('0.00'),
+                amount_paid=Decimal(amount_paid),
+                payment_method=payment_method
+            )
+            sale.save_with_items([SaleItemFactory.build(product=self.product, quantity=quantity)], user=self.user)
+        return sale
+
+    def test_facts_follow_committed_sales(self):
+        """Test facts are refreshed when sales commit, move to another day or are soft deleted"""
+        sale = self._create_sale(2, amount_paid='200.00')
+        self._create_sale(1, payment_method='CARD')
+
+        fact = DailySalesFact.objects.get(date=self.today)
+        self.assertEqual((fact.sales_count, fact.items_sold, fact.paid_count, fact.unpaid_count), (2, 3, 1, 1))
+        self.assertEqual(fact.revenue, Decimal('300.00'))
+        self.assertEqual(fact.payment_methods['CARD'], {'count': 1, 'revenue': '100.00'})
+
+        sale = Sales.objects.get(pk=sale.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.date_of_sale = timezone.now() - timedelta(days=3)
+            sale.save()
+        self.assertEqual(DailySalesFact.objects.get(date=self.today).sales_count, 1)
+        self.assertEqual(DailySalesFact.objects.get(date=self.today - timedelta(days=3)).items_sold, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.is_active = False
+            sale.save()
+        self.assertFalse(DailySalesFact.objects.filter(date=self.today - timedelta(days=3)).exists())
+
+    def test_rebuild_matches_incremental_facts(self):
+        """Test the rebuild command reproduces the incrementally maintained facts"""
+        self._create_sale(2)
+        self._create_sale(4, when=timezone.now() - timedelta(days=40))
+        incremental = list(DailySalesFact.objects.values())
+
+        DailySalesFact.objects.all().delete()
+        call_command('rebuild_daily_sales_facts', stdout=StringIO())
+
+        rebuilt = list(DailySalesFact.objects.values())
+        for row in incremental + rebuilt:
+            row.pop('updated_at')
+        self.assertEqual(rebuilt, incremental)
+
+    def test_statistics_read_facts_by_month(self):
+        """Test statistics cover an arbitrary range with months of different years kept apart"""
+        last_year = timezone.now() - timedelta(days=365)
+        self._create_sale(1, when=last_year)
+        self._create_sale(2)
+        self._create_sale(3, payment_method='CARD')
+
+        url = reverse('sales:sales_statistics')
+        params = {'start_date': (self.today - timedelta(days=400)).isoformat(), 'end_date': self.today.isoformat()}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+
+        data = response.data['data']
+        self.assertEqual(data['total_sales'], 3)
+        self.assertEqual(data['total_items_sold'], 6)
+        self.assertEqual(Decimal(data['total_revenue']), Decimal('600.00'))
+        self.assertEqual(
+            [(row['month'], row['sales_count']) for row in data['monthly_trends']],
+            [(last_year.strftime('%Y-%m'), 1), (self.today.strftime('%Y-%m'), 2)]
+        )
+        self.assertEqual(
+            [(row['payment_method'], row['count']) for row in data['payment_methods']],
+            [('CARD', 1), ('CASH', 2)]
+        )
+
+        response = self.client.get(url, {'days': 7})
+        self.assertEqual(response.data['data']['total_sales'], 2)
+
+        response = self.client.get(url, {'start_date': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_statistics_query_count_does_not_grow_with_sales(self):
+        """Test the headline statistics cost the same number of queries for more sales"""
+        url = reverse('sales:sales_statistics')
+        self._create_sale(1)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+
+        for _ in range(5):
+            self._create_sale(1, when=timezone.now() - timedelta(days=2))
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+
+        self.assertEqual(len(many), len(few))
+
+
+class DailySalesFactConcurrencyTest(TransactionTestCase):
+    """Test concurrent refreshes of the same day's sales facts"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.customer = CustomerFactory(created_by=self.user)
+        self.today = timezone.localdate()
+
+    def _insert_sale(self, grand_total):
+        # bulk_create skips the post-commit refresh, so the test controls when it runs
+        return Sales.objects.bulk_create([Sales(
+            customer=self.customer,
+            customer_name=self.customer.name,
+            invoice_number=generate_invoice_number(),
+            date_of_sale=timezone.now(),
+            subtotal=Decimal(grand_total),
+            grand_total=Decimal(grand_total),
+            remaining_amount=Decimal(grand_total),
+            created_by=self.user
+        )])[0]
+
+    @skipUnless(connection.vendor == 'postgresql', 'Refreshes are serialized with PostgreSQL advisory locks')
+    def test_refresh_waits_for_running_refresh_of_the_day(self):
+        """Test a refresh aggregates only once an earlier refresh of the same day has finished"""
+        self._insert_sale('100.00')
+        locked = threading.Event()
+        release = threading.Event()
+        finished = threading.Event()
+
+        def hold_day_lock():
+            try:
+                with transaction.atomic():
+                    DailySalesFact._lock_days({self.today})
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        def refresh():
+            try:
+                DailySalesFact.refresh_days({self.today})
+                finished.set()
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_day_lock)
+        holder.start()
+        self.assertTrue(locked.wait(10))
+        refresher = threading.Thread(target=refresh)
+        refresher.start()
+
+        # The waiting refresh has not aggregated yet, so it picks up a sale committed now
+        self.assertFalse(finished.wait(0.5))
+        self._insert_sale('50.00')
+        release.set()
+        holder.join()
+        refresher.join()
+
+        fact = DailySalesFact.objects.get(date=self.today)
+        self.assertEqual((fact.sales_count, fact.revenue), (2, Decimal('150.00')))
+
+
+class SalesExportTest(TestCase):
+    """Test cases for the streaming sales CSV export"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(city='Lahore', created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.products = ProductFactory.create_batch(2, category=category)
+
+    def _create_sale(self, products, **fields):
+        sale = SalesFactory.build(customer=self.customer, **fields)
+        sale.save_with_items([SaleItemFactory.build(product=product) for product in products], user=self.user)
+        return sale
+
+    def _export(self, params=None):
+        response = self.client.get(reverse('sales:export_sales'), params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content).decode()
+        return list(csv.DictReader(StringIO(content)))
+
+    def test_export_streams_one_row_per_item(self):
+        """Test every active item is exported with its sale and customer, in one query"""
+        with_items = self._create_sale(self.products)
+        SaleItem.objects.filter(sale=with_items, product=self.products[1]).update(is_active=False)
+        self._create_sale(self.products)
+        empty = self._create_sale([])
+
+        rows = self._export()
+        self.assertEqual(len(rows), 4)
+        self.assertEqual([row['Invoice Number'] for row in rows].count(with_items.invoice_number), 1)
+        self.assertEqual(rows[0]['Customer City'], 'Lahore')
+        self.assertEqual(rows[0]['Product'], self.products[0].name)
+        empty_row = next(row for row in rows if row['Invoice Number'] == empty.invoice_number)
+        self.assertEqual(empty_row['Product'], '')
+
+    def test_export_uses_list_filters(self):
+        """Test the export honours the list_sales filter parameters"""
+        self._create_sale(self.products[:1], payment_method='CARD')
+        self._create_sale(self.products[:1])
+
+        rows = self._export({'payment_method': 'card'})
+        self.assertEqual([row['Payment Method'] for row in rows], ['CARD'])
+
+
+class SalesDetailQueryTest(TestCase):
+    """Test sale detail and history responses load in a fixed number of queries"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.products = ProductFactory.create_batch(4, category=category)
+
+    def _create_sale(self, products):
+        sale = SalesFactory.build(customer=self.customer)
+        sale.save_with_items([SaleItemFactory.build(product=product) for product in products], user=self.user)
+        return sale
+
+    def test_get_sale_query_count(self):
+        """Test a sale's detail is loaded in two queries and lists only active items"""
+        sale = self._create_sale(self.products)
+        SaleItem.objects.filter(sale=sale, product=self.products[0]).update(is_active=False)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('sales:get_sale', args=[sale.id]))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        self.assertEqual(data['total_items'], 3)
+        self.assertEqual(
+            sorted(item['product_id'] for item in data['sale_items']),
+            sorted(str(product.id) for product in self.products[1:])
+        )
+        self.assertEqual(data['customer_id'], str(self.customer.id))
+        self.assertEqual(data['authorized_initials'], 'TU')
+
+    def test_customer_history_query_count_does_not_grow_with_sales(self):
+        """Test the customer history needs the same queries for one sale or many"""
+        url = reverse('sales:customer_sales_history', args=[self.customer.id])
+        self._create_sale(self.products[:1])
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(url)
+
+        for product in self.products[1:]:
+            self._create_sale([product, self.products[0]])
+        with CaptureQueriesContext(connection) as several:
+            response = self.client.get(url)
+
+        self.assertEqual(len(several), len(single))
+        self.assertEqual(response.data['data']['total_sales'], 4)
+        self.assertEqual(
+            sorted(sale['total_items'] for sale in response.data['data']['sales']),
+            [1, 2, 2, 2]
+        )
+
+
+class BulkOrderConversionTest(TestCase):
+    """Test cases for converting many orders to sales in one request"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.products = ProductFactory.create_batch(2, quantity=50, category=category)
+
+    def _create_order(self, quantities, status='READY'):
+        order = Order.objects.bulk_create([Order(
+            customer=self.customer,
+            customer_name=self.customer.name,
+            customer_phone=self.customer.phone,
+            status=status,
+            date_ordered=date.today(),
+            created_by=self.user
+        )])[0]
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=product,
+                product_name=product.name,
+                quantity=quantity,
+                unit_price=product.price,
+                line_total=product.price * quantity
+            )
+            for product, quantity in zip(self.products, quantities)
+        ])
+        Order.objects.filter(pk=order.pk).recalculate_totals()
+        return order
+
+    def _convert(self, orders, **fields):
+        payload = {
+            'orders': [{'order_id': str(order_id)} for order_id in orders],
+            'payment_method': 'CASH',
+            'gst_percentage': '10.00',
+            **fields
+        }
+        return self.client.post(reverse('sales:create_from_orders'), payload, format='json')
+
+    def test_converts_orders_and_reports_failures(self):
+        """Test eligible orders become confirmed sales and the rest are reported"""
+        ready = [self._create_order([2, 1]), self._create_order([3])]
+        pending = self._create_order([1], status='PENDING')
+        missing = uuid.uuid4()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._convert([order.pk for order in ready] + [pending.pk, missing, ready[0].pk])
+
+        self.assertEqual(response.status_code, 201)
+        data = response.data['data']
+        self.assertEqual((data['converted_count'], data['failed_count']), (2, 3))
+        self.assertEqual([result['success'] for result in data['results']], [True, True, False, False, False])
+        self.assertIn('READY or DELIVERED', data['results'][2]['errors'][0])
+        self.assertEqual(data['results'][3]['errors'], ['Order not found or inactive.'])
+        self.assertEqual(data['results'][4]['errors'], ['Order is listed more than once.'])
+
+        sale = Sales.objects.get(order_id=ready[0])
+        self.assertEqual(sale.status, 'CONFIRMED')
+        self.assertEqual(sale.customer_name, self.customer.name)
+        self.assertEqual(sale.subtotal, Decimal('300.00'))
+        self.assertEqual(sale.grand_total, Decimal('330.00'))
+        self.assertEqual(sale.sale_items.count(), 2)
+
+        self.products[0].refresh_from_db()
+        self.assertEqual((self.products[0].quantity, self.products[0].reserved_quantity), (45, 0))
+        self.assertEqual(
+            set(sale.stock_reservations.values_list('status', flat=True)),
+            {'COMMITTED'}
+        )
+        self.assertEqual(ProductSalesRollup.objects.get(product=self.products[0]).quantity_sold, 5)
+
+        for order in ready:
+            order.refresh_from_db()
+            self.assertEqual(order.conversion_status, 'FULLY_CONVERTED')
+            self.assertIsNotNone(order.conversion_date)
+        pending.refresh_from_db()
+        self.assertEqual(pending.conversion_status, 'NOT_CONVERTED')
+
+        self.assertEqual(DailySalesFact.objects.get(date=timezone.localdate()).sales_count, 2)
+        self.customer.refresh_from_db()
+        self.assertIsNotNone(self.customer.last_order_date)
+
+    def test_orders_compete_for_stock(self):
+        """Test an order that would oversell stock fails alone"""
+        Product.objects.filter(pk=self.products[0].pk).update(quantity=8)
+        first, second = self._create_order([5]), self._create_order([5])
+
+        response = self._convert([first.pk, second.pk])
+
+        self.assertEqual(response.status_code, 201)
+        results = response.data['data']['results']
+        self.assertTrue(results[0]['success'])
+        self.assertEqual(results[1]['errors'], [f'Insufficient stock. Only 3 available for {self.products[0].name}.'])
+        self.assertFalse(Sales.objects.filter(order_id=second).exists())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].quantity, 3)
+
+    def test_nothing_converted_is_a_bad_request(self):
+        """Test a batch with no convertible order returns 400"""
+        order = self._create_order([1])
+        self._convert([order.pk])
+
+        response = self._convert([order.pk])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['data']['results'][0]['errors'],
+            ['This order has already been converted to a sale.']
+        )
+
+    def test_query_count_does_not_grow_per_item(self):
+        """Test the batch writes sales, items and stock in batches"""
+        # Start the year's invoice counter so both batches take the same path
+        generate_invoice_number()
+        small = [self._create_order([1, 1]) for _ in range(2)]
+        with CaptureQueriesContext(connection) as two_orders:
+            self._convert([order.pk for order in small])
+
+        large = [self._create_order([1, 1]) for _ in range(6)]
+        with CaptureQueriesContext(connection) as six_orders:
+            response = self._convert([order.pk for order in large])
+
+        self.assertEqual(response.data['data']['converted_count'], 6)
+        sale_inserts = [query for query in six_orders if query['sql'].startswith('INSERT INTO "sales" ')]
+        self.assertEqual(len(sale_inserts), 1)
+        # Only invoice numbers are handed out per sale
+        self.assertEqual(
+            len(self._batch_queries(six_orders)),
+            len(self._batch_queries(two_orders))
+        )
+
+    def _batch_queries(self, queries):
+        return [
+            query for query in queries
+            if not any(marker in query['sql'] for marker in ('invoice_sequence', 'nextval', 'SAVEPOINT'))
+        ]
+
+
+class InvoiceNumberConcurrencyTest(TransactionTestCase):
+    """Test invoice numbers under concurrent checkouts"""
+
+    def setUp(self):
+        """Start every test from a fresh sequence, which a flush does not reset"""
+        self.year = date.today().year
+        self._drop_sequence()
+
+    def tearDown(self):
+        self._drop_sequence()
+
+    def _drop_sequence(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP SEQUENCE IF EXISTS sales_invoice_number_{self.year}')
+
+    def _allocate_on_new_connection(self):
+        numbers = []
+
+        def allocate():
+            try:
+                numbers.append(sequence_of(generate_invoice_number()))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=allocate)
+        thread.start()
+        thread.join()
+        return numbers[0]
+
+    @skipUnless(connection.vendor == 'postgresql', 'Invoice numbers come from a database sequence on PostgreSQL only')
+    def test_database_sequence_is_not_cached_per_connection(self):
+        """Test numbers stay consecutive when every checkout uses a new connection"""
+        numbers = [sequence_of(generate_invoice_number())]
+        numbers += [self._allocate_on_new_connection() for _ in range(3)]
+        numbers.append(sequence_of(generate_invoice_number()))
+
+        self.assertEqual(numbers, [1, 2, 3, 4, 5])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT cache_size FROM pg_sequences WHERE sequencename = %s',
+                [f'sales_invoice_number_{self.year}']
+            )
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_concurrent_generation_is_unique(self):
+        """Test many threads allocating numbers never collide or leave gaps"""
+        year = self.year
+        numbers = []
+        errors = []
+        lock = threading.Lock()
+
+        def allocate(count):
+            try:
+                for _ in range(count):
+                    for _ in range(500):
+                        try:
+                            number = generate_invoice_number()
+                            break
+                        except OperationalError:
+                            # SQLite reports write contention instead of blocking
+                            time.sleep(0.01)
+                    else:
+                        with lock:
+                            errors.append('gave up')
+                        return
+                    with lock:
+                        numbers.append(number)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=allocate, args=(10,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(numbers), 80)
+        self.assertEqual(len(set(numbers)), 80)
+        self.assertTrue(all(number.startswith(f'INV-{year}-') for number in numbers))
+        sequences = sorted(sequence_of(number) for number in numbers)
+        self.assertEqual(sequences, list(range(1, 81)))
+        if connection.vendor != 'postgresql':
+            self.assertEqual(InvoiceSequence.objects.get(pk=year).last_number, 80)
+
+
+class SaleWriteQueryTest(TestCase):
+    """Test the number of queries and saves needed to create a sale"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.products = ProductFactory.create_batch(3, category=category)
+
+    # Upper bounds cover the invoice number, the per-product stock updates
+    # and the response; the sale row itself is written once
+
+    def _sale_writes(self, queries):
+        return [
+            query for query in queries
+            if query['sql'].startswith(('INSERT INTO "sales" ', 'UPDATE "sales" '))
+        ]
+
+    def test_create_sale_query_count(self):
+        """Test creating a sale writes the sale row once and queues one follow-up"""
+        payload = {
+            'customer': str(self.customer.id),
+            'overall_discount': '50.00',
+            'gst_percentage': '10.00',
+            'amount_paid': '0.00',
+            'payment_method': 'CASH',
+            'sale_items': [
+                {'product': str(product.id), 'unit_price': '100.00', 'quantity': 2}
+                for product in self.products
+            ]
+        }
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse('sales:create_sale'), payload, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(self._sale_writes(queries.captured_queries)), 1)
+        self.assertLessEqual(len(queries), 50)
+        # Shared version bumps also run on commit, one per data version
+        self.assertEqual(len([callback for callback in callbacks if not hasattr(callback, 'version_key')]), 1)
+
+        sale = Sales.objects.get(pk=response.data['data']['id'])
+        self.assertEqual(sale.subtotal, Decimal('600.00'))
+        self.assertEqual(sale.tax_amount, Decimal('55.00'))
+        self.assertEqual(sale.grand_total, Decimal('605.00'))
+        self.assertEqual(sale.remaining_amount, Decimal('605.00'))
+        self.assertFalse(sale.is_fully_paid)
+
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.last_order_date, sale.date_of_sale)
+
+    def test_wholesale_invoice_inserts_items_in_one_batch(self):
+        """Test a many-line invoice inserts its items and updates rollups and stock per batch, not per line"""
+        payload = {
+            'customer': str(self.customer.id),
+            'gst_percentage': '0.00',
+            'payment_method': 'CASH',
+            'sale_items': [
+                {'product': str(self.products[index % 3].id), 'unit_price': '100.00', 'quantity': 1}
+                for index in range(24)
+            ]
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('sales:create_sale'), payload, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "sale_item"')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "stock_reservation"')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE "product" ')]), 3)
+        self.assertEqual(Decimal(response.data['data']['grand_total']), Decimal('2400.00'))
+
+        for product in self.products:
+            product.refresh_from_db()
+            self.assertEqual(product.reserved_quantity, 8)
+            self.assertEqual(ProductSalesRollup.objects.get(product=product).quantity_sold, 8)
+
+    def test_create_from_order_query_count(self):
+        """Test converting an order writes the sale row once"""
+        # Orders are bulk created so the test does not depend on Order.save()
+        order = Order.objects.bulk_create([Order(
+            customer=self.customer,
+            customer_name=self.customer.name,
+            customer_phone=self.customer.phone,
+            total_amount=Decimal('600.00'),
+            remaining_amount=Decimal('600.00'),
+            date_ordered=date.today(),
+            status='READY',
+            created_by=self.user
+        )])[0]
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=product,
+                product_name=product.name,
+                quantity=2,
+                unit_price=product.price,
+                line_total=product.price * 2
+            )
+            for product in self.products
+        ])
+        payload = {
+            'order_id': str(order.id),
+            'payment_method': 'CASH',
+            'gst_percentage': '0.00'
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('sales:create_from_order'), payload, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(self._sale_writes(queries.captured_queries)), 1)
+        self.assertLessEqual(len(queries), 65)
+        self.assertEqual(Decimal(response.data['data']['grand_total']), Decimal('600.00'))
+
+
+class IdempotencyKeyTest(TestCase):
+    """Test retried sale writes carrying an Idempotency-Key"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.customer = CustomerFactory(created_by=self.user)
+        category = CategoryFactory(created_by=self.user)
+        self.product = ProductFactory(category=category)
+
+    def _payload(self, quantity=1):
+        return {
+            'customer': str(self.customer.id),
+            'gst_percentage': '0.00',
+            'payment_method': 'CASH',
+            'sale_items': [{'product': str(self.product.id), 'unit_price': '100.00', 'quantity': quantity}]
+        }
+
+    def _create_sale(self, payload, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(reverse('sales:create_sale'), payload, format='json', **headers)
+
+    def test_retry_replays_original_sale(self):
+        """Test a retried checkout returns the first response without creating a second sale"""
+        first = self._create_sale(self._payload(), key='checkout-1')
+
+        with CaptureQueriesContext(connection) as queries:
+            retry = self._create_sale(self._payload(), key='checkout-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertFalse(first.has_header('Idempotent-Replayed'))
+        # Only authentication may touch the database on a replay
+        self.assertFalse([query for query in queries.captured_queries if 'sales' in query['sql']])
+        self.assertEqual(Sales.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_quantity, 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        """Test plain POSTs still create one sale each"""
+        self._create_sale(self._payload())
+        self._create_sale(self._payload())
+
+        self.assertEqual(Sales.objects.count(), 2)
+
+    def test_key_reused_with_different_payload_is_rejected(self):
+        """Test a key cannot replay a response for a different request"""
+        self._create_sale(self._payload(), key='checkout-1')
+
+        response = self._create_sale(self._payload(quantity=2), key='checkout-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Sales.objects.count(), 1)
+
+    def test_failed_request_can_be_retried(self):
+        """Test failures are not stored, so a corrected retry with the same key runs"""
+        invalid = self._payload()
+        invalid['customer'] = str(uuid.uuid4())
+        self.assertEqual(self._create_sale(invalid, key='checkout-1').status_code, 400)
+
+        self.assertEqual(self._create_sale(self._payload(), key='checkout-1').status_code, 201)
+        self.assertEqual(Sales.objects.count(), 1)
+
+    def test_keys_are_scoped_to_the_endpoint(self):
+        """Test the same client key on two sales records a payment on each"""
+        sales = [
+            Sales.objects.get(pk=self._create_sale(self._payload()).data['data']['id'])
+            for _ in range(2)
+        ]
+        payment = {'amount': '40.00', 'payment_method': 'CASH'}
+
+        for sale in sales:
+            for _ in range(2):
+                response = self.client.post(
+                    reverse('sales:add_payment', args=[sale.id]), payment, format='json',
+                    HTTP_IDEMPOTENCY_KEY='payment-1'
+                )
+                self.assertEqual(response.status_code, 200, response.data)
+
+        for sale in sales:
+            sale.refresh_from_db()
+            self.assertEqual(sale.amount_paid, Decimal('40.00'))
+
+    def test_keys_are_shared_between_workers(self):
+        """Test keys are not kept in the per-process cache, so any worker can replay them"""
+        first = self._create_sale(self._payload(), key='checkout-1')
+        # Another worker starts with an empty local-memory cache
+        cache.clear()
+
+        retry = self._create_sale(self._payload(), key='checkout-1')
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Sales.objects.count(), 1)
+
+    def test_expired_lock_taken_by_retry_is_not_released(self):
+        """Test a slow request only deletes the in-flight lock if it still owns it"""
+        from rest_framework.decorators import api_view, permission_classes
+        from rest_framework.permissions import IsAuthenticated
+        from rest_framework.response import Response
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from core.idempotency import cache as idempotency_cache, idempotent, _cache_key
+
+        lock_keys = []
+
+        @api_view(['POST'])
+        @permission_classes([IsAuthenticated])
+        @idempotent
+        def slow_view(request):
+            # Our lock expires mid-request and a retry acquires it
+            lock_key = f'{_cache_key(request, "checkout-1")}_lock'
+            idempotency_cache.set(lock_key, 'retry-token')
+            lock_keys.append(lock_key)
+            return Response({'success': True}, status=201)
+
+        request = APIRequestFactory().post('/slow/', {}, format='json', HTTP_IDEMPOTENCY_KEY='checkout-1')
+        force_authenticate(request, user=self.user)
+
+        self.assertEqual(slow_view(request).status_code, 201)
+        self.assertEqual(idempotency_cache.get(lock_keys[0]), 'retry-token')
+
+    def test_in_flight_key_conflicts(self):
+        """Test a retry arriving while the first request still runs gets 409"""
+        with patch('core.idempotency.cache.add', return_value=False):
+            response = self._create_sale(self._payload(), key='checkout-1')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Sales.objects.count(), 0)
+
+
+class SaleInvoiceTest(TestCase):
+    """Test the cached invoice PDF endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(INVOICE_CACHE_DIR=self.cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        product = ProductFactory(category=CategoryFactory(created_by=self.user))
+        self.sale = SalesFactory.build(customer=CustomerFactory(created_by=self.user), gst_percentage=Decimal('0.00'))
+        self.sale.save_with_items([SaleItemFactory.build(product=product, quantity=2)])
+
+    def _get_invoice(self):
+        return self.client.get(reverse('sales:sale_invoice', args=[self.sale.id]))
+
+    def test_first_print_renders_pdf(self):
+        """Test the invoice is rendered as a PDF named after the invoice number"""
+        response = self._get_invoice()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn(f'{self.sale.invoice_number}.pdf', response['Content-Disposition'])
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_default_cache_dir_is_not_publicly_served(self):
+        """Test invoices are not cached under the unauthenticated MEDIA_ROOT by default"""
+        from django.conf import settings
+        from .invoices import invoice_cache_dir
+
+        with self.settings():
+            del settings.INVOICE_CACHE_DIR
+            cache_dir = os.path.realpath(invoice_cache_dir())
+        media_root = os.path.realpath(settings.MEDIA_ROOT)
+
+        self.assertNotEqual(os.path.commonpath([cache_dir, media_root]), media_root)
+
+    def test_reprint_is_served_from_disk(self):
+        """Test a reprint neither loads the sale nor renders again"""
+        first = b''.join(self._get_invoice().streaming_content)
+
+        with patch('sales.invoices.render_invoice_pdf') as render:
+            with CaptureQueriesContext(connection) as queries:
+                response = self._get_invoice()
+            reprint = b''.join(response.streaming_content)
+
+        render.assert_not_called()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(reprint, first)
+
+    def test_changed_sale_is_rendered_again(self):
+        """Test an edited sale gets a new invoice and the old version is removed"""
+        self._get_invoice()
+        self.sale.amount_paid = Decimal('200.00')
+        self.sale.save()
+
+        with patch('sales.invoices.render_invoice_pdf', return_value=b'%PDF-updated') as render:
+            response = self._get_invoice()
+            content = b''.join(response.streaming_content)
+
+        render.assert_called_once()
+        self.assertEqual(content, b'%PDF-updated')
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_inactive_sale_is_not_found(self):
+        """Test soft-deleted sales have no invoice"""
+        Sales.objects.filter(pk=self.sale.pk).update(is_active=False)
+
+        self.assertEqual(self._get_invoice().status_code, 404)
@@ -6,8 +6,10 @@ app_name = 'sales'
 urlpatterns = [
     # Sales endpoints
     path('', views.list_sales, name='list_sales'),
+    path('export/', views.export_sales, name='export_sales'),
     path('create/', views.create_sale, name='create_sale'),
     path('<uuid:sale_id>/', views.get_sale, name='get_sale'),
+    path('<uuid:sale_id>/invoice/', views.sale_invoice, name='sale_invoice'),
     path('<uuid:sale_id>/update/', views.update_sale, name='update_sale'),
     path('<uuid:sale_id>/delete/', views.delete_sale, name='delete_sale'),
     path('<uuid:sale_id>/add-payment/', views.add_payment, name='add_payment'),
@@ -21,6 +23,7 @@ urlpatterns = [
     
     # Order conversion
     path('create-from-order/', views.create_from_order, name='create_from_order'),
+    path('create-from-orders/', views.create_from_orders, name='create_from_orders'),
     
     # Sale items endpoints
     path('items/', views.list_sale_items, name='list_sale_items'),
@@ -3,83 +3,111 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Sum, Count
+from django.db.models import Q, Sum, Count, FilteredRelation
+from django.http import StreamingHttpResponse, FileResponse
+from django.conf import settings
+from django.utils import timezone
+from datetime import datetime, timedelta
+from concurrent.futures import TimeoutError as RenderTimeoutError
 from decimal import Decimal
-from .models import Sales, SaleItem
+import csv
+from .models import Sales, SaleItem, DailySalesFact
+from .invoices import cached_invoice_path, submit_invoice_render
 from .serializers import (
     SalesSerializer, SalesCreateSerializer, SalesUpdateSerializer, SalesListSerializer,
     SaleItemSerializer, SaleItemCreateSerializer, SaleItemUpdateSerializer, SaleItemListSerializer,
     SalesPaymentSerializer, SalesStatusUpdateSerializer, SalesBulkActionSerializer,
-    SalesStatisticsSerializer, OrderToSaleConversionSerializer
+    SalesStatisticsSerializer, OrderToSaleConversionSerializer, BulkOrderToSaleConversionSerializer
 )
 from customers.models import Customer
 from products.models import Product
 from orders.models import Order
 from order_items.models import OrderItem
+from core.pagination import is_cursor_request, cursor_paginate
+from core.idempotency import idempotent
 
 
 # Function-based views for Sales
 
+def _filter_sales(request):
+    """Apply the list_sales search and filter query parameters to the sales queryset"""
+    # Search and filter parameters
+    show_inactive = request.GET.get('show_inactive', 'false').lower() == 'true'
+    search = request.GET.get('search', '').strip()
+    status_filter = request.GET.get('status', '').strip()
+    customer_id = request.GET.get('customer_id', '').strip()
+    payment_method = request.GET.get('payment_method', '').strip()
+    date_from = request.GET.get('date_from', '').strip()
+    date_to = request.GET.get('date_to', '').strip()
+    
+    # Base queryset
+    if show_inactive:
+        sales = Sales.objects.all()
+    else:
+        sales = Sales.objects.active()
+    
+    # Apply filters
+    if search:
+        sales = sales.search(search)
+    
+    if status_filter:
+        sales = sales.by_status(status_filter)
+    
+    if customer_id:
+        sales = sales.by_customer(customer_id)
+    
+    if payment_method:
+        sales = sales.by_payment_method(payment_method)
+    
+    if date_from and date_to:
+        sales = sales.by_date_range(date_from, date_to)
+    
+    return sales
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_sales(request):
     """List all sales with filtering, search, and pagination"""
     try:
         # Get query parameters
-        show_inactive = request.GET.get('show_inactive', 'false').lower() == 'true'
         page_size = min(int(request.GET.get('page_size', 20)), 100)
         page = int(request.GET.get('page', 1))
         
-        # Search and filter parameters
-        search = request.GET.get('search', '').strip()
-        status_filter = request.GET.get('status', '').strip()
-        customer_id = request.GET.get('customer_id', '').strip()
-        payment_method = request.GET.get('payment_method', '').strip()
-        date_from = request.GET.get('date_from', '').strip()
-        date_to = request.GET.get('date_to', '').strip()
-        
-        # Base queryset
-        if show_inactive:
-            sales = Sales.objects.all()
-        else:
-            sales = Sales.objects.active()
-        
-        # Apply filters
-        if search:
-            sales = sales.search(search)
-        
-        if status_filter:
-            sales = sales.by_status(status_filter)
-        
-        if customer_id:
-            sales = sales.by_customer(customer_id)
+        sales = _filter_sales(request)
         
-        if payment_method:
-            sales = sales.by_payment_method(payment_method)
-        
-        if date_from and date_to:
-            sales = sales.by_date_range(date_from, date_to)
-        
-        # Pagination
-        start = (page - 1) * page_size
-        end = start + page_size
-        total_count = sales.count()
+        # Pagination (keyset when ?cursor= is given)
+        if is_cursor_request(request):
+            sales_page, pagination = cursor_paginate(request, sales, page_size)
+        else:
+            start = (page - 1) * page_size
+            end = start + page_size
+            total_count = sales.count()
+            
+            sales_page = sales[start:end]
+            pagination = {
+                'page': page,
+                'page_size': page_size,
+                'total_count': total_count,
+                'total_pages': (total_count + page_size - 1) // page_size
+            }
         
-        sales_page = sales[start:end]
         serializer = SalesListSerializer(sales_page, many=True)
         
         return Response({
             'success': True,
             'data': serializer.data,
-            'pagination': {
-                'page': page,
-                'page_size': page_size,
-                'total_count': total_count,
-                'total_pages': (total_count + page_size - 1) // page_size
-            }
+            'pagination': pagination
         }, status=status.HTTP_200_OK)
         
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid pagination parameters.',
+            'errors': {'detail': str(e)}
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'success': False,
@@ -88,8 +116,80 @@ def list_sales(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class _Echo:
+    """File-like object whose write() hands the formatted CSV line back to the caller"""
+    
+    def write(self, value):
+        return value
+
+
+# Columns of the sales export: one row per active sale item, sales without items get one row
+SALES_EXPORT_COLUMNS = [
+    ('Invoice Number', 'invoice_number'),
+    ('Date of Sale', 'date_of_sale'),
+    ('Status', 'status'),
+    ('Customer Name', 'customer_name'),
+    ('Customer Phone', 'customer_phone'),
+    ('Customer Email', 'customer_email'),
+    ('Customer City', 'customer__city'),
+    ('Payment Method', 'payment_method'),
+    ('Subtotal', 'subtotal'),
+    ('Overall Discount', 'overall_discount'),
+    ('GST %', 'gst_percentage'),
+    ('Tax Amount', 'tax_amount'),
+    ('Grand Total', 'grand_total'),
+    ('Amount Paid', 'amount_paid'),
+    ('Remaining Amount', 'remaining_amount'),
+    ('Product', 'active_items__product_name'),
+    ('Quantity', 'active_items__quantity'),
+    ('Unit Price', 'active_items__unit_price'),
+    ('Item Discount', 'active_items__item_discount'),
+    ('Line Total', 'active_items__line_total'),
+]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_sales(request):
+    """
+    Stream sales with their items and customers as CSV.
+    
+    Accepts the same search and filter parameters as list_sales. Rows are
+    read with a single joined query through a chunked iterator and written
+    as they are produced, so memory stays flat for any number of sales.
+    """
+    try:
+        sales = _filter_sales(request).annotate(
+            active_items=FilteredRelation('sale_items', condition=Q(sale_items__is_active=True))
+        ).order_by('date_of_sale', 'invoice_number', 'active_items__created_at')
+        rows = sales.values_list(*[field for _, field in SALES_EXPORT_COLUMNS]).iterator(chunk_size=2000)
+        
+        def stream():
+            writer = csv.writer(_Echo())
+            yield writer.writerow([header for header, _ in SALES_EXPORT_COLUMNS])
+            for row in rows:
+                yield writer.writerow([
+                    timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if isinstance(value, datetime) else value
+                    for value in row
+                ])
+        
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = (
+            f'attachment; filename="sales_export_{timezone.localdate():%Y%m%d}.csv"'
+        )
+        return response
+        
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Failed to export sales.',
+            'errors': {'detail': str(e)}
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_sale(request):
     """Create a new sale"""
     serializer = SalesCreateSerializer(data=request.data)
@@ -102,9 +202,15 @@ def create_sale(request):
                 return Response({
                     'success': True,
                     'message': 'Sale created successfully.',
-                    'data': SalesSerializer(sale).data
+                    'data': SalesSerializer(Sales.objects.with_details().get(pk=sale.pk)).data
                 }, status=status.HTTP_201_CREATED)
                 
+        except DjangoValidationError as e:
+            return Response({
+                'success': False,
+                'message': 'Sale creation failed.',
+                'errors': {'detail': e.messages}
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'success': False,
@@ -124,7 +230,7 @@ def create_sale(request):
 def get_sale(request, sale_id):
     """Get sale details with items"""
     try:
-        sale = get_object_or_404(Sales, id=sale_id, is_active=True)
+        sale = get_object_or_404(Sales.objects.with_details(), id=sale_id, is_active=True)
         serializer = SalesSerializer(sale)
         
         return Response({
@@ -145,6 +251,53 @@ def get_sale(request, sale_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sale_invoice(request, sale_id):
+    """
+    Get the printable invoice PDF of a sale.
+    
+    Rendered invoices are cached on disk per version of the sale, so a
+    reprint only looks up the sale's updated_at before streaming the file.
+    The first print renders on the invoice pool; if that takes longer than
+    INVOICE_RENDER_TIMEOUT seconds, 202 is returned and the client retries.
+    """
+    version = Sales.objects.filter(id=sale_id, is_active=True).values_list(
+        'updated_at', 'invoice_number'
+    ).first()
+    if version is None:
+        return Response({
+            'success': False,
+            'message': 'Sale not found.'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    updated_at, invoice_number = version
+    try:
+        path = cached_invoice_path(sale_id, updated_at)
+        if path is None:
+            sale = Sales.objects.with_details().get(id=sale_id)
+            future = submit_invoice_render(sale)
+            path = future.result(timeout=getattr(settings, 'INVOICE_RENDER_TIMEOUT', 10))
+        
+        return FileResponse(
+            open(path, 'rb'),
+            content_type='application/pdf',
+            filename=f'{invoice_number}.pdf'
+        )
+        
+    except RenderTimeoutError:
+        return Response({
+            'success': False,
+            'message': 'Invoice is still being rendered. Please retry shortly.'
+        }, status=status.HTTP_202_ACCEPTED, headers={'Retry-After': '1'})
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Failed to render invoice.',
+            'errors': {'detail': str(e)}
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def update_sale(request, sale_id):
@@ -161,6 +314,9 @@ def update_sale(request, sale_id):
             with transaction.atomic():
                 updated_sale = serializer.save()
                 
+                # A status change here moves stock just like update_status
+                updated_sale.sync_stock_reservations()
+                
                 return Response({
                     'success': True,
                     'message': 'Sale updated successfully.',
@@ -178,6 +334,12 @@ def update_sale(request, sale_id):
             'success': False,
             'message': 'Sale not found.'
         }, status=status.HTTP_404_NOT_FOUND)
+    except DjangoValidationError as e:
+        return Response({
+            'success': False,
+            'message': 'Sale update failed.',
+            'errors': {'detail': e.messages}
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'success': False,
@@ -192,8 +354,13 @@ def delete_sale(request, sale_id):
     """Soft delete sale"""
     try:
         sale = get_object_or_404(Sales, id=sale_id, is_active=True)
-        sale.is_active = False
-        sale.save()
+        
+        with transaction.atomic():
+            sale.is_active = False
+            sale.save()
+            
+            # Give back the stock the sale was holding
+            sale.sync_stock_reservations()
         
         return Response({
             'success': True,
@@ -215,6 +382,7 @@ def delete_sale(request, sale_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def add_payment(request, sale_id):
     """Record payment for a sale"""
     try:
@@ -232,7 +400,7 @@ def add_payment(request, sale_id):
                 if payment_data['payment_method'] == 'SPLIT':
                     sale.split_payment_details = payment_data.get('split_payment_details', {})
                 
-                sale.update_payment_status()
+                # save() derives the remaining amount and payment state
                 sale.save()
                 
                 return Response({
@@ -275,6 +443,9 @@ def update_status(request, sale_id):
                 sale.status = new_status
                 sale.save()
                 
+                # Deduct reserved stock on confirmation, give it back on cancellation or return
+                sale.sync_stock_reservations()
+                
                 return Response({
                     'success': True,
                     'message': f'Sale status updated to {new_status}.',
@@ -292,6 +463,12 @@ def update_status(request, sale_id):
             'success': False,
             'message': 'Sale not found.'
         }, status=status.HTTP_404_NOT_FOUND)
+    except DjangoValidationError as e:
+        return Response({
+            'success': False,
+            'message': 'Status update failed.',
+            'errors': {'detail': e.messages}
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'success': False,
@@ -308,7 +485,7 @@ def customer_sales_history(request, customer_id):
         customer = get_object_or_404(Customer, id=customer_id, is_active=True)
         sales = Sales.objects.by_customer(customer_id).active()
         
-        serializer = SalesListSerializer(sales, many=True)
+        serializer = SalesListSerializer(sales.with_item_count(), many=True)
         
         return Response({
             'success': True,
@@ -340,53 +517,71 @@ def customer_sales_history(request, customer_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def sales_statistics(request):
-    """Get sales statistics and analytics"""
+    """
+    Get sales statistics and analytics for a date range.
+    
+    Totals and monthly trends are read from the precomputed daily sales facts.
+    The range is start_date..end_date (YYYY-MM-DD), or the last `days` days
+    (default 30) up to today.
+    """
     try:
         # Get date range parameters
-        days = int(request.GET.get('days', 30))
+        try:
+            end_date = (
+                datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+                if request.GET.get('end_date') else timezone.localdate()
+            )
+            start_date = (
+                datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
+                if request.GET.get('start_date')
+                else end_date - timedelta(days=int(request.GET.get('days', 30)) - 1)
+            )
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Invalid date range.',
+                'errors': {'detail': 'start_date and end_date must be in YYYY-MM-DD format and days a number.'}
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         # Calculate statistics
-        recent_sales = Sales.objects.recent(days)
-        total_sales = recent_sales.count()
-        total_revenue = recent_sales.aggregate(total=Sum('grand_total'))['total'] or Decimal('0.00')
-        total_items = recent_sales.aggregate(total=Sum('total_items'))['total'] or 0
+        summary = DailySalesFact.summarize(start_date, end_date)
+        total_sales = summary['sales_count']
+        total_revenue = summary['revenue']
         average_sale_value = total_revenue / total_sales if total_sales > 0 else Decimal('0.00')
         
         # Payment completion rate
-        paid_sales = recent_sales.filter(is_fully_paid=True).count()
-        payment_completion_rate = (paid_sales / total_sales * 100) if total_sales > 0 else 0
+        payment_completion_rate = (summary['paid_count'] / total_sales * 100) if total_sales > 0 else 0
         
-        # Top products
+        # Top products and customers over the same range
+        range_sales = Sales.objects.filter(is_active=True, date_of_sale__date__range=[start_date, end_date])
         top_products = SaleItem.objects.filter(
-            sale__in=recent_sales
+            sale__in=range_sales,
+            is_active=True
         ).values('product_name').annotate(
             total_quantity=Sum('quantity'),
             total_revenue=Sum('line_total')
         ).order_by('-total_revenue')[:10]
         
-        # Top customers
-        top_customers = recent_sales.values('customer_name').annotate(
+        top_customers = range_sales.values('customer_name').annotate(
             total_sales=Count('id'),
             total_revenue=Sum('grand_total')
         ).order_by('-total_revenue')[:10]
         
-        # Monthly trends (simplified)
-        monthly_trends = recent_sales.extra(
-            select={'month': "EXTRACT(month FROM date_of_sale)"}
-        ).values('month').annotate(
-            sales_count=Count('id'),
-            revenue=Sum('grand_total')
-        ).order_by('month')
-        
         data = {
+            'start_date': start_date,
+            'end_date': end_date,
             'total_sales': total_sales,
             'total_revenue': total_revenue,
-            'total_items_sold': total_items,
+            'total_tax': summary['tax'],
+            'total_discounts': summary['discounts'],
+            'total_amount_paid': summary['amount_paid'],
+            'total_items_sold': summary['items_sold'],
             'average_sale_value': average_sale_value,
             'payment_completion_rate': payment_completion_rate,
+            'payment_methods': summary['payment_methods'],
             'top_products': list(top_products),
             'top_customers': list(top_customers),
-            'monthly_trends': list(monthly_trends)
+            'monthly_trends': summary['monthly_trends']
         }
         
         serializer = SalesStatisticsSerializer(data)
@@ -406,6 +601,7 @@ def sales_statistics(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_from_order(request):
     """Create sale from existing order"""
     serializer = OrderToSaleConversionSerializer(data=request.data)
@@ -430,52 +626,60 @@ def create_from_order(request):
                     'created_by': request.user
                 }
                 
-                sale = Sales.objects.create(**sale_data)
+                sale = Sales(**sale_data)
                 
-                # Create sale items from order items
+                # Build the sale items from the order items
                 partial_items = serializer.validated_data.get('partial_items', [])
+                sale_items = []
                 
                 if partial_items:
-                    # Partial conversion
+                    # Partial conversion; unknown order items are skipped
+                    order_items = {
+                        str(order_item.id): order_item
+                        for order_item in OrderItem.objects.select_related('product').filter(
+                            order=order,
+                            id__in=[item_data.get('order_item_id') for item_data in partial_items]
+                        )
+                    }
                     for item_data in partial_items:
-                        order_item_id = item_data.get('order_item_id')
+                        order_item = order_items.get(str(item_data.get('order_item_id')))
                         quantity_to_sell = item_data.get('quantity_to_sell', 1)
                         
-                        try:
-                            order_item = OrderItem.objects.get(id=order_item_id, order=order)
-                            
-                            if quantity_to_sell <= order_item.quantity:
-                                SaleItem.objects.create(
-                                    sale=sale,
-                                    order_item=order_item,
-                                    product=order_item.product,
-                                    unit_price=order_item.unit_price,
-                                    quantity=quantity_to_sell,
-                                    customization_notes=order_item.customization_notes
-                                )
-                        except OrderItem.DoesNotExist:
-                            continue
+                        if order_item and quantity_to_sell <= order_item.quantity:
+                            sale_items.append(SaleItem(
+                                order_item=order_item.id,
+                                product=order_item.product,
+                                unit_price=order_item.unit_price,
+                                quantity=quantity_to_sell,
+                                customization_notes=order_item.customization_notes
+                            ))
                 else:
                     # Full conversion
-                    for order_item in order.order_items.all():
-                        SaleItem.objects.create(
-                            sale=sale,
-                            order_item=order_item,
+                    for order_item in order.order_items.select_related('product'):
+                        sale_items.append(SaleItem(
+                            order_item=order_item.id,
                             product=order_item.product,
                             unit_price=order_item.unit_price,
                             quantity=order_item.quantity,
                             customization_notes=order_item.customization_notes
-                        )
+                        ))
                 
-                # Recalculate totals
-                sale.recalculate_totals()
+                # Save the sale with its totals once and deduct stock for the
+                # converted items (the sale is created confirmed)
+                sale.save_with_items(sale_items, user=request.user)
                 
                 return Response({
                     'success': True,
                     'message': 'Sale created from order successfully.',
-                    'data': SalesSerializer(sale).data
+                    'data': SalesSerializer(Sales.objects.with_details().get(pk=sale.pk)).data
                 }, status=status.HTTP_201_CREATED)
                 
+        except DjangoValidationError as e:
+            return Response({
+                'success': False,
+                'message': 'Order to sale conversion failed.',
+                'errors': {'detail': e.messages}
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'success': False,
@@ -490,6 +694,69 @@ def create_from_order(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def create_from_orders(request):
+    """Convert many ready orders to sales at once, reporting the outcome per order"""
+    serializer = BulkOrderToSaleConversionSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Bulk order to sale conversion failed.',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    sale_fields = {
+        'payment_method': data['payment_method'],
+        'gst_percentage': data['gst_percentage'],
+        'split_payment_details': data.get('split_payment_details', {}),
+        'notes': data.get('notes', '')
+    }
+    
+    try:
+        with transaction.atomic():
+            results = Sales.create_from_orders(data['orders'], user=request.user, **sale_fields)
+    except DjangoValidationError as e:
+        return Response({
+            'success': False,
+            'message': 'Bulk order to sale conversion failed.',
+            'errors': {'detail': e.messages}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Failed to create sales from orders.',
+            'errors': {'detail': str(e)}
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    converted_count = sum(1 for result in results if result['sale'])
+    return Response({
+        'success': converted_count == len(results),
+        'message': f'{converted_count} of {len(results)} orders converted to sales.',
+        'data': {
+            'converted_count': converted_count,
+            'failed_count': len(results) - converted_count,
+            'results': [
+                {
+                    'order_id': result['order_id'],
+                    'success': True,
+                    'sale_id': result['sale'].id,
+                    'invoice_number': result['sale'].invoice_number,
+                    'grand_total': result['sale'].grand_total
+                } if result['sale'] else {
+                    'order_id': result['order_id'],
+                    'success': False,
+                    'errors': result['errors']
+                }
+                for result in results
+            ]
+        }
+    }, status=status.HTTP_201_CREATED if converted_count else status.HTTP_400_BAD_REQUEST)
+
+
 # Sale Items views
 
 @api_view(['GET'])
@@ -525,6 +792,7 @@ def list_sale_items(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_sale_item(request):
     """Create a new sale item"""
     serializer = SaleItemCreateSerializer(data=request.data)
@@ -534,6 +802,9 @@ def create_sale_item(request):
             with transaction.atomic():
                 sale_item = serializer.save()
                 
+                # Hold stock for the new item (deducted at once if the sale is confirmed)
+                sale_item.sale.reserve_stock_for_items([sale_item], user=request.user)
+                
                 # Recalculate sale totals
                 sale_item.sale.recalculate_totals()
                 
@@ -543,6 +814,12 @@ def create_sale_item(request):
                     'data': SaleItemSerializer(sale_item).data
                 }, status=status.HTTP_201_CREATED)
                 
+        except DjangoValidationError as e:
+            return Response({
+                'success': False,
+                'message': 'Sale item creation failed.',
+                'errors': {'detail': e.messages}
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'success': False,
@@ -570,9 +847,16 @@ def update_sale_item(request, item_id):
             serializer = SaleItemUpdateSerializer(sale_item, data=request.data, partial=True)
         
         if serializer.is_valid():
+            old_quantity = sale_item.quantity
+            
             with transaction.atomic():
                 updated_item = serializer.save()
                 
+                # Hold or give back only the change in quantity
+                updated_item.sale.adjust_item_stock(
+                    updated_item.product, updated_item.quantity - old_quantity, user=request.user
+                )
+                
                 # Recalculate sale totals
                 updated_item.sale.recalculate_totals()
                 
@@ -593,6 +877,12 @@ def update_sale_item(request, item_id):
             'success': False,
             'message': 'Sale item not found.'
         }, status=status.HTTP_404_NOT_FOUND)
+    except DjangoValidationError as e:
+        return Response({
+            'success': False,
+            'message': 'Sale item update failed.',
+            'errors': {'detail': e.messages}
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'success': False,
@@ -612,6 +902,9 @@ def delete_sale_item(request, item_id):
             sale_item.is_active = False
             sale_item.save()
             
+            # Give back the stock held for the removed item
+            sale_item.sale.adjust_item_stock(sale_item.product, -sale_item.quantity)
+            
             # Recalculate sale totals
             sale_item.sale.recalculate_totals()
             
@@ -19,10 +19,13 @@ from .serializers import (
     VendorContactUpdateSerializer,
 )
 from .signals import vendor_bulk_updated
+from core.pagination import paginate_queryset
+from core.conditional import conditional_get
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(Vendor)
 def list_vendors(request):
     """
     List all active vendors with pagination, search, and filtering
@@ -104,12 +107,8 @@ def list_vendors(request):
         # Select related to avoid N+1 queries
         vendors = vendors.select_related('created_by')
         
-        # Calculate pagination
-        total_count = vendors.count()
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        
-        vendors = vendors[start_index:end_index]
+        # Calculate pagination (keyset when ?cursor= is given)
+        vendors, pagination = paginate_queryset(request, vendors, page, page_size)
         
         serializer = VendorListSerializer(vendors, many=True)
         
@@ -117,14 +116,7 @@ def list_vendors(request):
             'success': True,
             'data': {
                 'vendors': serializer.data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_count': total_count,
-                    'total_pages': (total_count + page_size - 1) // page_size,
-                    'has_next': end_index < total_count,
-                    'has_previous': page > 1
-                },
+                'pagination': pagination,
                 'filters_applied': {
                     'search': search,
                     'city': city,
@@ -190,6 +182,7 @@ def create_vendor(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(lambda request, vendor_id: Vendor.objects.filter(pk=vendor_id))
 def get_vendor(request, vendor_id):
     """
     Retrieve a specific vendor by ID
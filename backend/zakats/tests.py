@@ -1,3 +1,43 @@
+from decimal import Decimal
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from posapi.factories import UserFactory
+from .models import Zakat
 
-# Create your tests here.
+
+class ZakatListPaginationTest(TestCase):
+    """Test keyset pagination on the zakat list"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        now = timezone.localtime()
+        Zakat.objects.create(
+            name='Ramadan distribution',
+            description='Zakat paid to a local family',
+            date=now.date(),
+            time=now.time(),
+            amount=Decimal('10000.00'),
+            beneficiary_name='Local Family',
+            authorized_by='Mr Sheikh Zain Maqbool',
+            created_by=self.user
+        )
+
+    def test_first_cursor_page(self):
+        """Test an empty cursor returns the first keyset page"""
+        response = self.client.get(reverse('zakat-list-create'), {'cursor': ''})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']['zakat_entries']), 1)
+        self.assertFalse(response.data['data']['pagination']['has_next'])
+
+    def test_invalid_cursor_is_rejected(self):
+        """Test a malformed cursor is a client error, not a server error"""
+        response = self.client.get(reverse('zakat-list-create'), {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Invalid pagination parameters.')
@@ -7,6 +7,7 @@ from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from datetime import datetime, timedelta
+from core.pagination import is_cursor_request, cursor_paginate
 from .models import Zakat
 from .serializers import (
     ZakatSerializer,
@@ -69,22 +70,20 @@ def zakat_list_create(request):
         ordering = request.GET.get('ordering', '-date')
         zakat_entries = zakat_entries.order_by(ordering)
         
-        # Pagination
-        page = int(request.GET.get('page', 1))
-        page_size = int(request.GET.get('page_size', 20))
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        total_count = zakat_entries.count()
-        zakat_page = zakat_entries[start:end]
-        
-        serializer = ZakatListSerializer(zakat_page, many=True)
-        
-        return Response({
-            'success': True,
-            'data': {
-                'zakat_entries': serializer.data,
-                'pagination': {
+        # Pagination (keyset when ?cursor= is given)
+        try:
+            page = int(request.GET.get('page', 1))
+            page_size = int(request.GET.get('page_size', 20))
+        
+            if is_cursor_request(request):
+                zakat_page, pagination = cursor_paginate(request, zakat_entries, page_size)
+            else:
+                start = (page - 1) * page_size
+                end = start + page_size
+            
+                total_count = zakat_entries.count()
+                zakat_page = zakat_entries[start:end]
+                pagination = {
                     'page': page,
                     'page_size': page_size,
                     'total_count': total_count,
@@ -92,6 +91,20 @@ def zakat_list_create(request):
                     'has_next': end < total_count,
                     'has_previous': page > 1
                 }
+        except ValueError as e:
+            return Response({
+                'success': False,
+                'message': 'Invalid pagination parameters.',
+                'errors': {'detail': str(e)}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = ZakatListSerializer(zakat_page, many=True)
+        
+        return Response({
+            'success': True,
+            'data': {
+                'zakat_entries': serializer.data,
+                'pagination': pagination
             }
         }, status=status.HTTP_200_OK)
     